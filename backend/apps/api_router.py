@@ -1,14 +1,16 @@
 from rest_framework import routers
 from django.urls import path, include
 from apps.services.views import ServiceViewSet, AvailabilityViewSet
-from apps.appointments.views import AppointmentViewSet, ReviewViewSet
+from apps.appointments.views import AppointmentViewSet, AppointmentSeriesViewSet, ReviewViewSet, calendar_feed
 
 router = routers.DefaultRouter()
 router.register(r'services', ServiceViewSet, basename='service')
 router.register(r'availability', AvailabilityViewSet, basename='availability')
 router.register(r'appointments', AppointmentViewSet, basename='appointment')
-router.register(r'reviews', ReviewViewSet)
+router.register(r'appointment-series', AppointmentSeriesViewSet, basename='appointment-series')
+router.register(r'reviews', ReviewViewSet, basename='review')
 
 urlpatterns = [
+    path('appointments/calendar/<str:token>.ics', calendar_feed, name='appointment-calendar'),
     path('', include(router.urls)),
 ]
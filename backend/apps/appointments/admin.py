@@ -1,16 +1,36 @@
 from django.contrib import admin
-from .models import Appointment, Review
+from apps.core.admin import AutocompleteFilter, LargeTableAdminMixin
+from .models import Appointment, AppointmentSeries, Review
 
 @admin.register(Appointment)
-class AppointmentAdmin(admin.ModelAdmin):
+class AppointmentAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('id', 'client', 'provider', 'service', 'date', 'time_slot', 'status')
-    list_filter = ('status', 'date', 'provider', 'client')
-    search_fields = ('client__email', 'provider__email', 'service__name')
+    list_filter = ('status', 'date', ('provider', AutocompleteFilter), ('client', AutocompleteFilter))
+    # Service.__str__ shows the provider's email
+    list_select_related = ('client', 'provider', 'service__provider')
+    # Exact id or email prefixes rather than substring scans over three joined tables
+    search_fields = ('id__exact', '^client__email', '^provider__email')
+    search_help_text = 'Appointment id, or the start of the client or provider email.'
     list_editable = ('status',)
-    date_hierarchy = 'date'
-    ordering = ('-date', '-time_slot')
+    raw_id_fields = ('client', 'provider', 'service', 'series')
+    # Newest first straight off the primary key; no date_hierarchy, whose
+    # year/month links run DISTINCT over the whole table
+    ordering = ('-id',)
+
+@admin.register(AppointmentSeries)
+class AppointmentSeriesAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ('id', 'client', 'provider', 'service', 'frequency', 'start_date', 'time_slot', 'count', 'until')
+    list_filter = ('frequency', ('provider', AutocompleteFilter), ('client', AutocompleteFilter))
+    list_select_related = ('client', 'provider', 'service__provider')
+    search_fields = ('id__exact', '^client__email', '^provider__email')
+    raw_id_fields = ('client', 'provider', 'service')
+    ordering = ('-id',)
 
 @admin.register(Review)
-class ReviewAdmin(admin.ModelAdmin):
+class ReviewAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('id', 'appointment', 'rating', 'created_at')
-    list_filter = ('rating',)
+    list_filter = ('rating', ('provider', AutocompleteFilter))
+    # Appointment.__str__ shows the client and service
+    list_select_related = ('appointment__client', 'appointment__service')
+    raw_id_fields = ('appointment', 'provider', 'service')
+    ordering = ('-id',)
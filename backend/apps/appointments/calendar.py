@@ -0,0 +1,129 @@
+"""
+iCalendar (RFC 5545) feeds of a user's appointments.
+
+Calendar apps can't send a bearer token, so each feed lives at a URL carrying
+the user id and a per-user secret, signed. Rotating the secret revokes the
+URLs handed out before. The feed is rendered line by line from a chunked
+`.iterator()` query and streamed, so its memory use doesn't depend on how much
+history it covers.
+"""
+import hashlib
+import secrets
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.core import signing
+from django.db.models import Count, Max
+from django.utils import timezone
+from apps.users.models import User
+
+SALT = 'appointments.calendar'
+CHUNK_SIZE = 500
+# Without ?start=, feeds begin this far back
+DEFAULT_HISTORY = timedelta(days=90)
+EVENT_STATUS = {
+    'PENDING': 'TENTATIVE',
+    'CONFIRMED': 'CONFIRMED',
+    'COMPLETED': 'CONFIRMED',
+    'CANCELLED': 'CANCELLED',
+    'REJECTED': 'CANCELLED',
+}
+
+
+def feed_secret(user_pk, rotate=False):
+    """The user's current feed secret, created on first use; rotate=True replaces it."""
+    users = User.objects.filter(pk=user_pk)
+    if not rotate:
+        current = users.values_list('calendar_secret', flat=True).first()
+        if current:
+            return current
+        # Only fill it in while still empty, so concurrent first requests agree on one secret
+        users.filter(calendar_secret='').update(calendar_secret=secrets.token_urlsafe(16))
+        return users.values_list('calendar_secret', flat=True).first()
+    secret = secrets.token_urlsafe(16)
+    users.update(calendar_secret=secret)
+    return secret
+
+
+def feed_token(user_pk, secret):
+    return signing.Signer(salt=SALT).sign(f'{user_pk}:{secret}')
+
+
+def parse_feed_token(token):
+    """(user id, secret) a feed token was issued with, or None if the signature doesn't check out."""
+    try:
+        user_pk, secret = signing.Signer(salt=SALT).unsign(token).split(':')
+        return int(user_pk), secret
+    except (signing.BadSignature, ValueError):
+        return None
+
+
+def feed_etag(queryset, role, window):
+    """Weak ETag from one aggregate over the feed's rows and everything an event shows."""
+    other = 'client' if role == 'PROVIDER' else 'provider'
+    result = queryset.order_by().aggregate(
+        count=Count('pk'), rows=Max('updated_at'),
+        services=Max('service__updated_at'), people=Max(f'{other}__updated_at'),
+    )
+    raw = repr((role, window, sorted((k, str(v)) for k, v in result.items())))
+    return f'W/"{hashlib.md5(raw.encode()).hexdigest()}"'
+
+
+def _escape(text):
+    return text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def _fold(line):
+    """Split content lines longer than 75 octets, without breaking a UTF-8 sequence."""
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts, start, limit = [], 0, 75
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(encoded[start:end].decode())
+        start, limit = end, 74  # continuation lines start with a space
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _utc(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _name(first, last, email):
+    return f'{first} {last}'.strip() or email
+
+
+def render_feed(queryset, role, host):
+    """Yield the VCALENDAR text for `queryset`, one event at a time."""
+    other = 'client' if role == 'PROVIDER' else 'provider'
+    rows = queryset.order_by('date', 'time_slot').values_list(
+        'pk', 'date', 'time_slot', 'status', 'notes', 'updated_at', 'service__name', 'service__duration',
+        f'{other}__first_name', f'{other}__last_name', f'{other}__email',
+    )
+    yield (
+        'BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//Doctor Appointments//Calendar feed//EN\r\n'
+        'CALSCALE:GREGORIAN\r\nMETHOD:PUBLISH\r\nX-WR-CALNAME:Appointments\r\n'
+    )
+    for pk, day, time_slot, status, notes, updated_at, service, duration, first, last, email in rows.iterator(
+        chunk_size=CHUNK_SIZE
+    ):
+        # Dates and slots are wall-clock times in TIME_ZONE
+        start = timezone.make_aware(datetime.combine(day, time_slot))
+        who = _name(first, last, email)
+        summary = f'{service} with {who}' if role != 'PROVIDER' else f'{service}: {who}'
+        lines = [
+            'BEGIN:VEVENT',
+            f'UID:appointment-{pk}@{host}',
+            f'DTSTAMP:{_utc(updated_at)}',
+            f'LAST-MODIFIED:{_utc(updated_at)}',
+            f'DTSTART:{_utc(start)}',
+            f'DTEND:{_utc(start + timedelta(minutes=duration))}',
+            f'SUMMARY:{_escape(summary)}',
+            f'STATUS:{EVENT_STATUS[status]}',
+        ]
+        if notes:
+            lines.append(f'DESCRIPTION:{_escape(notes)}')
+        lines.append('END:VEVENT')
+        yield ''.join(_fold(line) for line in lines)
+    yield 'END:VCALENDAR\r\n'
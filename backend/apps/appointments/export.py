@@ -0,0 +1,84 @@
+"""
+Flat appointment exports (one row per appointment, with the service price)
+for billing, as CSV or NDJSON.
+
+Rows come from `values_list().iterator(chunk_size=...)`: a named server-side
+cursor on PostgreSQL, fetchmany() elsewhere. No model instances are built and
+nothing is accumulated, so memory stays constant however many rows match.
+"""
+import csv
+from django.core.serializers.json import DjangoJSONEncoder
+from .models import Appointment
+
+CHUNK_SIZE = 2000
+FORMATS = ('csv', 'ndjson')
+COLUMNS = (
+    ('id', 'id'),
+    ('date', 'date'),
+    ('time_slot', 'time_slot'),
+    ('status', 'status'),
+    ('service_id', 'service_id'),
+    ('service', 'service__name'),
+    ('duration', 'service__duration'),
+    ('price', 'service__price'),
+    ('provider_id', 'provider_id'),
+    ('provider_email', 'provider__email'),
+    ('client_id', 'client_id'),
+    ('client_email', 'client__email'),
+    ('created_at', 'created_at'),
+)
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def export_rows(start=None, end=None, provider_id=None, statuses=None, chunk_size=CHUNK_SIZE):
+    """Matching appointments as tuples in COLUMNS order, in date and slot order."""
+    queryset = Appointment.objects.all()
+    if start is not None:
+        queryset = queryset.filter(date__gte=start)
+    if end is not None:
+        queryset = queryset.filter(date__lte=end)
+    if provider_id is not None:
+        queryset = queryset.filter(provider_id=provider_id)
+    if statuses:
+        queryset = queryset.filter(status__in=statuses)
+    # Same order as appointment_start_idx, so PostgreSQL can stream it without a sort
+    queryset = queryset.order_by('date', 'time_slot').values_list(*(lookup for _, lookup in COLUMNS))
+    return queryset.iterator(chunk_size=chunk_size)
+
+
+class _Line:
+    """File-like sink so csv.writer hands back each formatted line instead of buffering it."""
+
+    def write(self, value):
+        return value
+
+
+# Spreadsheets run text cells starting with these as formulas
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _cell(value):
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def iter_csv(rows):
+    writer = csv.writer(_Line())
+    yield writer.writerow([name for name, _ in COLUMNS])
+    for row in rows:
+        yield writer.writerow([_cell(value) for value in row])
+
+
+def iter_ndjson(rows):
+    names = [name for name, _ in COLUMNS]
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    for row in rows:
+        yield encoder.encode(dict(zip(names, row))) + '\n'
+
+
+def render(rows, output):
+    return iter_csv(rows) if output == 'csv' else iter_ndjson(rows)
@@ -0,0 +1,38 @@
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from apps.appointments.export import CHUNK_SIZE, FORMATS, export_rows, render
+from apps.appointments.models import Appointment
+
+
+class Command(BaseCommand):
+    help = 'Stream appointments with service prices as CSV or NDJSON, in constant memory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+        parser.add_argument('--start', type=date.fromisoformat, help='First date, YYYY-MM-DD')
+        parser.add_argument('--end', type=date.fromisoformat, help='Last date, YYYY-MM-DD')
+        parser.add_argument('--provider', type=int, help='Provider user id')
+        parser.add_argument('--status', default='', help='Comma-separated statuses, e.g. COMPLETED,CONFIRMED')
+        parser.add_argument('--output', help='File to write; defaults to stdout')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Rows fetched per round trip')
+
+    def handle(self, *args, **options):
+        statuses = [s.strip().upper() for s in options['status'].split(',') if s.strip()]
+        unknown = set(statuses) - {value for value, _ in Appointment.STATUS_CHOICES}
+        if unknown:
+            raise CommandError(f'Unknown statuses: {", ".join(sorted(unknown))}')
+        rows = export_rows(
+            start=options['start'], end=options['end'], provider_id=options['provider'],
+            statuses=statuses, chunk_size=options['chunk_size'],
+        )
+        lines = render(rows, options['format'])
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        count = -1 if options['format'] == 'csv' else 0  # CSV starts with a header line
+        with open(options['output'], 'w', newline='', encoding='utf-8') as fh:
+            for line in lines:
+                fh.write(line)
+                count += 1
+        self.stderr.write(self.style.SUCCESS(f'Exported {count} appointments to {options["output"]}.'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from apps.appointments.ratings import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recompute the per-provider rating counters from all reviews'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        changed = rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Repaired rating counters on {changed} provider profiles.'))
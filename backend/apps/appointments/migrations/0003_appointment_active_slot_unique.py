@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2026-10-17 23:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+INACTIVE_STATUSES = ('CANCELLED', 'REJECTED')
+
+
+def cancel_duplicate_bookings(apps, schema_editor):
+    """Keep the first active booking of each provider slot and cancel the rest, so the constraint can be added."""
+    Appointment = apps.get_model('appointments', 'Appointment')
+    active = Appointment.objects.exclude(status__in=INACTIVE_STATUSES)
+    duplicated = active.values('provider_id', 'date', 'time_slot').order_by().annotate(
+        bookings=models.Count('id'), first=models.Min('id'),
+    ).filter(bookings__gt=1)
+    for slot in list(duplicated):
+        active.filter(
+            provider_id=slot['provider_id'], date=slot['date'], time_slot=slot['time_slot'],
+        ).exclude(id=slot['first']).update(status='CANCELLED')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0002_alter_appointment_client'),
+        ('services', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(cancel_duplicate_bookings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='appointment',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ('CANCELLED', 'REJECTED')), _negated=True), fields=('provider', 'date', 'time_slot'), name='appointment_active_slot_unique'),
+        ),
+    ]
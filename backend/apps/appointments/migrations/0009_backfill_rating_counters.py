@@ -0,0 +1,37 @@
+from django.db import migrations, models
+
+STARS = range(1, 6)
+FIELDS = ['rating_count', 'rating_sum', *(f'rating_{stars}' for stars in STARS)]
+
+
+def backfill(apps, schema_editor):
+    """Fill the counters added in users.0008 from existing reviews, as ratings.rebuild() does."""
+    Review = apps.get_model('appointments', 'Review')
+    ProviderProfile = apps.get_model('users', 'ProviderProfile')
+    # Legacy ratings outside 1-5 have no bucket, so they stay out of the counters
+    totals = {
+        row['provider_id']: row
+        for row in Review.objects.filter(rating__in=STARS).values('provider_id').order_by().annotate(
+            rating_count=models.Count('id'),
+            rating_sum=models.Sum('rating'),
+            **{f'rating_{stars}': models.Count('id', filter=models.Q(rating=stars)) for stars in STARS},
+        )
+    }
+    changed = []
+    for profile in ProviderProfile.objects.filter(user_id__in=totals).only('id', 'user_id', *FIELDS).iterator():
+        for field in FIELDS:
+            setattr(profile, field, totals[profile.user_id][field])
+        changed.append(profile)
+    ProviderProfile.objects.bulk_update(changed, FIELDS, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0008_appointment_series'),
+        ('users', '0008_provider_rating_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-18 00:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0009_backfill_rating_counters'),
+        ('services', '0002_hot_path_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(condition=models.Q(('status__in', ('CANCELLED', 'REJECTED')), _negated=True), fields=['date', 'time_slot'], name='appointment_active_start_idx'),
+        ),
+    ]
@@ -1,7 +1,140 @@
+from datetime import time, timedelta
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.conf import settings
 from apps.services.models import Service
 
+MINUTES_PER_DAY = 24 * 60
+
+# Cancelled and rejected appointments no longer hold their time slot
+INACTIVE_STATUSES = ('CANCELLED', 'REJECTED')
+
+# Target status -> statuses an appointment may move to it from
+STATUS_TRANSITIONS = {
+    'CONFIRMED': ('PENDING',),
+    'REJECTED': ('PENDING',),
+    'CANCELLED': ('PENDING', 'CONFIRMED'),
+    'COMPLETED': ('CONFIRMED',),
+}
+
+class AppointmentQuerySet(models.QuerySet):
+    def active(self):
+        return self.exclude(status__in=INACTIVE_STATUSES)
+
+    def starting_between(self, start, end):
+        """
+        Appointments starting in [start, end), given as naive local datetimes.
+        Split into per-date ranges so each branch is a range read on the (date, time_slot) index.
+        """
+        if start.date() == end.date():
+            return self.filter(date=start.date(), time_slot__gte=start.time(), time_slot__lt=end.time())
+        return self.filter(
+            models.Q(date=start.date(), time_slot__gte=start.time())
+            | models.Q(date__gt=start.date(), date__lt=end.date())
+            | models.Q(date=end.date(), time_slot__lt=end.time())
+        )
+
+    def clashes(self, provider_id, dates, time_slot, duration):
+        """
+        Active appointments for the provider that overlap [time_slot, time_slot + duration)
+        on any of `dates`, as (pk, series_id, requested date) tuples.
+
+        Both sides are compared in minutes from midnight of the requested date, so
+        an appointment running past midnight is checked against the next day's
+        slots and a late request against the next morning. Candidates come from
+        range scans on (provider, date, time_slot): each requested date up to the
+        window's end, the day before it, and, when the window crosses midnight,
+        the start of the day after.
+        """
+        start = time_slot.hour * 60 + time_slot.minute
+        end = start + duration
+        dates = set(dates)
+        one_day = timedelta(days=1)
+        same_day = models.Q(date__in=dates)
+        if end < MINUTES_PER_DAY:
+            same_day &= models.Q(time_slot__lt=time(end // 60, end % 60))
+        candidates = same_day | models.Q(date__in={day - one_day for day in dates})
+        if end > MINUTES_PER_DAY:
+            next_day = models.Q(date__in={day + one_day for day in dates})
+            spill = end - MINUTES_PER_DAY
+            if spill < MINUTES_PER_DAY:
+                next_day &= models.Q(time_slot__lt=time(spill // 60, spill % 60))
+            candidates |= next_day
+        rows = self.active().filter(candidates, provider_id=provider_id).values_list(
+            'pk', 'series_id', 'date', 'time_slot', 'service__duration',
+        )
+        for pk, series_id, other_date, other_start, other_duration in rows:
+            for offset in (-1, 0, 1):
+                day = other_date - offset * one_day
+                if day not in dates:
+                    continue
+                begins = offset * MINUTES_PER_DAY + other_start.hour * 60 + other_start.minute
+                if begins < end and begins + other_duration > start:
+                    yield pk, series_id, day
+
+    def overlapping(self, provider_id, date, time_slot, duration, exclude_pk=None):
+        """Ids of the active appointments for the provider that overlap the slot, across midnight too."""
+        return list(dict.fromkeys(
+            pk for pk, _, _ in self.clashes(provider_id, [date], time_slot, duration) if pk != exclude_pk
+        ))
+
+    def conflicting_dates(self, provider_id, dates, time_slot, duration, exclude_series_id=None):
+        """
+        overlapping() for the same slot on many dates at once: one query over
+        all the dates, returning the set of dates that already have an overlap.
+        """
+        return {
+            day for _, series_id, day in self.clashes(provider_id, dates, time_slot, duration)
+            if exclude_series_id is None or series_id != exclude_series_id
+        }
+
+class AppointmentSeries(models.Model):
+    """
+    A recurring booking, like an RRULE with FREQ/INTERVAL and COUNT or UNTIL:
+    the same time slot every `interval` days or weeks from `start_date`.
+    """
+    FREQUENCY_CHOICES = (
+        ('DAILY', 'Daily'),
+        ('WEEKLY', 'Weekly'),
+    )
+    MAX_OCCURRENCES = 52
+
+    client = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='client_series')
+    provider = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='provider_series')
+    service = models.ForeignKey(Service, on_delete=models.CASCADE)
+    frequency = models.CharField(max_length=10, choices=FREQUENCY_CHOICES, default='WEEKLY')
+    interval = models.PositiveSmallIntegerField(default=1, validators=[MinValueValidator(1), MaxValueValidator(52)])
+    start_date = models.DateField()
+    time_slot = models.TimeField()
+    count = models.PositiveSmallIntegerField(
+        null=True, blank=True, validators=[MinValueValidator(1), MaxValueValidator(MAX_OCCURRENCES)],
+    )
+    until = models.DateField(null=True, blank=True)
+    notes = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'appointment series'
+
+    def __str__(self):
+        return f"{self.client} - {self.service.name} ({self.get_frequency_display()} from {self.start_date})"
+
+    @property
+    def step(self):
+        return timedelta(days=self.interval * (7 if self.frequency == 'WEEKLY' else 1))
+
+    def occurrences_until(self):
+        """How many occurrences fall between start_date and until, before any cap."""
+        return max((self.until - self.start_date) // self.step + 1, 0)
+
+    def occurrence_dates(self):
+        """All occurrence dates, computed arithmetically rather than by walking the calendar."""
+        total = self.count or self.MAX_OCCURRENCES
+        if self.until is not None:
+            total = min(total, self.occurrences_until())
+        return [self.start_date + self.step * i for i in range(total)]
+
 class Appointment(models.Model):
     STATUS_CHOICES = (
         ('PENDING', 'Pending'),
@@ -10,10 +143,15 @@ class Appointment(models.Model):
         ('CANCELLED', 'Cancelled'),
         ('REJECTED', 'Rejected'),
     )
+    INACTIVE_STATUSES = INACTIVE_STATUSES
 
-    client = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='client_appointments')
-    provider = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='provider_appointments')
+    # The composite indexes in Meta lead with these columns, so the FK indexes would be redundant
+    client = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='client_appointments', db_index=False)
+    provider = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='provider_appointments', db_index=False)
     service = models.ForeignKey(Service, on_delete=models.CASCADE)
+    series = models.ForeignKey(
+        'AppointmentSeries', on_delete=models.SET_NULL, null=True, blank=True, related_name='appointments',
+    )
     date = models.DateField()
     time_slot = models.TimeField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
@@ -21,14 +159,59 @@ class Appointment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = AppointmentQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['provider', 'date'], name='appointment_provider_date_idx'),
+            models.Index(fields=['client', 'date'], name='appointment_client_date_idx'),
+            models.Index(fields=['status', 'date'], name='appointment_status_date_idx'),
+            # Exports and calendar feeds read every status in start order
+            models.Index(fields=['date', 'time_slot'], name='appointment_start_idx'),
+            # active() windows such as the reminder scheduler's look-ahead. Only PostgreSQL
+            # uses it: SQLite can't match a parameterized status filter against the condition
+            models.Index(
+                fields=['date', 'time_slot'],
+                condition=~models.Q(status__in=INACTIVE_STATUSES),
+                name='appointment_active_start_idx',
+            ),
+        ]
+        constraints = [
+            # Backs the overlap range scan and rejects two active bookings at the same start
+            models.UniqueConstraint(
+                fields=['provider', 'date', 'time_slot'],
+                condition=~models.Q(status__in=INACTIVE_STATUSES),
+                name='appointment_active_slot_unique',
+            ),
+        ]
+
     def __str__(self):
         return f"{self.client} - {self.service.name} ({self.date} {self.time_slot})"
 
 class Review(models.Model):
     appointment = models.OneToOneField(Appointment, on_delete=models.CASCADE, related_name='review')
-    rating = models.PositiveIntegerField(default=5)
+    # Copied from the appointment so per-provider/per-service listings are one index range scan
+    provider = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='reviews_received', db_index=False,
+    )
+    service = models.ForeignKey(Service, on_delete=models.CASCADE, related_name='reviews', db_index=False)
+    rating = models.PositiveIntegerField(default=5, validators=[MinValueValidator(1), MaxValueValidator(5)])
     comment = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Newest-first keyset pages, scoped or not; they also cover the FK lookups
+            models.Index(fields=['provider', '-created_at', '-id'], name='review_provider_recent_idx'),
+            models.Index(fields=['service', '-created_at', '-id'], name='review_service_recent_idx'),
+            models.Index(fields=['-created_at', '-id'], name='review_recent_idx'),
+        ]
+
     def __str__(self):
         return f"Review for {self.appointment.id}"
+
+    def save(self, *args, **kwargs):
+        if self.provider_id is None or self.service_id is None:
+            self.provider_id = self.appointment.provider_id
+            self.service_id = self.appointment.service_id
+        super().save(*args, **kwargs)
@@ -0,0 +1,60 @@
+"""
+Per-provider rating counters on ProviderProfile.
+
+Reviews adjust the counters with F() expressions in a single UPDATE, so
+concurrent reviews for one provider never lose an increment and reads need
+no aggregation. `rebuild_ratings` recomputes them from the reviews.
+"""
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+from apps.core.cache import bump
+from apps.users.models import ProviderProfile
+from .models import Review
+
+STARS = range(1, 6)
+
+
+def adjust(provider_id, added=None, removed=None):
+    """
+    Apply one review's rating being added, removed or changed (both given).
+    Legacy ratings outside 1-5 were never counted, so they are skipped.
+    """
+    delta = {}
+    for rating, sign in ((added, 1), (removed, -1)):
+        if rating not in STARS:
+            continue
+        delta['rating_count'] = delta.get('rating_count', 0) + sign
+        delta['rating_sum'] = delta.get('rating_sum', 0) + sign * rating
+        delta[f'rating_{rating}'] = delta.get(f'rating_{rating}', 0) + sign
+    changes = {field: F(field) + step for field, step in delta.items() if step}
+    if not changes:
+        return
+    # update() skips auto_now and signals, so stamp updated_at (ETags) and invalidate cached lists here
+    ProviderProfile.objects.filter(user_id=provider_id).update(updated_at=timezone.now(), **changes)
+    bump('providers')
+
+
+def rebuild(batch_size=1000):
+    """Recompute every provider's counters from the reviews; returns the number of profiles updated."""
+    totals = {
+        row['provider_id']: row
+        for row in Review.objects.filter(rating__in=STARS).values('provider_id').order_by().annotate(
+            rating_count=Count('id'),
+            rating_sum=Sum('rating'),
+            **{f'rating_{stars}': Count('id', filter=Q(rating=stars)) for stars in STARS},
+        )
+    }
+    fields = ['rating_count', 'rating_sum', *(f'rating_{stars}' for stars in STARS)]
+    empty = dict.fromkeys(fields, 0)
+    changed = []
+    for profile in ProviderProfile.objects.only('id', 'user_id', *fields).iterator(chunk_size=batch_size):
+        row = totals.get(profile.user_id, empty)
+        if any(getattr(profile, field) != row[field] for field in fields):
+            for field in fields:
+                setattr(profile, field, row[field])
+            profile.updated_at = timezone.now()
+            changed.append(profile)
+    ProviderProfile.objects.bulk_update(changed, [*fields, 'updated_at'], batch_size=batch_size)
+    if changed:
+        bump('providers')
+    return len(changed)
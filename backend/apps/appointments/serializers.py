@@ -1,13 +1,40 @@
+from contextlib import contextmanager
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Appointment, Review
+from .export import FORMATS
+from .models import Appointment, AppointmentSeries, Review, INACTIVE_STATUSES, STATUS_TRANSITIONS
+from apps.services.models import Service
 from apps.services.serializers import ServiceSerializer
+from apps.services.slots import unavailable_dates
+from apps.users.models import User
 from apps.users.serializers import UserSerializer
 
 class ReviewSerializer(serializers.ModelSerializer):
+    reviewer_name = serializers.SerializerMethodField()
+    service_name = serializers.CharField(source='service.name', read_only=True)
+
     class Meta:
         model = Review
         fields = '__all__'
-        read_only_fields = ('appointment', 'created_at')
+        read_only_fields = ('provider', 'service', 'created_at')
+
+    def get_reviewer_name(self, review):
+        # First name and last initial: enough to recognise a review without publishing full names
+        client = review.appointment.client
+        initial = client.last_name[:1]
+        name = f"{client.first_name} {initial}." if initial else client.first_name
+        return name.strip() or 'Patient'
+
+    def validate_appointment(self, appointment):
+        if self.instance is not None and appointment != self.instance.appointment:
+            raise serializers.ValidationError('A review cannot be moved to another appointment.')
+        request = self.context['request']
+        if appointment.client_id != request.user.pk:
+            raise serializers.ValidationError('You can only review your own appointments.')
+        if appointment.status != 'COMPLETED':
+            raise serializers.ValidationError('Only completed appointments can be reviewed.')
+        return appointment
 
 class AppointmentSerializer(serializers.ModelSerializer):
     service_details = ServiceSerializer(source='service', read_only=True)
@@ -19,6 +46,183 @@ class AppointmentSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ('client', 'provider', 'created_at', 'updated_at')
 
+    overlap_error = 'This time slot overlaps an existing appointment for this provider.'
+
+    def validate(self, data):
+        if self.instance is None or {'service', 'date', 'time_slot', 'status'} & data.keys():
+            self.check_overlap(data)
+        return data
+
+    def check_overlap(self, attrs):
+        instance = self.instance
+        status = attrs.get('status', instance.status if instance else 'PENDING')
+        if status in INACTIVE_STATUSES:
+            return
+        service = attrs.get('service') or instance.service
+        provider_id = instance.provider_id if instance else service.provider_id
+        if Appointment.objects.overlapping(
+            provider_id,
+            attrs.get('date') or instance.date,
+            attrs.get('time_slot') or instance.time_slot,
+            service.duration,
+            exclude_pk=instance.pk if instance else None,
+        ):
+            raise serializers.ValidationError(self.overlap_error)
+
+    def create(self, validated_data):
+        with self.provider_lock(validated_data):
+            return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        with self.provider_lock(validated_data):
+            return super().update(instance, validated_data)
+
+    @contextmanager
+    def provider_lock(self, validated_data):
+        """
+        Re-check for overlaps and write while holding a row lock on the provider, so
+        concurrent bookings for the same provider queue up while other providers
+        proceed in parallel. The partial unique constraint backs this up on
+        databases without SELECT ... FOR UPDATE.
+        """
+        service = validated_data.get('service') or self.instance.service
+        provider_id = self.instance.provider_id if self.instance else service.provider_id
+        with transaction.atomic():
+            list(User.objects.select_for_update().filter(pk=provider_id).values_list('pk'))
+            self.check_overlap(validated_data)
+            try:
+                with transaction.atomic():
+                    yield
+            except IntegrityError:
+                raise serializers.ValidationError(self.overlap_error)
+
+class AppointmentSeriesSerializer(serializers.ModelSerializer):
+    """
+    Creating a series books every occurrence at once. After that only the time
+    slot and notes can change, and the change applies to the upcoming occurrences.
+    """
+    service = serializers.PrimaryKeyRelatedField(queryset=Service.objects.filter(is_active=True))
+    occurrences = serializers.IntegerField(source='occurrence_count', read_only=True)
+
+    class Meta:
+        model = AppointmentSeries
+        fields = '__all__'
+        read_only_fields = ('client', 'provider', 'created_at', 'updated_at')
+
+    rule_fields = ('service', 'frequency', 'interval', 'start_date', 'count', 'until')
+    # Occurrences a series edit or cancellation still applies to
+    upcoming_statuses = ('PENDING', 'CONFIRMED')
+
+    def validate(self, data):
+        if self.instance is not None:
+            if set(self.rule_fields) & data.keys():
+                raise serializers.ValidationError(
+                    'Only time_slot and notes can be changed; cancel the series and book a new one instead.'
+                )
+            return data
+        if (data.get('count') is None) == (data.get('until') is None):
+            raise serializers.ValidationError('Set exactly one of count or until.')
+        if data['start_date'] < timezone.localdate():
+            raise serializers.ValidationError({'start_date': 'The series cannot start in the past.'})
+        if data.get('until') is not None:
+            if data['until'] < data['start_date']:
+                raise serializers.ValidationError({'until': 'Must not be before start_date.'})
+            limit = AppointmentSeries.MAX_OCCURRENCES
+            if AppointmentSeries(**data).occurrences_until() > limit:
+                raise serializers.ValidationError({
+                    'until': f'A series can have at most {limit} occurrences; choose an earlier date.',
+                })
+        return data
+
+    def check_dates(self, provider_id, dates, time_slot, duration):
+        """Availability and overlap checks for every occurrence: two queries in total."""
+        unavailable = unavailable_dates(provider_id, dates, time_slot, duration)
+        if unavailable:
+            raise serializers.ValidationError({
+                'unavailable': [day.isoformat() for day in unavailable],
+            })
+        conflicts = Appointment.objects.conflicting_dates(
+            provider_id, dates, time_slot, duration,
+            exclude_series_id=self.instance.pk if self.instance else None,
+        )
+        if conflicts:
+            raise serializers.ValidationError({
+                'conflicts': sorted(day.isoformat() for day in conflicts),
+            })
+
+    def create(self, validated_data):
+        service = validated_data['service']
+        series = AppointmentSeries(**validated_data, provider_id=service.provider_id)
+        dates = series.occurrence_dates()
+        with self.provider_lock(series.provider_id):
+            self.check_dates(series.provider_id, dates, series.time_slot, service.duration)
+            series.save()
+            series.appointments_created = Appointment.objects.bulk_create([
+                Appointment(
+                    client_id=series.client_id, provider_id=series.provider_id, service=service,
+                    series=series, date=day, time_slot=series.time_slot, notes=series.notes,
+                )
+                for day in dates
+            ])
+        series.occurrence_count = len(dates)
+        return series
+
+    def update(self, instance, validated_data):
+        upcoming = instance.appointments.filter(
+            date__gte=timezone.localdate(), status__in=self.upcoming_statuses,
+        ).select_related('service').order_by('date')
+        with self.provider_lock(instance.provider_id):
+            appointments = list(upcoming.select_for_update(of=('self',)))
+            time_slot = validated_data.get('time_slot', instance.time_slot)
+            if time_slot != instance.time_slot and appointments:
+                self.check_dates(
+                    instance.provider_id, [a.date for a in appointments], time_slot, instance.service.duration,
+                )
+            instance = super().update(instance, validated_data)
+            changes = {'time_slot': instance.time_slot, 'notes': instance.notes}
+            Appointment.objects.filter(pk__in=[a.pk for a in appointments]).update(
+                **changes, updated_at=timezone.now(),
+            )
+            for appointment in appointments:
+                appointment.time_slot, appointment.notes = instance.time_slot, instance.notes
+            instance.appointments_changed = appointments
+        return instance
+
+    @contextmanager
+    def provider_lock(self, provider_id):
+        """Same locking as AppointmentSerializer.provider_lock, for a whole series."""
+        with transaction.atomic():
+            list(User.objects.select_for_update().filter(pk=provider_id).values_list('pk'))
+            try:
+                with transaction.atomic():
+                    yield
+            except IntegrityError:
+                raise serializers.ValidationError(AppointmentSerializer.overlap_error)
+
+class BulkStatusSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=500)
+    status = serializers.ChoiceField(choices=sorted(STATUS_TRANSITIONS))
+
+    def validate_ids(self, ids):
+        # Keep request order, drop repeats
+        return list(dict.fromkeys(ids))
+
+class ExportQuerySerializer(serializers.Serializer):
+    # `format` is taken by DRF's format suffix handling, hence `output`
+    output = serializers.ChoiceField(choices=FORMATS, default='csv')
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    provider = serializers.IntegerField(required=False, min_value=1)
+    status = serializers.CharField(required=False)
+
+    def validate_status(self, value):
+        statuses = [s.strip().upper() for s in value.split(',') if s.strip()]
+        unknown = set(statuses) - {choice for choice, _ in Appointment.STATUS_CHOICES}
+        if unknown:
+            raise serializers.ValidationError(f'Unknown statuses: {", ".join(sorted(unknown))}')
+        return statuses
+
     def validate(self, data):
-        # Todo: Add validation for overlapping appointments
+        if data.get('start') and data.get('end') and data['end'] < data['start']:
+            raise serializers.ValidationError({'end': 'End date must not be before start date.'})
         return data
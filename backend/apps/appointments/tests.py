@@ -1,3 +1,523 @@
-from django.test import TestCase
+import io
+import json
+from unittest import mock
+from importlib import import_module
+from datetime import date, time, timedelta
+from django.apps import apps as django_apps
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from apps.notifications.models import Notification
+from apps.services.models import Availability, Service
+from apps.users.models import User, ProviderProfile
+from . import ratings
+from .models import Appointment, AppointmentSeries, Review
+from .serializers import AppointmentSerializer
 
-# Create your tests here.
+class AppointmentListQueryTests(TestCase):
+    def setUp(self):
+        self.client_user = User.objects.create_user(email='client@example.com', password='password123')
+        self.api = APIClient()
+        self.api.force_authenticate(self.client_user)
+
+    def book(self, count):
+        start = date.today() + timedelta(days=1)
+        first = User.objects.filter(role='PROVIDER').count()
+        for i in range(first, first + count):
+            provider = User.objects.create_user(email=f'doc{i}@example.com', password=None, role='PROVIDER')
+            ProviderProfile.objects.create(user=provider, business_name=f'Clinic {i}')
+            service = Service.objects.create(provider=provider, name='Checkup', duration=30, price='80.00')
+            Appointment.objects.create(
+                client=self.client_user, provider=provider, service=service,
+                date=start + timedelta(days=i), time_slot=time(9),
+            )
+
+    def test_list_query_count_is_constant(self):
+        # One aggregate for the conditional-GET validators, one for the rows
+        self.book(2)
+        with self.assertNumQueries(2):
+            response = self.api.get('/api/appointments/')
+        self.assertEqual(len(response.json()), 2)
+
+        self.book(20)
+        with self.assertNumQueries(2):
+            response = self.api.get('/api/appointments/')
+        self.assertEqual(len(response.json()), 22)
+        names = {a['provider_details']['provider_profile']['business_name'] for a in response.json()}
+        self.assertEqual(len(names), 22)
+
+    def test_not_modified_skips_the_list_query(self):
+        self.book(2)
+        etag = self.api.get('/api/appointments/')['ETag']
+        with self.assertNumQueries(1):
+            response = self.api.get('/api/appointments/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_related_changes_change_the_etag(self):
+        self.book(1)
+        etag = self.api.get('/api/appointments/')['ETag']
+        provider = User.objects.get(role='PROVIDER')
+        provider.first_name = 'Renamed'
+        provider.save()
+        response = self.api.get('/api/appointments/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_is_per_user(self):
+        self.book(1)
+        etag = self.api.get('/api/appointments/')['ETag']
+        self.api.force_authenticate(User.objects.get(role='PROVIDER'))
+        response = self.api.get('/api/appointments/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+class AppointmentOverlapTests(TestCase):
+    def setUp(self):
+        self.client_user = User.objects.create_user(email='client@example.com', password='password123')
+        self.provider = User.objects.create_user(email='doc@example.com', password=None, role='PROVIDER')
+        self.service = Service.objects.create(provider=self.provider, name='Consultation', duration=60, price='90.00')
+        self.day = date.today() + timedelta(days=3)
+        self.api = APIClient()
+        self.api.force_authenticate(self.client_user)
+
+    def book(self, time_slot, day=None, service=None):
+        return self.api.post('/api/appointments/', {
+            'service': (service or self.service).pk, 'date': (day or self.day).isoformat(), 'time_slot': time_slot,
+        }, format='json')
+
+    def test_same_and_partially_overlapping_slots_are_rejected(self):
+        self.assertEqual(self.book('10:00').status_code, 201)
+        self.assertEqual(self.book('10:00').status_code, 400)
+        self.assertEqual(self.book('10:30').status_code, 400)
+        self.assertEqual(self.book('09:30').status_code, 400)
+        self.assertEqual(self.book('09:00').status_code, 201)
+        self.assertEqual(self.book('11:00').status_code, 201)
+        cancelled = Appointment.objects.get(time_slot=time(11))
+        cancelled.status = 'CANCELLED'
+        cancelled.save()
+        self.assertEqual(self.book('11:00').status_code, 201)
+
+    def test_overlaps_are_checked_across_midnight(self):
+        next_day = self.day + timedelta(days=1)
+        self.assertEqual(self.book('23:30').status_code, 201)
+        self.assertEqual(self.book('00:00', day=next_day).status_code, 400)
+        self.assertEqual(self.book('00:30', day=next_day).status_code, 201)
+
+        late = Service.objects.create(provider=self.provider, name='Night shift', duration=120, price='90.00')
+        later_day = self.day + timedelta(days=5)
+        self.assertEqual(self.book('01:00', day=later_day + timedelta(days=1)).status_code, 201)
+        self.assertEqual(self.book('23:30', day=later_day, service=late).status_code, 400)
+        self.assertEqual(self.book('22:30', day=later_day, service=late).status_code, 201)
+
+    def test_constraint_violation_is_a_validation_error(self):
+        self.assertEqual(self.book('10:00').status_code, 201)
+        # As if a concurrent request had passed the same check before this one wrote
+        with mock.patch.object(AppointmentSerializer, 'check_overlap'):
+            response = self.book('10:00')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), [AppointmentSerializer.overlap_error])
+        self.assertEqual(Appointment.objects.count(), 1)
+
+class ProviderRatingTests(TestCase):
+    def setUp(self):
+        self.client_user = User.objects.create_user(email='client@example.com', password='password123')
+        self.provider = User.objects.create_user(email='doc@example.com', password=None, role='PROVIDER')
+        ProviderProfile.objects.create(user=self.provider, business_name='Clinic')
+        self.service = Service.objects.create(provider=self.provider, name='Checkup', duration=30, price='80.00')
+        self.api = APIClient()
+        self.api.force_authenticate(self.client_user)
+
+    def appointment(self, day, status='COMPLETED'):
+        return Appointment.objects.create(
+            client=self.client_user, provider=self.provider, service=self.service,
+            date=date(2024, 1, day), time_slot=time(9), status=status,
+        )
+
+    def provider_card(self):
+        return self.api.get('/api/auth/providers/').json()['results'][0]
+
+    def test_counters_follow_review_changes(self):
+        first = self.api.post('/api/reviews/', {'appointment': self.appointment(1).pk, 'rating': 5}).json()
+        self.api.post('/api/reviews/', {'appointment': self.appointment(2).pk, 'rating': 2})
+        profile = ProviderProfile.objects.get(user=self.provider)
+        self.assertEqual((profile.rating_count, profile.avg_rating), (2, 3.5))
+
+        self.api.patch(f"/api/reviews/{first['id']}/", {'rating': 4})
+        self.api.delete(f"/api/reviews/{first['id']}/")
+        profile.refresh_from_db()
+        self.assertEqual(profile.rating_distribution, {1: 0, 2: 1, 3: 0, 4: 0, 5: 0})
+        card = self.provider_card()
+        self.assertEqual((card['avg_rating'], card['review_count']), (2.0, 1))
+
+    def test_only_own_completed_appointments_can_be_reviewed(self):
+        response = self.api.post('/api/reviews/', {'appointment': self.appointment(3, status='PENDING').pk})
+        self.assertEqual(response.status_code, 400)
+        self.api.force_authenticate(self.provider)
+        response = self.api.post('/api/reviews/', {'appointment': self.appointment(4).pk})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(ProviderProfile.objects.get(user=self.provider).rating_count, 0)
+
+    def test_rebuild_repairs_drifted_counters(self):
+        Review.objects.create(appointment=self.appointment(5), rating=4)
+        Review.objects.create(appointment=self.appointment(6), rating=5)
+        ProviderProfile.objects.filter(user=self.provider).update(rating_count=7, rating_sum=1)
+        self.assertEqual(ratings.rebuild(), 1)
+        profile = ProviderProfile.objects.get(user=self.provider)
+        self.assertEqual((profile.rating_count, profile.rating_sum, profile.rating_4), (2, 9, 1))
+        self.assertEqual(ratings.rebuild(), 0)
+
+    def test_legacy_out_of_range_ratings_are_ignored(self):
+        # The baseline accepted any positive integer; such reviews can still be edited and deleted
+        legacy = Review.objects.create(appointment=self.appointment(7), rating=7)
+        Review.objects.create(appointment=self.appointment(8), rating=3)
+        self.assertEqual(ratings.rebuild(), 1)
+        self.assertEqual(self.api.patch(f'/api/reviews/{legacy.pk}/', {'rating': 4}).status_code, 200)
+        profile = ProviderProfile.objects.get(user=self.provider)
+        self.assertEqual((profile.rating_count, profile.rating_sum, profile.rating_4), (2, 7, 1))
+        Review.objects.filter(pk=legacy.pk).update(rating=0)
+        ratings.rebuild()
+        self.assertEqual(self.api.delete(f'/api/reviews/{legacy.pk}/').status_code, 204)
+        profile.refresh_from_db()
+        self.assertEqual((profile.rating_count, profile.rating_sum), (1, 3))
+
+    def test_migration_backfills_counters_from_existing_reviews(self):
+        backfill = import_module('apps.appointments.migrations.0009_backfill_rating_counters').backfill
+        Review.objects.create(appointment=self.appointment(9), rating=5)
+        Review.objects.create(appointment=self.appointment(10), rating=2)
+        Review.objects.create(appointment=self.appointment(11), rating=9)
+        backfill(django_apps, None)
+        profile = ProviderProfile.objects.get(user=self.provider)
+        self.assertEqual((profile.rating_count, profile.rating_sum, profile.rating_5, profile.rating_2), (2, 7, 1, 1))
+
+    def test_review_listing_is_scoped_paginated_and_single_query(self):
+        other = User.objects.create_user(email='other@example.com', password=None, role='PROVIDER')
+        other_service = Service.objects.create(provider=other, name='Scan', duration=30, price='50.00')
+        self.client_user.first_name, self.client_user.last_name = 'Jane', 'Doe'
+        self.client_user.save()
+        for day in range(1, 8):
+            Review.objects.create(appointment=self.appointment(day), rating=4)
+        Review.objects.create(appointment=Appointment.objects.create(
+            client=self.client_user, provider=other, service=other_service,
+            date=date(2024, 2, 1), time_slot=time(9), status='COMPLETED',
+        ))
+
+        self.api.force_authenticate(None)
+        self.assertEqual(self.api.get('/api/reviews/', {'provider': self.provider.pk}).status_code, 401)
+        self.api.force_authenticate(User.objects.create_user(email='reader@example.com', password=None))
+        with self.assertNumQueries(1):
+            page = self.api.get('/api/reviews/', {'provider': self.provider.pk, 'page_size': 5}).json()
+        self.assertEqual(len(page['results']), 5)
+        self.assertEqual(page['results'][0]['reviewer_name'], 'Jane D.')
+        self.assertEqual(page['results'][0]['service_name'], 'Checkup')
+        ids = [r['id'] for r in page['results']]
+        self.assertEqual(ids, sorted(ids, reverse=True))
+
+        rest = self.api.get(page['next']).json()
+        self.assertEqual(len(rest['results']), 2)
+        self.assertIsNone(rest['next'])
+        self.assertEqual(len(self.api.get('/api/reviews/', {'service': other_service.pk}).json()['results']), 1)
+        self.assertEqual(self.api.get('/api/reviews/', {'provider': 'x'}).status_code, 400)
+
+class BulkStatusTests(TestCase):
+    def setUp(self):
+        self.client_user = User.objects.create_user(email='client@example.com', password='password123')
+        self.provider = User.objects.create_user(email='doc@example.com', password=None, role='PROVIDER')
+        self.service = Service.objects.create(provider=self.provider, name='Checkup', duration=30, price='80.00')
+        self.api = APIClient()
+        self.api.force_authenticate(self.provider)
+
+    def appointment(self, hour, status='PENDING', provider=None, service=None):
+        return Appointment.objects.create(
+            client=self.client_user, provider=provider or self.provider, service=service or self.service,
+            date=date(2030, 1, 1), time_slot=time(hour), status=status,
+        ).pk
+
+    def test_transitions_are_checked_per_id_and_applied_together(self):
+        other = User.objects.create_user(email='other@example.com', password=None, role='PROVIDER')
+        other_service = Service.objects.create(provider=other, name='Checkup', duration=30, price='80.00')
+        pending = [self.appointment(9), self.appointment(10)]
+        confirmed = self.appointment(11, 'CONFIRMED')
+        cancelled = self.appointment(12, 'CANCELLED')
+        foreign = self.appointment(13, provider=other, service=other_service)
+
+        response = self.api.post('/api/appointments/bulk-status/', {
+            'ids': [*pending, confirmed, cancelled, foreign, 999999], 'status': 'CONFIRMED',
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'status': 'CONFIRMED', 'updated': 2, 'results': {
+            str(pending[0]): 'updated', str(pending[1]): 'updated', str(confirmed): 'unchanged',
+            str(cancelled): {'result': 'invalid_transition', 'status': 'CANCELLED'},
+            str(foreign): 'not_found', '999999': 'not_found',
+        }})
+        self.assertEqual(
+            set(Appointment.objects.filter(status='CONFIRMED').values_list('pk', flat=True)), {*pending, confirmed})
+        self.assertEqual(Appointment.objects.get(pk=foreign).status, 'PENDING')
+        # Both parties of each updated appointment are notified
+        self.assertEqual(Notification.objects.filter(event='appointment.status_changed', channel='email').count(), 4)
+
+    def test_clients_and_bad_payloads_are_rejected(self):
+        pk = self.appointment(9)
+        self.assertEqual(self.api.post('/api/appointments/bulk-status/', {'ids': [], 'status': 'CONFIRMED'},
+                                       format='json').status_code, 400)
+        self.assertEqual(self.api.post('/api/appointments/bulk-status/', {'ids': [pk], 'status': 'PENDING'},
+                                       format='json').status_code, 400)
+        self.api.force_authenticate(self.client_user)
+        self.assertEqual(self.api.post('/api/appointments/bulk-status/', {'ids': [pk], 'status': 'CANCELLED'},
+                                       format='json').status_code, 403)
+
+class AppointmentSeriesTests(TestCase):
+    def setUp(self):
+        self.client_user = User.objects.create_user(email='client@example.com', password='password123')
+        self.provider = User.objects.create_user(email='doc@example.com', password=None, role='PROVIDER')
+        self.service = Service.objects.create(
+            provider=self.provider, name='Therapy Session', duration=50, price='180.00')
+        for day in range(5):
+            Availability.objects.create(provider=self.provider, day_of_week=day, start_time=time(9), end_time=time(17))
+        self.start = date.today() + timedelta(days=7 - date.today().weekday())  # next Monday
+        self.api = APIClient()
+        self.api.force_authenticate(self.client_user)
+
+    def book(self, **rule):
+        return self.api.post('/api/appointment-series/', {
+            'service': self.service.pk, 'start_date': self.start.isoformat(), 'time_slot': '10:00', **rule,
+        }, format='json')
+
+    def test_series_expands_into_occurrences_with_constant_queries(self):
+        # Service, provider lock, template, conflicts, series, occurrences, users, outbox; the rest are savepoints
+        with self.assertNumQueries(14):
+            response = self.book(count=12)
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()['occurrences'], 12)
+        dates = list(Appointment.objects.filter(series_id=response.json()['id']).values_list('date', flat=True))
+        self.assertEqual(dates, [self.start + timedelta(weeks=i) for i in range(12)])
+        self.assertEqual(Notification.objects.filter(event='series.created', channel='email').count(), 2)
+
+        until = self.book(until=(self.start + timedelta(days=20)).isoformat(), frequency='DAILY', interval=7,
+                          time_slot='14:00')
+        self.assertEqual(until.json()['occurrences'], 3)
+
+    def test_until_beyond_the_occurrence_limit_is_rejected(self):
+        weekly_limit = self.start + timedelta(weeks=AppointmentSeries.MAX_OCCURRENCES - 1)
+        response = self.book(until=(weekly_limit + timedelta(weeks=1)).isoformat())
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(str(AppointmentSeries.MAX_OCCURRENCES), response.json()['until'][0])
+        self.assertFalse(Appointment.objects.exists())
+        self.assertEqual(self.book(until=weekly_limit.isoformat()).json()['occurrences'],
+                         AppointmentSeries.MAX_OCCURRENCES)
+
+    def test_series_can_be_booked_with_a_login_token(self):
+        tokens = self.api.post('/api/auth/login/', {'email': 'client@example.com', 'password': 'password123'}).json()
+        self.api.force_authenticate(None)
+        self.api.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        response = self.book(count=3)
+        self.assertEqual(response.status_code, 201, response.content)
+        series = AppointmentSeries.objects.get(pk=response.json()['id'])
+        self.assertEqual(series.client_id, self.client_user.pk)
+        self.assertEqual(Notification.objects.filter(event='series.created').values('recipient').distinct().count(), 2)
+
+    def test_conflicts_and_unavailable_dates_reject_the_whole_series(self):
+        Appointment.objects.create(client=self.client_user, provider=self.provider, service=self.service,
+                                   date=self.start + timedelta(weeks=2), time_slot=time(10, 30))
+        response = self.book(count=4)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['conflicts'], [(self.start + timedelta(weeks=2)).isoformat()])
+
+        response = self.book(count=2, frequency='DAILY', interval=5)
+        self.assertEqual(response.json()['unavailable'], [(self.start + timedelta(days=5)).isoformat()])
+        self.assertEqual(self.book().status_code, 400)
+        self.assertEqual(Appointment.objects.count(), 1)
+
+    def test_series_edits_and_cancellation_apply_to_upcoming_occurrences(self):
+        series = self.book(count=4).json()['id']
+        first = Appointment.objects.filter(series_id=series).earliest('date')
+        Appointment.objects.filter(pk=first.pk).update(status='COMPLETED')
+
+        response = self.api.patch(f'/api/appointment-series/{series}/', {'time_slot': '15:00'}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(
+            sorted(Appointment.objects.filter(series_id=series).values_list('time_slot', flat=True)),
+            [time(10), time(15), time(15), time(15)],
+        )
+        self.assertEqual(self.api.patch(f'/api/appointment-series/{series}/', {'count': 8},
+                                        format='json').status_code, 400)
+
+        self.api.force_authenticate(self.provider)
+        response = self.api.post(f'/api/appointment-series/{series}/cancel/')
+        self.assertEqual(response.json(), {'cancelled': 3})
+        self.assertEqual(Appointment.objects.get(pk=first.pk).status, 'COMPLETED')
+        self.assertEqual(Notification.objects.filter(event='series.cancelled', channel='email').count(), 2)
+
+class CalendarFeedTests(TestCase):
+    def setUp(self):
+        self.client_user = User.objects.create_user(
+            email='client@example.com', password='password123', first_name='Jane', last_name='Doe')
+        self.provider = User.objects.create_user(
+            email='doc@example.com', password=None, role='PROVIDER', last_name='House')
+        self.service = Service.objects.create(provider=self.provider, name='Checkup', duration=30, price='80.00')
+        self.appointment = Appointment.objects.create(
+            client=self.client_user, provider=self.provider, service=self.service,
+            date=date.today() + timedelta(days=3), time_slot=time(9, 30), notes='Bring results; fasting',
+        )
+        self.api = APIClient()
+
+    def feed_url(self, user):
+        self.api.force_authenticate(user)
+        url = self.api.get('/api/appointments/calendar/').json()['url']
+        self.api.force_authenticate(None)
+        return url
+
+    def test_feed_streams_events_and_honours_etags(self):
+        url = self.feed_url(self.provider)
+        with self.assertNumQueries(3):
+            response = self.api.get(url)
+            body = b''.join(response.streaming_content).decode()
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        self.assertTrue(body.startswith('BEGIN:VCALENDAR\r\n') and body.endswith('END:VCALENDAR\r\n'))
+        self.assertIn('SUMMARY:Checkup: Jane Doe\r\n', body)
+        self.assertIn('DESCRIPTION:Bring results\\; fasting\r\n', body)
+        self.assertIn('STATUS:TENTATIVE\r\n', body)
+
+        with self.assertNumQueries(2):
+            cached = self.api.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(cached.status_code, 304)
+
+        self.appointment.status = 'CONFIRMED'
+        self.appointment.save()
+        self.assertEqual(self.api.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+    def test_feed_is_per_user_windowed_and_signed(self):
+        url = self.feed_url(self.client_user)
+        body = b''.join(self.api.get(url).streaming_content).decode()
+        self.assertIn('SUMMARY:Checkup with House\r\n', body)
+        later = (date.today() + timedelta(days=10)).isoformat()
+        self.assertNotIn('BEGIN:VEVENT', b''.join(self.api.get(url, {'start': later}).streaming_content).decode())
+        self.assertEqual(self.api.get(url, {'end': 'soon'}).status_code, 400)
+        self.assertEqual(self.api.get(url.replace('.ics', 'x.ics')).status_code, 404)
+
+    def test_rotating_the_secret_revokes_old_urls(self):
+        url = self.feed_url(self.client_user)
+        self.assertEqual(self.feed_url(self.client_user), url)
+        self.api.force_authenticate(self.client_user)
+        rotated = self.api.post('/api/appointments/calendar/rotate/').json()['url']
+        self.api.force_authenticate(None)
+        self.assertNotEqual(rotated, url)
+        self.assertEqual(self.api.get(url).status_code, 404)
+        self.assertEqual(self.api.get(rotated).status_code, 200)
+        self.assertEqual(self.feed_url(self.client_user), rotated)
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.client_user = User.objects.create_user(email='client@example.com', password='password123')
+        self.providers = [
+            User.objects.create_user(email=f'doc{i}@example.com', password=None, role='PROVIDER') for i in range(2)
+        ]
+        for i, provider in enumerate(self.providers):
+            service = Service.objects.create(provider=provider, name='Checkup', duration=30, price='80.50')
+            for day in range(1, 4):
+                Appointment.objects.create(
+                    client=self.client_user, provider=provider, service=service, date=date(2030, 1, day),
+                    time_slot=time(9 + i), status='COMPLETED' if day < 3 else 'PENDING',
+                )
+        self.api = APIClient()
+
+    def export(self, **params):
+        response = self.api.get('/api/appointments/export/', params)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_csv_export_is_filtered_and_scoped_to_the_provider(self):
+        self.api.force_authenticate(self.providers[0])
+        response, body = self.export(status='completed', end='2030-01-01')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        lines = body.splitlines()
+        self.assertTrue(lines[0].startswith('id,date,time_slot,status,service_id,service,duration,price,'))
+        self.assertEqual(len(lines), 2)
+        self.assertIn(',2030-01-01,09:00:00,COMPLETED,', lines[1])
+        self.assertIn(',80.50,', lines[1])
+
+        # A provider's ?provider= filter is ignored in favour of their own id
+        _, body = self.export(provider=self.providers[1].pk)
+        self.assertEqual(len(body.splitlines()), 4)
+
+    def test_csv_cells_cannot_run_as_formulas(self):
+        Service.objects.filter(provider=self.providers[0]).update(name='=HYPERLINK("http://example.com")')
+        User.objects.filter(pk=self.client_user.pk).update(email='+1@example.com')
+        self.api.force_authenticate(self.providers[0])
+        _, body = self.export(output='csv', end='2030-01-01')
+        row = body.splitlines()[1]
+        self.assertIn(',"\'=HYPERLINK(""http://example.com"")",', row)
+        self.assertIn(",'+1@example.com,", row)
+        _, body = self.export(output='ndjson', end='2030-01-01')
+        self.assertEqual(json.loads(body)['service'], '=HYPERLINK("http://example.com")')
+
+    def test_ndjson_export_for_staff_and_permissions(self):
+        staff = User.objects.create_user(email='ops@example.com', password=None, is_staff=True)
+        self.api.force_authenticate(staff)
+        _, body = self.export(output='ndjson', start='2030-01-02')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(
+            [(r['date'], r['time_slot']) for r in rows[:2]], [('2030-01-02', '09:00:00'), ('2030-01-02', '10:00:00')],
+        )
+        self.assertEqual(rows[0]['price'], '80.50')
+        self.assertEqual(self.api.get('/api/appointments/export/', {'status': 'LOST'}).status_code, 400)
+
+        self.api.force_authenticate(self.client_user)
+        self.assertEqual(self.api.get('/api/appointments/export/').status_code, 403)
+
+    def test_command_writes_the_same_rows(self):
+        out = io.StringIO()
+        call_command('export_appointments', format='ndjson', provider=self.providers[1].pk, stdout=out)
+        self.assertEqual([json.loads(line)['provider_id'] for line in out.getvalue().splitlines()],
+                         [self.providers[1].pk] * 3)
+
+# Admin pages need static URLs; the manifest storage would require collectstatic
+@override_settings(STORAGES={
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+})
+class AppointmentAdminTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(email='admin@example.com', password='password123')
+        self.client.force_login(self.admin)
+        self.client_user = User.objects.create_user(email='client@example.com', password='password123')
+
+    def book(self, count):
+        first = User.objects.filter(role='PROVIDER').count()
+        for i in range(first, first + count):
+            provider = User.objects.create_user(email=f'doc{i}@example.com', password=None, role='PROVIDER')
+            service = Service.objects.create(provider=provider, name='Checkup', duration=30, price='80.00')
+            Appointment.objects.create(client=self.client_user, provider=provider, service=service,
+                                       date=date(2030, 1, 1), time_slot=time(9))
+
+    def changelist(self, **params):
+        response = self.client.get('/admin/appointments/appointment/', params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_changelist_queries_do_not_grow_with_rows_or_users(self):
+        self.book(2)
+        with CaptureQueriesContext(connection) as few:
+            self.changelist()
+        self.book(15)
+        with self.assertNumQueries(len(few)):
+            response = self.changelist()
+        self.assertEqual(response.context['cl'].result_count, 17)
+
+    def test_provider_filter_and_search(self):
+        self.book(3)
+        provider = User.objects.get(email='doc1@example.com')
+        response = self.changelist(provider__id__exact=provider.pk)
+        self.assertEqual([a.provider_id for a in response.context['cl'].result_list], [provider.pk])
+        self.assertContains(response, f'<option value="{provider.pk}" selected>doc1@example.com</option>')
+        self.assertContains(response, 'data-field-name="provider"')
+        found = self.client.get('/admin/autocomplete/', {
+            'app_label': 'appointments', 'model_name': 'appointment', 'field_name': 'provider', 'term': 'doc1',
+        }).json()
+        self.assertEqual([r['id'] for r in found['results']], [str(provider.pk)])
+
+        self.assertEqual(self.changelist(q='doc2@').context['cl'].result_count, 1)
+        pk = Appointment.objects.earliest('id').pk
+        self.assertEqual([a.pk for a in self.changelist(q=str(pk)).context['cl'].result_list], [pk])
+        self.assertEqual(self.changelist(q='client@').context['cl'].result_count, 3)
@@ -1,26 +1,272 @@
+from datetime import date
+from django.db import transaction
+from django.db.models import Count
+from django.http import Http404, HttpResponseBadRequest
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.views.decorators.http import require_GET
 from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.response import Response
-from .models import Appointment, Review
-from .serializers import AppointmentSerializer, ReviewSerializer
+from apps.core.conditional import ConditionalListMixin
+from apps.core.pagination import NewestFirstPagination
+from apps.core.streaming import streaming_response
+from apps.notifications.outbox import enqueue_appointment, enqueue_appointments, enqueue_series
+from apps.services.views import IsProvider
+from apps.users.models import User
+from . import calendar, export, ratings
+from .models import Appointment, AppointmentSeries, Review, STATUS_TRANSITIONS
+from .serializers import (
+    AppointmentSerializer, AppointmentSeriesSerializer, BulkStatusSerializer, ExportQuerySerializer,
+    ReviewSerializer,
+)
 
-class AppointmentViewSet(viewsets.ModelViewSet):
+class AppointmentViewSet(ConditionalListMixin, viewsets.ModelViewSet):
     serializer_class = AppointmentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    validator_fields = (
+        'updated_at', 'service__updated_at',
+        'client__updated_at', 'client__provider_profile__updated_at',
+        'provider__updated_at', 'provider__provider_profile__updated_at',
+    )
 
     def get_queryset(self):
         user = self.request.user
+        # Join everything AppointmentSerializer nests so list cost doesn't grow with page size
+        qs = Appointment.objects.select_related(
+            'service',
+            'client__provider_profile',
+            'provider__provider_profile',
+        )
         if user.role == 'PROVIDER':
-            return Appointment.objects.filter(provider=user)
-        return Appointment.objects.filter(client=user)
+            return qs.filter(provider_id=user.pk)
+        return qs.filter(client_id=user.pk)
 
     def perform_create(self, serializer):
         service = serializer.validated_data['service']
-        serializer.save(client=self.request.user, provider=service.provider)
+        # Outbox rows commit or roll back together with the appointment
+        with transaction.atomic():
+            appointment = serializer.save(client_id=self.request.user.pk, provider_id=service.provider_id)
+            enqueue_appointment(appointment, 'appointment.created')
+
+    def perform_update(self, serializer):
+        previous_status = serializer.instance.status
+        with transaction.atomic():
+            appointment = serializer.save()
+            if appointment.status != previous_status:
+                enqueue_appointment(appointment, 'appointment.status_changed')
+
+    @action(detail=False, methods=['get'])
+    def calendar(self, request):
+        """The caller's private iCalendar feed URL, for subscribing from a calendar app."""
+        return self.calendar_url(request, calendar.feed_secret(request.user.pk))
+
+    @action(detail=False, methods=['post'], url_path='calendar/rotate')
+    def rotate_calendar(self, request):
+        """Revoke the current feed URL and return a new one."""
+        return self.calendar_url(request, calendar.feed_secret(request.user.pk, rotate=True))
+
+    def calendar_url(self, request, secret):
+        path = reverse('appointment-calendar', args=[calendar.feed_token(request.user.pk, secret)])
+        return Response({'url': request.build_absolute_uri(path)})
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        GET ?output=csv|ndjson&start=&end=&provider=&status=A,B streams matching
+        appointments with service prices. Staff can export everything; providers
+        only their own appointments.
+        """
+        user = request.user
+        if not user.is_staff and user.role != 'PROVIDER':
+            raise PermissionDenied('Only staff and providers can export appointments.')
+        query = ExportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+        rows = export.export_rows(
+            start=params.get('start'), end=params.get('end'),
+            provider_id=params.get('provider') if user.is_staff else user.pk,
+            statuses=params.get('status'),
+        )
+        output = params['output']
+        response = streaming_response(
+            request, export.render(rows, output), content_type=export.CONTENT_TYPES[output],
+        )
+        stamp = timezone.localdate().strftime('%Y%m%d')
+        response['Content-Disposition'] = f'attachment; filename="appointments-{stamp}.{output}"'
+        return response
+
+    @action(detail=False, methods=['post'], url_path='bulk-status',
+            permission_classes=[permissions.IsAuthenticated, IsProvider])
+    def bulk_status(self, request):
+        """
+        POST {"ids": [...], "status": "CONFIRMED"} moves many of the provider's
+        appointments at once. Each id gets one result: updated, unchanged,
+        not_found (missing or another provider's), invalid_transition (with the
+        current status) or conflict (changed concurrently).
+        """
+        serializer = BulkStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids, target = serializer.validated_data['ids'], serializer.validated_data['status']
+        sources = STATUS_TRANSITIONS[target]
+        mine = Appointment.objects.filter(pk__in=ids, provider_id=request.user.pk)
+
+        with transaction.atomic():
+            current = dict(mine.select_for_update().values_list('pk', 'status'))
+            results = {}
+            eligible = []
+            for pk in ids:
+                found = current.get(pk)
+                if found is None:
+                    results[pk] = 'not_found'
+                elif found == target:
+                    results[pk] = 'unchanged'
+                elif found not in sources:
+                    results[pk] = {'result': 'invalid_transition', 'status': found}
+                else:
+                    eligible.append(pk)
+            # The status guard makes the UPDATE safe even where row locks are unavailable
+            updated = mine.filter(pk__in=eligible, status__in=sources).update(
+                status=target, updated_at=timezone.now(),
+            )
+            changed = []
+            if updated:
+                changed = list(mine.filter(pk__in=eligible, status=target).select_related('service'))
+            done = {a.pk for a in changed}
+            for pk in eligible:
+                results[pk] = 'updated' if pk in done else 'conflict'
+            enqueue_appointments(changed, 'appointment.status_changed')
+
+        return Response({'status': target, 'updated': updated, 'results': results})
+
+@require_GET
+def calendar_feed(request, token):
+    """
+    GET /api/appointments/calendar/<token>.ics[?start=YYYY-MM-DD&end=YYYY-MM-DD]
+    streams the token owner's appointments as iCalendar. Polls that match the
+    ETag are answered with 304 after the user lookup and one aggregate.
+    """
+    issued = calendar.parse_feed_token(token)
+    user = None
+    if issued is not None:
+        user_pk, secret = issued
+        user = User.objects.filter(pk=user_pk, calendar_secret=secret, is_active=True).only('role').first()
+    if user is None:
+        raise Http404
+    try:
+        start = date.fromisoformat(request.GET['start']) if 'start' in request.GET else (
+            timezone.localdate() - calendar.DEFAULT_HISTORY)
+        end = date.fromisoformat(request.GET['end']) if 'end' in request.GET else None
+    except ValueError:
+        return HttpResponseBadRequest('start and end must be YYYY-MM-DD dates.')
+
+    queryset = Appointment.objects.filter(date__gte=start)
+    if end is not None:
+        queryset = queryset.filter(date__lte=end)
+    if user.role == 'PROVIDER':
+        queryset = queryset.filter(provider_id=user.pk)
+    else:
+        queryset = queryset.filter(client_id=user.pk)
+
+    etag = calendar.feed_etag(queryset, user.role, (start, end))
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = streaming_response(
+            request, calendar.render_feed(queryset, user.role, request.get_host()),
+            content_type='text/calendar; charset=utf-8',
+        )
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+class AppointmentSeriesViewSet(viewsets.ModelViewSet):
+    """
+    Recurring bookings. Creating a series books all of its occurrences; PATCH
+    moves the upcoming ones and POST .../cancel/ cancels them, each as one
+    bulk statement.
+    """
+    serializer_class = AppointmentSeriesSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    http_method_names = ['get', 'post', 'patch', 'head', 'options']
+
+    def get_queryset(self):
+        user = self.request.user
+        qs = AppointmentSeries.objects.select_related('service').annotate(
+            occurrence_count=Count('appointments'),
+        ).order_by('-id')
+        if user.role == 'PROVIDER':
+            return qs.filter(provider_id=user.pk)
+        return qs.filter(client_id=user.pk)
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            series = serializer.save(client_id=self.request.user.pk)
+            enqueue_series(series, 'series.created', series.appointments_created)
+
+    def perform_update(self, serializer):
+        previous_time = serializer.instance.time_slot
+        with transaction.atomic():
+            series = serializer.save()
+            if series.time_slot != previous_time:
+                enqueue_series(series, 'series.updated', series.appointments_changed)
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        series = self.get_object()
+        upcoming = series.appointments.filter(
+            date__gte=timezone.localdate(), status__in=AppointmentSeriesSerializer.upcoming_statuses,
+        )
+        with transaction.atomic():
+            appointments = list(upcoming.select_for_update().order_by('date'))
+            Appointment.objects.filter(pk__in=[a.pk for a in appointments]).update(
+                status='CANCELLED', updated_at=timezone.now(),
+            )
+            for appointment in appointments:
+                appointment.status = 'CANCELLED'
+                appointment.service = series.service
+            enqueue_series(series, 'series.cancelled', appointments)
+        return Response({'cancelled': len(appointments)})
 
 class ReviewViewSet(viewsets.ModelViewSet):
-    queryset = Review.objects.all()
+    """Reviews, newest first; ?provider=<id> / ?service=<id> scope the list."""
     serializer_class = ReviewSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = NewestFirstPagination
+    filter_params = ('provider', 'service')
+
+    def get_queryset(self):
+        # Reviewer and service come from the same query as the page itself
+        qs = Review.objects.select_related('appointment__client', 'service')
+        if self.request.method not in permissions.SAFE_METHODS:
+            # Only the reviewing client may change or delete a review
+            return qs.filter(appointment__client_id=self.request.user.pk)
+        for param in self.filter_params:
+            value = self.request.query_params.get(param)
+            if value is None:
+                continue
+            if not value.isdigit():
+                raise ValidationError({param: 'A valid integer is required.'})
+            qs = qs.filter(**{f'{param}_id': value})
+        return qs
+
+    # Rating counters move in the same transaction as the review itself
 
     def perform_create(self, serializer):
-        serializer.save()
+        with transaction.atomic():
+            appointment = serializer.validated_data['appointment']
+            review = serializer.save(provider_id=appointment.provider_id, service_id=appointment.service_id)
+            ratings.adjust(review.provider_id, added=review.rating)
+
+    def perform_update(self, serializer):
+        previous_rating = serializer.instance.rating
+        with transaction.atomic():
+            review = serializer.save()
+            if review.rating != previous_rating:
+                ratings.adjust(review.provider_id, added=review.rating, removed=previous_rating)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            ratings.adjust(instance.provider_id, removed=instance.rating)
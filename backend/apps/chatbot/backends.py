@@ -0,0 +1,59 @@
+import abc
+import asyncio
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class ChatBackend(abc.ABC):
+    """
+    Produces the free-text part of a chatbot reply as an async stream of text
+    chunks. `context` carries the deterministic lookup (message, doctors,
+    specializations) so the backend can ground its answer in real results.
+    """
+
+    @abc.abstractmethod
+    def stream(self, message, context):
+        """An async iterator of text chunks; implement it as an `async def` generator."""
+
+
+class StubChatBackend(ChatBackend):
+    """Deterministic, offline backend: replays the lookup message word by word."""
+
+    async def stream(self, message, context):
+        words = context['message'].split(' ')
+        for i, word in enumerate(words):
+            yield word if i == len(words) - 1 else word + ' '
+            # Hand control back to the event loop between chunks, like a real network stream
+            await asyncio.sleep(0)
+
+
+class OpenAIChatBackend(ChatBackend):
+    system_prompt = (
+        "You are the booking assistant of a doctor appointment app. Answer briefly. "
+        "Only recommend doctors from the list you are given; never invent names."
+    )
+
+    def __init__(self):
+        from openai import AsyncOpenAI
+        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+        self.model = settings.CHATBOT_OPENAI_MODEL
+
+    async def stream(self, message, context):
+        doctors = '\n'.join(f"- {d['name']} ({d['specialization']})" for d in context['doctors']) or 'none'
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            stream=True,
+            messages=[
+                {'role': 'system', 'content': self.system_prompt},
+                {'role': 'system', 'content': f"Doctors matching this request:\n{doctors}"},
+                {'role': 'user', 'content': message},
+            ],
+        )
+        async for chunk in response:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+
+
+def get_backend():
+    return import_string(settings.CHATBOT_BACKEND)()
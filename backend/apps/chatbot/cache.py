@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+
+
+class IntentCache:
+    """
+    Thread-safe LRU cache with a per-entry TTL, plus counters for sizing it.
+
+    The cache is per process: invalidations from signals only reach the process
+    that made the change, so the TTL bounds how stale other workers can get.
+    """
+
+    def __init__(self, maxsize, ttl, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= self.clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def invalidate_where(self, predicate):
+        """Drop every entry whose value satisfies predicate(value)."""
+        with self._lock:
+            for key in [k for k, (_, value) in self._entries.items() if predicate(value)]:
+                del self._entries[key]
+                self.invalidations += 1
+
+    def invalidate_all(self):
+        with self._lock:
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations,
+            }
+
+
+def cache_key(specialization):
+    return specialization.strip().lower()
+
+
+_doctor_cache = None
+_lock = threading.Lock()
+
+
+def get_doctor_cache():
+    """
+    Doctor lookups for resolved specializations: {specialization: [doctor, ...]}.
+    Built on first use, so CHATBOT_CACHE_SIZE and CHATBOT_CACHE_TTL are read then.
+    """
+    global _doctor_cache
+    if _doctor_cache is None:
+        with _lock:
+            if _doctor_cache is None:
+                _doctor_cache = IntentCache(
+                    maxsize=getattr(settings, 'CHATBOT_CACHE_SIZE', 256),
+                    ttl=getattr(settings, 'CHATBOT_CACHE_TTL', 60),
+                )
+    return _doctor_cache
+
+
+def reset_doctor_cache():
+    global _doctor_cache
+    _doctor_cache = None
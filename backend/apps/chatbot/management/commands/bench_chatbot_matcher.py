@@ -0,0 +1,47 @@
+import random
+import string
+import time as timer
+from django.core.management.base import BaseCommand
+from apps.chatbot.matcher import SYNONYMS, SpecializationMatcher
+
+MESSAGES = (
+    "Hi, I need a cardiologist for my father, he has chest pain",
+    "can you recommend a skin doctor near me",
+    "my kids have a fever, looking for a pediatrician this week",
+    "I'd like to book a general practitioner or a family doctor",
+    "is there a dentist available on saturday morning",
+    "hello",
+)
+
+
+class Command(BaseCommand):
+    help = 'Compare per-message cost of the trie matcher with a linear substring scan'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='20,200,2000,20000', help='Synonym list sizes to test')
+        parser.add_argument('--messages', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        messages = [rng.choice(MESSAGES) for _ in range(options['messages'])]
+        self.stdout.write(f'{"synonyms":>9} {"linear us/msg":>14} {"trie us/msg":>12} {"trie/linear":>12}')
+        for size in (int(n) for n in options['sizes'].split(',')):
+            synonyms = {spec: list(phrases) for spec, phrases in SYNONYMS.items()}
+            flat = {phrase: spec for spec, phrases in synonyms.items() for phrase in phrases}
+            while len(flat) < size:
+                phrase = ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 12)))
+                spec = f'Synthetic {len(flat) % 50}'
+                synonyms.setdefault(spec, []).append(phrase)
+                flat[phrase] = spec
+
+            linear = self.per_message(messages, lambda m: [s for t, s in flat.items() if t in m])
+            matcher = SpecializationMatcher(synonyms)
+            trie = self.per_message(messages, matcher.match)
+            self.stdout.write(f'{len(flat):>9} {linear:>14.2f} {trie:>12.2f} {trie / linear:>12.3f}')
+
+    def per_message(self, messages, match):
+        began = timer.perf_counter()
+        for message in messages:
+            match(message.lower())
+        return (timer.perf_counter() - began) * 1e6 / len(messages)
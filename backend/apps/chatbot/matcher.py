@@ -0,0 +1,106 @@
+import re
+import threading
+
+# Phrases users type, mapped to the specialization stored on ProviderProfile.
+# Matching is on whole words, so "gp" no longer fires inside "gps" and a bare
+# "general" in a sentence is not taken to mean General Practice.
+SYNONYMS = {
+    "Cardiology": ("cardiologist", "cardiology", "heart", "heart doctor", "cardiac"),
+    "Dermatology": ("dermatologist", "dermatology", "skin", "skin doctor"),
+    "Neurology": ("neurologist", "neurology", "brain", "nerve doctor"),
+    "Pediatrics": ("pediatrician", "pediatrics", "children", "child", "kids"),
+    "Dentistry": ("dentist", "dental", "dentistry", "teeth", "tooth"),
+    "General Practice": ("general practice", "general practitioner", "gp", "family doctor", "primary care"),
+}
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+_END = object()
+
+
+class SpecializationMatcher:
+    """
+    Word-level trie over every synonym phrase. A message is tokenized once and
+    each token position walks the trie, so the cost depends on the message
+    length, not on how many synonyms are loaded.
+    """
+
+    def __init__(self, synonyms):
+        self.root = {}
+        self.specializations = set()
+        for specialization, phrases in synonyms.items():
+            self.specializations.add(specialization.lower())
+            for phrase in (specialization, *phrases):
+                self.add(phrase, specialization)
+
+    def add(self, phrase, specialization):
+        tokens = TOKEN_RE.findall(phrase.lower())
+        if not tokens:
+            return
+        node = self.root
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node.setdefault(_END, specialization)
+
+    def knows(self, specialization):
+        return specialization.lower() in self.specializations
+
+    def _step(self, node, token):
+        child = node.get(token)
+        # Tolerate simple plurals ("cardiologists", "dentists")
+        if child is None and len(token) > 3 and token.endswith('s'):
+            child = node.get(token[:-1])
+        return child
+
+    def match(self, message):
+        """
+        Return the specializations mentioned in the message, best first. Longer
+        phrases outweigh single words and earlier mentions break ties.
+        """
+        tokens = TOKEN_RE.findall(message.lower())
+        scores = {}
+        first_seen = {}
+        i = 0
+        while i < len(tokens):
+            node, j, hit, hit_end = self.root, i, None, i
+            while j < len(tokens):
+                node = self._step(node, tokens[j])
+                if node is None:
+                    break
+                j += 1
+                if _END in node:
+                    hit, hit_end = node[_END], j
+            if hit is None:
+                i += 1
+                continue
+            scores[hit] = scores.get(hit, 0) + (hit_end - i)
+            first_seen.setdefault(hit, i)
+            i = hit_end
+        return sorted(scores, key=lambda spec: (-scores[spec], first_seen[spec]))
+
+
+_matcher = None
+_lock = threading.Lock()
+
+
+def get_matcher():
+    """Build the matcher on first use, adding every distinct specialization in the DB."""
+    global _matcher
+    if _matcher is None:
+        with _lock:
+            if _matcher is None:
+                from apps.users.models import ProviderProfile
+                synonyms = dict(SYNONYMS)
+                known = {name.lower() for name in synonyms}
+                for value in ProviderProfile.objects.exclude(specialization='').values_list(
+                    'specialization', flat=True
+                ).distinct():
+                    if value.lower() not in known:
+                        known.add(value.lower())
+                        synonyms[value] = ()
+                _matcher = SpecializationMatcher(synonyms)
+    return _matcher
+
+
+def reset_matcher():
+    global _matcher
+    _matcher = None
@@ -0,0 +1,49 @@
+from django.core.signals import setting_changed
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from apps.users.models import User, Doctor, ProviderProfile
+from . import matcher
+from .cache import get_doctor_cache, reset_doctor_cache
+
+# Fields the doctor lookup searches or shows; saves limited to other fields leave cached replies valid
+SEARCHED_PROFILE_FIELDS = frozenset(('specialization', 'business_name', 'bio'))
+SEARCHED_USER_FIELDS = frozenset(('first_name', 'last_name', 'role'))
+
+
+@receiver(post_save, sender=ProviderProfile)
+def pick_up_new_specialization(sender, instance, **kwargs):
+    # Rebuild lazily on the next message if this profile introduced a new specialization
+    current = matcher._matcher
+    if current is not None and instance.specialization and not current.knows(instance.specialization):
+        matcher.reset_matcher()
+
+
+@receiver(post_save, sender=ProviderProfile)
+@receiver(post_delete, sender=ProviderProfile)
+def invalidate_profile(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not SEARCHED_PROFILE_FIELDS & set(update_fields):
+        return
+    # Lookups rank by name, business name and bio as well as specialization, so
+    # any cached specialization may now resolve to different doctors
+    get_doctor_cache().invalidate_all()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Doctor)
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Doctor)
+def invalidate_doctor(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not SEARCHED_USER_FIELDS & set(update_fields):
+        return
+    cache = get_doctor_cache()
+    if instance.role == User.Role.PROVIDER:
+        cache.invalidate_all()
+    else:
+        # Not a provider (any more): only replies still listing them are stale
+        cache.invalidate_where(lambda doctors: any(d['id'] == instance.pk for d in doctors))
+
+
+@receiver(setting_changed)
+def resize_doctor_cache(setting, **kwargs):
+    if setting in ('CHATBOT_CACHE_SIZE', 'CHATBOT_CACHE_TTL'):
+        reset_doctor_cache()
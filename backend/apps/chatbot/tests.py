@@ -1,3 +1,170 @@
-from django.test import TestCase
+import json
+from unittest import mock
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+from apps.users.models import User, ProviderProfile
+from .backends import ChatBackend
+from .cache import IntentCache, get_doctor_cache, reset_doctor_cache
+from .matcher import SYNONYMS, SpecializationMatcher
+
+
+def parse_events(body):
+    events = []
+    for block in body.decode().strip().split('\n\n'):
+        lines = dict(line.split(': ', 1) for line in block.split('\n'))
+        events.append((lines['event'], json.loads(lines['data'])))
+    return events
+
+
+class FailingChatBackend(ChatBackend):
+    async def stream(self, message, context):
+        yield 'Let me'
+        raise ConnectionError('upstream closed the stream')
+
+
+@override_settings(CHATBOT_BACKEND='apps.chatbot.backends.StubChatBackend')
+class ChatbotStreamTests(TestCase):
+    def setUp(self):
+        reset_doctor_cache()
+        doctor = User.objects.create_user(email='doc@example.com', password=None, role='PROVIDER', last_name='Wilson')
+        ProviderProfile.objects.create(user=doctor, business_name='Heart Clinic', specialization='Cardiology')
+        self.api = APIClient()
+
+    def test_json_reply_is_unchanged(self):
+        response = self.api.post('/api/chatbot/chat/', {'message': 'I need a cardiologist'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['doctors'][0]['name'], 'Dr. Wilson')
+
+    async def test_stream_sends_doctors_before_tokens(self):
+        # The async client goes through the ASGI handler, as in production
+        response = await self.async_client.post(
+            '/api/chatbot/chat/', {'message': 'I need a cardiologist'},
+            content_type='application/json', headers={'accept': 'text/event-stream'},
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = parse_events(b''.join([chunk async for chunk in response.streaming_content]))
+
+        self.assertEqual(events[0][0], 'doctors')
+        self.assertEqual(events[0][1]['doctors'][0]['name'], 'Dr. Wilson')
+        self.assertEqual(events[-1][0], 'done')
+        tokens = [data['text'] for event, data in events if event == 'token']
+        self.assertGreater(len(tokens), 1)
+        self.assertEqual(''.join(tokens), events[0][1]['message'])
+
+    @override_settings(CHATBOT_BACKEND='apps.chatbot.tests.FailingChatBackend')
+    async def test_backend_failures_are_logged_and_end_the_stream(self):
+        with self.assertLogs('apps.chatbot.views', 'ERROR') as logs:
+            response = await self.async_client.post(
+                '/api/chatbot/chat/', {'message': 'I need a cardiologist'},
+                content_type='application/json', headers={'accept': 'text/event-stream'},
+            )
+            events = parse_events(b''.join([chunk async for chunk in response.streaming_content]))
+        self.assertEqual([event for event, _ in events], ['doctors', 'token', 'error', 'done'])
+        self.assertIn('ConnectionError', logs.output[0])
+        with self.assertRaises(TypeError):
+            ChatBackend()
+
+    def test_stream_validation_error_is_an_event(self):
+        response = self.api.post('/api/chatbot/chat/', {'message': ''}, format='json', HTTP_ACCEPT='text/event-stream')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(parse_events(response.content)[0][0], 'error')
+
+
+class DoctorCacheTests(TestCase):
+    def setUp(self):
+        reset_doctor_cache()
+        self.doctor = User.objects.create_user(email='doc@example.com', password=None, role='PROVIDER', last_name='Wilson')
+        ProviderProfile.objects.create(user=self.doctor, business_name='Heart Clinic', specialization='Cardiology')
+        other = User.objects.create_user(email='other@example.com', password=None, role='PROVIDER', last_name='Grey')
+        self.other_profile = ProviderProfile.objects.create(user=other, business_name='Skin Clinic',
+                                                            specialization='Dermatology')
+        self.api = APIClient()
+
+    def names(self, message='I need a cardiologist'):
+        response = self.api.post('/api/chatbot/chat/', {'message': message}, format='json')
+        return [doctor['name'] for doctor in response.json()['doctors']]
+
+    def test_specialization_matches_by_containment_not_equality(self):
+        # As with the original icontains filter, a longer or differently cased specialization still matches
+        specializations = ('Pediatric Cardiology', 'CARDIOLOGY', 'Cardiology and Internal Medicine')
+        for index, specialization in enumerate(specializations):
+            user = User.objects.create_user(email=f'cardio{index}@example.com', password=None, role='PROVIDER',
+                                            last_name=f'Heart{index}')
+            ProviderProfile.objects.create(user=user, business_name='Clinic', specialization=specialization)
+        expected = ['Dr. Heart0', 'Dr. Heart1', 'Dr. Heart2', 'Dr. Wilson']
+        self.assertEqual(sorted(self.names()), expected)
+        reset_doctor_cache()
+        with mock.patch('apps.users.search._vendor', return_value='mysql'):
+            self.assertEqual(sorted(self.names()), expected)
+
+    def test_hits_misses_evictions_and_expiry(self):
+        now = [0]
+        cache = IntentCache(maxsize=2, ttl=10, clock=lambda: now[0])
+        self.assertIsNone(cache.get('a'))
+        cache.set('a', 1)
+        cache.set('b', 2)
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('c', 3)  # 'b' is least recently used
+        self.assertIsNone(cache.get('b'))
+        now[0] = 10
+        self.assertIsNone(cache.get('a'))
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['evictions'], stats['expirations']), (1, 3, 1, 1))
+
+    def test_lookups_are_cached_until_a_searched_field_changes(self):
+        self.assertEqual(self.names(), ['Dr. Wilson'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names(), ['Dr. Wilson'])
+
+        # Neither the specialization nor the doctor in the cached reply changed
+        self.other_profile.bio = 'Also treats cardiology patients'
+        self.other_profile.save()
+        self.assertEqual(self.names(), ['Dr. Wilson', 'Dr. Grey'])
+
+        self.doctor.last_name = 'House'
+        self.doctor.save()
+        self.assertIn('Dr. House', self.names())
+
+    def test_unrelated_saves_keep_the_cache(self):
+        self.names()
+        self.doctor.save(update_fields=['last_login'])
+        self.other_profile.save(update_fields=['is_verified'])
+        User.objects.create_user(email='patient@example.com', password=None)
+        self.assertEqual(get_doctor_cache().stats()['invalidations'], 0)
+        with self.assertNumQueries(0):
+            self.names()
+
+    def test_size_and_ttl_come_from_current_settings(self):
+        with override_settings(CHATBOT_CACHE_SIZE=1, CHATBOT_CACHE_TTL=5):
+            self.assertEqual((get_doctor_cache().maxsize, get_doctor_cache().ttl), (1, 5))
+            self.names()
+            self.names('any dermatologist around?')
+            self.assertEqual(get_doctor_cache().stats()['evictions'], 1)
+        self.assertEqual(get_doctor_cache().maxsize, 256)
+
+
+class SpecializationMatcherTests(SimpleTestCase):
+    def setUp(self):
+        self.match = SpecializationMatcher(SYNONYMS).match
+
+    def test_matches_whole_words_only(self):
+        self.assertEqual(self.match('Can I see a GP today?'), ['General Practice'])
+        self.assertEqual(self.match('my gps stopped working'), [])
+        self.assertEqual(self.match('general question about opening hours'), [])
+        self.assertEqual(self.match('a general practitioner, please'), ['General Practice'])
+        self.assertEqual(self.match('skinny jeans'), [])
+
+    def test_multi_word_phrases_outweigh_single_words(self):
+        self.assertEqual(self.match('kids need a family doctor'), ['General Practice', 'Pediatrics'])
+        self.assertEqual(self.match('skin or heart doctor'), ['Cardiology', 'Dermatology'])
+        # Equal weight: the earlier mention wins
+        self.assertEqual(self.match('tooth pain and a skin rash'), ['Dentistry', 'Dermatology'])
+
+    def test_case_and_plurals_are_folded(self):
+        self.assertEqual(self.match('CARDIOLOGISTS near me'), ['Cardiology'])
+        self.assertEqual(self.match('Any Dentists?'), ['Dentistry'])
+        self.assertEqual(self.match('Primary-Care'), ['General Practice'])
+        matcher = SpecializationMatcher(SYNONYMS)
+        self.assertTrue(matcher.knows('DERMATOLOGY'))
+        self.assertFalse(matcher.knows('Oncology'))
 
-# Create your tests here.
@@ -1,6 +1,7 @@
 from django.urls import path
-from .views import ChatbotView
+from .views import ChatbotView, ChatbotCacheStatsView
 
 urlpatterns = [
     path('chat/', ChatbotView.as_view(), name='chatbot'),
+    path('cache-stats/', ChatbotCacheStatsView.as_view(), name='chatbot_cache_stats'),
 ]
@@ -1,82 +1,114 @@
+import logging
+from django.http import StreamingHttpResponse
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import permissions, status
-from django.db.models import Q
-from apps.users.models import Doctor, ProviderProfile
+from rest_framework.renderers import JSONRenderer, BrowsableAPIRenderer
+from apps.users.models import Doctor
+from apps.users.search import search_providers
+from .backends import get_backend
+from .cache import cache_key, get_doctor_cache
+from .matcher import get_matcher
+from .renderers import EventStreamRenderer, sse_event
+
+logger = logging.getLogger(__name__)
 
 class ChatbotView(APIView):
     permission_classes = [permissions.AllowAny]
+    renderer_classes = [JSONRenderer, BrowsableAPIRenderer, EventStreamRenderer]
+    max_doctors = 5
+
+    def find_doctors(self, query, free_text=False):
+        ranked = [user_id for user_id, _ in search_providers(query, limit=self.max_doctors, free_text=free_text)]
+        found = Doctor.objects.select_related('provider_profile').in_bulk(ranked)
+        doctors = []
+        for user_id in ranked:
+            doc = found.get(user_id)
+            if doc is None:
+                continue
+            profile = getattr(doc, 'provider_profile', None)
+            doctors.append({
+                "id": doc.id,
+                "name": f"Dr. {doc.last_name}",
+                "specialization": profile.specialization if profile else "",
+            })
+        return doctors
 
     def post(self, request):
         user_message = request.data.get('message', '').lower()
         if not user_message:
             return Response({'error': 'Message is required'}, status=status.HTTP_400_BAD_REQUEST)
 
-        response_message = "I'm sorry, I didn't understand that. You can ask me to find a doctor by specialization, e.g., 'I need a cardiologist'."
-        doctors = []
+        result = self.lookup(user_message)
+        if not self.wants_stream(request):
+            return Response(result)
 
-        # Normalize message
-        user_message = user_message.lower() 
+        response = StreamingHttpResponse(
+            self.event_stream(request.data.get('message'), result),
+            content_type='text/event-stream',
+        )
+        response['Cache-Control'] = 'no-cache'
+        # Stop nginx-style proxies from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
 
-        # Dictionary of terms to DB specializations
-        specialization_map = {
-            "cardiologist": "Cardiology",
-            "cardiology": "Cardiology",
-            "heart": "Cardiology",
-            "dermatologist": "Dermatology",
-            "dermatology": "Dermatology",
-            "skin": "Dermatology",
-            "neurologist": "Neurology",
-            "neurology": "Neurology",
-            "pediatrician": "Pediatrics",
-            "pediatrics": "Pediatrics",
-            "children": "Pediatrics",
-            "dentist": "Dentistry",
-            "dental": "Dentistry",
-            "general": "General Practice",
-            "gp": "General Practice"
-        }
+    def wants_stream(self, request):
+        return (
+            request.accepted_renderer.format == 'sse'
+            or str(request.data.get('stream', '')).lower() in ('1', 'true')
+            or request.query_params.get('stream') in ('1', 'true')
+        )
 
-        specialization_query = None
+    async def event_stream(self, message, result):
+        """
+        Server-sent events: the deterministic doctor lookup goes out first as a
+        `doctors` event, then `token` events from the chat backend, then `done`.
+        Runs on the event loop under ASGI, so a slow generation holds no worker thread.
+        """
+        yield sse_event('doctors', result)
+        try:
+            async for text in get_backend().stream(message, result):
+                yield sse_event('token', {'text': text})
+        except Exception:
+            logger.exception('Chat backend failed while streaming a reply')
+            yield sse_event('error', {'error': 'The assistant is unavailable right now.'})
+        yield sse_event('done', {})
 
-        # Check if any keyword exists in the message
-        for term, specialization in specialization_map.items():
-            if term in user_message:
-                specialization_query = specialization
-                break
-        
-        # If no strict match, try to see if the user typed a known specialization directly
-        if not specialization_query:
-            # Check DB for strict match if possible, or just skip it for now.
-            pass
+    def lookup(self, user_message):
+        # Every specialization mentioned, best match first
+        specializations = get_matcher().match(user_message)
+        specialization_query = specializations[0] if specializations else None
 
         if specialization_query:
-            matched_doctors = Doctor.objects.filter(
-                provider_profile__specialization__icontains=specialization_query
-            )[:5]
-            
-            if matched_doctors.exists():
-                doctor_list = []
-                doctors_data = []
-                for doc in matched_doctors:
-                    doctor_name = f"Dr. {doc.last_name}"
-                    spec = doc.provider_profile.specialization
-                    doctor_list.append(f"{doctor_name} ({spec})")
-                    doctors_data.append({
-                        "id": doc.id, 
-                        "name": doctor_name, 
-                        "specialization": spec,
-                        # "image": doc.provider_profile.profile_image.url if doc.provider_profile.profile_image else "" 
-                    })
-                
+            key = cache_key(specialization_query)
+            doctor_cache = get_doctor_cache()
+            doctors = doctor_cache.get(key)
+            if doctors is None:
+                doctors = self.find_doctors(specialization_query)
+                doctor_cache.set(key, doctors)
+            if doctors:
+                doctor_list = [f"{doc['name']} ({doc['specialization']})" for doc in doctors]
                 response_message = f"I found the following {specialization_query} specialists for you: " + ", ".join(doctor_list) + "."
-                doctors = doctors_data
             else:
                 response_message = f"I understood you are looking for {specialization_query}, but I couldn't find any doctors with that specialization right now."
         else:
-             response_message = "I'm sorry, I didn't verify that specialization. Try asking for 'Cardiologist', 'Dermatologist', 'Pediatrician', etc."
+            # No known specialization: try the message as free text (doctor names, clinics, bios)
+            doctors = self.find_doctors(user_message, free_text=True)
+            if doctors:
+                doctor_list = [f"{doc['name']} ({doc['specialization']})" for doc in doctors]
+                response_message = "These doctors match what you asked for: " + ", ".join(doctor_list) + "."
+            else:
+                response_message = "I'm sorry, I didn't verify that specialization. Try asking for 'Cardiologist', 'Dermatologist', 'Pediatrician', etc."
 
-        return Response({
+        return {
             'message': response_message,
-            'doctors': doctors
-        })
+            'doctors': doctors,
+            'specializations': specializations,
+        }
+
+class ChatbotCacheStatsView(APIView):
+    """GET /api/chatbot/cache-stats/ -- hit/miss counters for sizing the intent cache."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(get_doctor_cache().stats())
@@ -0,0 +1,33 @@
+from contextlib import contextmanager
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+
+@contextmanager
+def test_database(sqlite_file=None):
+    """
+    Run the enclosed block against a freshly migrated, throwaway test database.
+
+    SQLite test databases live in memory by default; pass `sqlite_file` to put it
+    on disk instead when several threads need their own connections to it.
+    Transactions then take the write lock up front, so concurrent writers wait
+    for each other instead of failing with "database is locked".
+    """
+    if sqlite_file and connection.vendor == 'sqlite':
+        connection.settings_dict['TEST']['NAME'] = sqlite_file
+        connection.settings_dict['OPTIONS']['transaction_mode'] = 'IMMEDIATE'
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
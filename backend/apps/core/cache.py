@@ -0,0 +1,79 @@
+"""
+Caching of public (anonymous) read endpoints.
+
+Entries are never deleted one by one. Every cache key embeds the current
+*generation* of the scopes it depends on (for example 'services:provider:7'),
+and a model signal bumps those generations. Stale entries then simply stop
+being addressed and age out. This works on any cache backend, including ones
+that can't delete by pattern.
+"""
+import hashlib
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from rest_framework.response import Response
+
+# Response headers stored with a cached body, so hits can answer conditional GETs
+VALIDATOR_HEADERS = ('ETag', 'Last-Modified')
+
+
+def _generation_key(scope):
+    return f'generation:{scope}'
+
+
+def generations(scopes):
+    keys = [_generation_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    return [found.get(key, 0) for key in keys]
+
+
+def bump(*scopes):
+    """Invalidate everything cached under any of the given scopes."""
+    for scope in scopes:
+        key = _generation_key(scope)
+        cache.add(key, 0, timeout=None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Evicted between add() and incr(); a fresh generation is just as good
+            cache.set(key, 1, timeout=None)
+
+
+class PublicListCacheMixin:
+    """
+    Caches list() responses for anonymous requests. Authenticated requests always
+    hit the database, so per-user views are never served from the shared cache.
+
+    Put it before ConditionalListMixin: the ETag/Last-Modified a miss produced
+    are cached with the body, so a hit answers If-None-Match without a query.
+    """
+    cache_prefix = None
+
+    def get_cache_scopes(self):
+        return [self.cache_prefix]
+
+    def public_cache_key(self, request):
+        scopes = self.get_cache_scopes()
+        params = sorted((k, tuple(v)) for k, v in request.query_params.lists())
+        raw = repr((request.get_host(), request.path, params, scopes, generations(scopes)))
+        return f'public:{self.cache_prefix}:{hashlib.md5(raw.encode()).hexdigest()}'
+
+    def list(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            return super().list(request, *args, **kwargs)
+        key = self.public_cache_key(request)
+        entry = cache.get(key)
+        if entry is not None:
+            data, headers = entry
+            # Like ConditionalListMixin, only the ETag (which counts rows) decides a 304
+            response = get_conditional_response(request, etag=headers.get('ETag'))
+            if response is None:
+                response = Response(data)
+            for name, value in headers.items():
+                response[name] = value
+            return response
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            headers = {name: response[name] for name in VALIDATOR_HEADERS if response.has_header(name)}
+            cache.set(key, (response.data, headers), settings.PUBLIC_CACHE_TIMEOUT)
+        return response
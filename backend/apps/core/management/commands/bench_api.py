@@ -0,0 +1,217 @@
+import io
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import threading
+import time as timer
+from concurrent.futures import ThreadPoolExecutor
+from datetime import time, timedelta
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from apps.core.benchmarks import test_database, percentile
+from apps.services.models import Service
+from apps.users.models import User
+
+SEED_PASSWORD = 'password123'
+SCENARIOS = ('login', 'providers', 'services', 'availability', 'booking', 'appointments', 'chatbot')
+CHAT_MESSAGES = (
+    'I need a cardiologist', 'my child has a fever', 'looking for a dentist near me',
+    'skin rash that will not go away', 'who can help with migraines', 'hello',
+)
+
+
+def git_revision():
+    try:
+        sha = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return sha, dirty
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the API routes in-process against a seeded throwaway test database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                            help=f'Comma-separated subset of: {", ".join(SCENARIOS)}')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per scenario')
+        parser.add_argument('--concurrency', type=int, default=4, help='Client threads per scenario')
+        parser.add_argument('--warmup', type=int, default=10, help='Unmeasured requests per scenario')
+        parser.add_argument('--providers', type=int, default=300)
+        parser.add_argument('--clients', type=int, default=3000)
+        parser.add_argument('--appointments', type=int, default=30000)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', help='Write results as JSON to this file')
+        parser.add_argument('--compare', help='Earlier JSON results to print deltas against')
+
+    def handle(self, *args, **options):
+        scenarios = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            self.stderr.write(f'Unknown scenarios: {", ".join(sorted(unknown))}')
+            return
+
+        with tempfile.TemporaryDirectory() as tmp, test_database(sqlite_file=os.path.join(tmp, 'bench.sqlite3')):
+            self.stdout.write('Seeding...')
+            call_command(
+                'seed_load', providers=options['providers'], clients=options['clients'],
+                appointments=options['appointments'], seed=options['seed'], password=SEED_PASSWORD,
+                stdout=io.StringIO(),
+            )
+            self.prepare(options)
+            results = {}
+            for name in scenarios:
+                results[name] = self.run_scenario(name, options)
+                self.stdout.write(self.format_row(name, results[name]))
+
+        sha, dirty = git_revision()
+        report = {
+            'git_sha': sha,
+            'git_dirty': dirty,
+            'timestamp': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'cache': settings.CACHES['default']['BACKEND'],
+            'python': platform.python_version(),
+            'options': {key: options[key] for key in (
+                'requests', 'concurrency', 'warmup', 'providers', 'clients', 'appointments', 'seed',
+            )},
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                json.dump(report, fh, indent=2)
+            self.stdout.write(f'Wrote {options["output"]}')
+        if options['compare']:
+            self.compare(report, options['compare'])
+
+    def prepare(self, options):
+        self.service_ids = list(Service.objects.filter(is_active=True).order_by('id').values_list('id', flat=True))
+        self.client_emails = list(
+            User.objects.filter(role='CLIENT').order_by('id').values_list('email', flat=True)[:options['concurrency']]
+        )
+        self.provider_ids = list(User.objects.filter(role='PROVIDER').order_by('id').values_list('id', flat=True))
+        # Log every thread's client in once; the login scenario measures logins separately
+        self.tokens = [self.login(Client(), email)['access'] for email in self.client_emails]
+        # Bookings go past the seeded range, one unique slot each, so they all succeed
+        self.booking_day = timezone.localdate() + timedelta(days=400)
+        self.booking_counter = itertools.count()
+        self.booking_lock = threading.Lock()
+
+    def login(self, client, email):
+        response = client.post('/api/auth/login/', {'email': email, 'password': SEED_PASSWORD},
+                               content_type='application/json')
+        return response.json() if response.status_code == 200 else response
+
+    def request(self, name, client, worker, n):
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {self.tokens[worker]}'}
+        if name == 'login':
+            return client.post('/api/auth/login/', {'email': self.client_emails[worker], 'password': SEED_PASSWORD},
+                               content_type='application/json')
+        if name == 'providers':
+            return client.get('/api/auth/providers/', {'view': 'slim'})
+        if name == 'services':
+            return client.get('/api/services/', {'provider': self.provider_ids[n % len(self.provider_ids)]})
+        if name == 'availability':
+            return client.get('/api/availability/slots/', {'service': self.service_ids[n % len(self.service_ids)]})
+        if name == 'booking':
+            with self.booking_lock:
+                slot = next(self.booking_counter)
+            day, hour = divmod(slot, 8)
+            return client.post('/api/appointments/', {
+                'service': self.service_ids[slot % len(self.service_ids)],
+                'date': (self.booking_day + timedelta(days=day)).isoformat(),
+                'time_slot': time(9 + hour).isoformat(),
+            }, content_type='application/json', **auth)
+        if name == 'appointments':
+            return client.get('/api/appointments/', **auth)
+        if name == 'chatbot':
+            return client.post('/api/chatbot/chat/', {'message': CHAT_MESSAGES[n % len(CHAT_MESSAGES)]},
+                               content_type='application/json')
+        raise ValueError(name)
+
+    def run_scenario(self, name, options):
+        concurrency = options['concurrency']
+        local = threading.local()
+
+        def call(worker, n, measure=True):
+            if not hasattr(local, 'client'):
+                local.client = Client()
+            with CaptureQueriesContext(connections['default']) as queries:
+                began = timer.perf_counter()
+                response = self.request(name, local.client, worker, n)
+                elapsed = (timer.perf_counter() - began) * 1000
+            return elapsed, len(queries), response.status_code
+
+        def worker(index):
+            samples = []
+            for n in range(index, options['warmup'], concurrency):
+                call(index, n)
+            for n in range(index, options['requests'], concurrency):
+                samples.append(call(index, n))
+            connections.close_all()
+            return samples
+
+        began = timer.perf_counter()
+        with ThreadPoolExecutor(concurrency) as pool:
+            samples = [s for chunk in pool.map(worker, range(concurrency)) for s in chunk]
+        wall = timer.perf_counter() - began
+
+        latencies = sorted(s[0] for s in samples)
+        queries = [s[1] for s in samples]
+        errors = sum(1 for s in samples if s[2] >= 400)
+        return {
+            'requests': len(samples),
+            'errors': errors,
+            'throughput_rps': round(len(samples) / wall, 1) if wall else 0.0,
+            'latency_ms': {
+                'mean': round(statistics.fmean(latencies), 2),
+                'p50': round(percentile(latencies, 50), 2),
+                'p95': round(percentile(latencies, 95), 2),
+                'p99': round(percentile(latencies, 99), 2),
+                'max': round(latencies[-1], 2),
+            },
+            'queries_per_request': {
+                'mean': round(statistics.fmean(queries), 2),
+                'max': max(queries),
+            },
+        }
+
+    def format_row(self, name, result):
+        latency = result['latency_ms']
+        return (
+            f'{name:<13} {result["throughput_rps"]:>8.1f} req/s  p50 {latency["p50"]:>8.2f}  '
+            f'p95 {latency["p95"]:>8.2f}  p99 {latency["p99"]:>8.2f} ms  '
+            f'{result["queries_per_request"]["mean"]:>5.1f} queries  {result["errors"]} errors'
+        )
+
+    def compare(self, report, path):
+        with open(path) as fh:
+            baseline = json.load(fh)
+        self.stdout.write('')
+        self.stdout.write(f'Compared with {baseline.get("git_sha") or path}:')
+        for name, result in report['results'].items():
+            before = baseline['results'].get(name)
+            if before is None:
+                continue
+            deltas = []
+            for label, new, old in (
+                ('req/s', result['throughput_rps'], before['throughput_rps']),
+                ('p50', result['latency_ms']['p50'], before['latency_ms']['p50']),
+                ('p95', result['latency_ms']['p95'], before['latency_ms']['p95']),
+                ('p99', result['latency_ms']['p99'], before['latency_ms']['p99']),
+                ('queries', result['queries_per_request']['mean'], before['queries_per_request']['mean']),
+            ):
+                change = f'{(new - old) / old * 100:+.1f}%' if old else 'n/a'
+                deltas.append(f'{label} {old} -> {new} ({change})')
+            self.stdout.write(f'{name:<13} ' + ', '.join(deltas))
@@ -0,0 +1,163 @@
+import random
+import statistics
+import time as timer
+from datetime import time, timedelta
+from django.core.management.base import BaseCommand
+from django.db import connection, models
+from django.utils import timezone
+from apps.appointments.models import Appointment
+from apps.core.benchmarks import test_database
+from apps.services.models import Service
+from apps.users.models import User, ProviderProfile
+
+SPECIALIZATIONS = (
+    'Cardiology', 'Dermatology', 'Neurology', 'Pediatrics', 'General Practice',
+    'Dentistry', 'Orthopedics', 'Psychiatry', 'Ophthalmology', 'Endocrinology',
+)
+
+# Indexes that existed before the hot-path index plan: the plain FK indexes that the
+# composite (provider, date) / (client, date) indexes now cover.
+BASELINE_INDEXES = (
+    (Appointment, models.Index(fields=['provider'], name='report_appt_provider_fk')),
+    (Appointment, models.Index(fields=['client'], name='report_appt_client_fk')),
+)
+PLANNED_MODELS = (Appointment, Service, User, ProviderProfile)
+
+
+class Command(BaseCommand):
+    help = 'Report query plans and latency for hot queries with and without the index plan'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--providers', type=int, default=2000)
+        parser.add_argument('--clients', type=int, default=20000)
+        parser.add_argument('--appointments', type=int, default=200000)
+        parser.add_argument('--runs', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--output', help='Also write the report to this file')
+
+    def handle(self, *args, **options):
+        self.lines = []
+        with test_database():
+            self.populate(options)
+            probes = self.probes(options)
+            self.set_plan(enabled=False)
+            before = self.measure(probes, options['runs'])
+            self.set_plan(enabled=True)
+            after = self.measure(probes, options['runs'])
+            self.report(probes, before, after, options)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write('\n'.join(self.lines) + '\n')
+
+    def out(self, line=''):
+        self.lines.append(line)
+        self.stdout.write(line)
+
+    def populate(self, options):
+        rng = random.Random(options['seed'])
+        users = [
+            User(email=f'provider{i}@example.com', password='!', role='PROVIDER', last_name=f'Provider{i}')
+            for i in range(options['providers'])
+        ] + [
+            User(email=f'client{i}@example.com', password='!', role='CLIENT', last_name=f'Client{i}')
+            for i in range(options['clients'])
+        ]
+        User.objects.bulk_create(users, batch_size=2000)
+        provider_ids = list(User.objects.filter(role='PROVIDER').values_list('id', flat=True))
+        client_ids = list(User.objects.filter(role='CLIENT').values_list('id', flat=True))
+        ProviderProfile.objects.bulk_create([
+            ProviderProfile(user_id=pk, business_name=f'Clinic {pk}', specialization=rng.choice(SPECIALIZATIONS))
+            for pk in provider_ids
+        ], batch_size=2000)
+        Service.objects.bulk_create([
+            Service(provider_id=pk, name=f'Service {n}', duration=rng.choice((15, 30, 45, 60)),
+                    price='100.00', is_active=rng.random() < 0.8)
+            for pk in provider_ids for n in range(3)
+        ], batch_size=2000)
+        services = {}
+        for pk, provider_id in Service.objects.values_list('id', 'provider_id'):
+            services.setdefault(provider_id, []).append(pk)
+
+        today = timezone.localdate()
+        statuses = ('PENDING', 'CONFIRMED', 'CONFIRMED', 'COMPLETED', 'COMPLETED', 'CANCELLED', 'REJECTED')
+        batch = []
+        for _ in range(options['appointments']):
+            provider_id = rng.choice(provider_ids)
+            minute = rng.randrange(8 * 60, 18 * 60, 15)
+            batch.append(Appointment(
+                client_id=rng.choice(client_ids), provider_id=provider_id,
+                service_id=rng.choice(services[provider_id]),
+                date=today + timedelta(days=rng.randint(-365, 180)),
+                time_slot=time(minute // 60, minute % 60), status=rng.choice(statuses),
+            ))
+            if len(batch) == 5000:
+                Appointment.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        Appointment.objects.bulk_create(batch, ignore_conflicts=True)
+
+    def probes(self, options):
+        specialization = random.Random(options['seed']).choice(SPECIALIZATIONS).upper()
+        provider_id = User.objects.filter(role='PROVIDER').values_list('id', flat=True)[options['providers'] // 2]
+        client_id = Appointment.objects.values_list('client_id', flat=True)[options['appointments'] // 3]
+        today = timezone.localdate()
+        return [
+            ('Provider schedule, next 14 days', lambda: Appointment.objects.filter(
+                provider_id=provider_id, date__range=(today, today + timedelta(days=14))).order_by('date')),
+            ('Client upcoming appointments', lambda: Appointment.objects.filter(
+                client_id=client_id, date__gte=today).order_by('date')),
+            ('Pending appointments this week', lambda: Appointment.objects.filter(
+                status='PENDING', date__range=(today, today + timedelta(days=7)))),
+            ('Overlap check (active slots)', lambda: Appointment.objects.active().filter(
+                provider_id=provider_id, date=today, time_slot__lt=time(12)).values_list('pk', 'time_slot')),
+            ('Active services for a provider', lambda: Service.objects.filter(
+                provider_id=provider_id, is_active=True)),
+            ('Provider directory page (keyset)', lambda: User.objects.filter(
+                role='PROVIDER', id__gt=provider_id).order_by('id')[:50]),
+            ('Specialization lookup (case-insensitive)', lambda: ProviderProfile.objects.filter(
+                specialization__upper=specialization)[:50]),
+        ]
+
+    def set_plan(self, enabled):
+        with connection.schema_editor() as editor:
+            for model, index in BASELINE_INDEXES:
+                (editor.remove_index if enabled else editor.add_index)(model, index)
+            for model in PLANNED_MODELS:
+                for index in model._meta.indexes:
+                    (editor.add_index if enabled else editor.remove_index)(model, index)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def measure(self, probes, runs):
+        results = []
+        for _, build in probes:
+            plan = build().explain()
+            timings = []
+            for _ in range(runs):
+                began = timer.perf_counter()
+                list(build())
+                timings.append((timer.perf_counter() - began) * 1000)
+            results.append((plan, statistics.median(timings)))
+        return results
+
+    def report(self, probes, before, after, options):
+        self.out(f'# Index plan report ({connection.vendor})')
+        self.out()
+        self.out(f'{Appointment.objects.count()} appointments, {options["providers"]} providers, '
+                 f'{options["clients"]} clients, median of {options["runs"]} runs')
+        self.out()
+        self.out('| Query | Before (ms) | After (ms) |')
+        self.out('|---|---:|---:|')
+        for (label, _), (_, before_ms), (_, after_ms) in zip(probes, before, after):
+            self.out(f'| {label} | {before_ms:.2f} | {after_ms:.2f} |')
+        for (label, _), (before_plan, _), (after_plan, _) in zip(probes, before, after):
+            self.out()
+            self.out(f'## {label}')
+            self.out()
+            self.out('Before:')
+            self.out('```')
+            self.out(before_plan)
+            self.out('```')
+            self.out('After:')
+            self.out('```')
+            self.out(after_plan)
+            self.out('```')
@@ -0,0 +1,348 @@
+import itertools
+import random
+import time as timer
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import date, time, timedelta
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models, transaction
+from django.utils import timezone
+from apps.appointments import ratings
+from apps.appointments.models import Appointment, Review
+from apps.core.cache import bump
+from apps.services.management.commands.seed_services import (
+    SERVICES_BY_SPECIALIZATION, WEEKDAY_SLOTS, WEEKEND_SLOTS,
+)
+from apps.services.models import Service, Availability
+from apps.users import search
+from apps.users.models import User, ProviderProfile
+
+FIRST_NAMES = (
+    'James', 'Mary', 'Robert', 'Patricia', 'John', 'Jennifer', 'Michael', 'Linda', 'David', 'Elizabeth',
+    'William', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah', 'Omar', 'Layla',
+    'Ahmed', 'Fatima', 'Wei', 'Mei', 'Carlos', 'Sofia', 'Ivan', 'Olga', 'Kenji', 'Aiko',
+)
+LAST_NAMES = (
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez', 'Martinez',
+    'Hernandez', 'Lopez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore', 'Martin', 'Lee', 'Chen',
+    'Haddad', 'Khalil', 'Nakamura', 'Kowalski', 'Novak', 'Silva', 'Rossi', 'Müller', 'Dubois', 'Horani',
+)
+SPECIALIZATIONS = tuple(SERVICES_BY_SPECIALIZATION)
+# Family medicine dominates a real directory; niche specialities are rarer
+SPECIALIZATION_WEIGHTS = (30, 8, 14, 5, 9, 8, 7, 8, 5, 6)
+PAST_STATUSES = (('COMPLETED', 78), ('CANCELLED', 14), ('REJECTED', 8))
+FUTURE_STATUSES = (('PENDING', 35), ('CONFIRMED', 55), ('CANCELLED', 10))
+REVIEW_COMMENTS = (
+    '', '', '', 'Great experience.', 'Very professional and kind.', 'Had to wait a long time.',
+    'Explained everything clearly.', 'Would book again.', 'Friendly staff, clean clinic.',
+)
+# Appointment starts are laid on a grid as wide as the longest service, so generated bookings never overlap
+SLOT_MINUTES = max(s['duration'] for services in SERVICES_BY_SPECIALIZATION.values() for s in services)
+
+# Set once per worker process (or in-process when --workers=1) by _init_worker
+_context = {}
+
+
+def _rng(seed, kind, chunk):
+    # One stream per (kind, chunk), so output does not depend on how chunks are spread over workers
+    return random.Random(f'{seed}:{kind}:{chunk}')
+
+
+def _init_worker(context):
+    _context.clear()
+    _context.update(context)
+
+
+def _users(args):
+    chunk, start, stop, role = args
+    rng = _rng(_context['seed'], role, chunk)
+    prefix = _context['prefix']
+    return [
+        (
+            f'{prefix}.{role.lower()}{i}@example.com', rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES),
+            f'+1555{rng.randrange(10 ** 7):07d}' if rng.random() < 0.7 else None,
+        )
+        for i in range(start, stop)
+    ]
+
+
+def _providers(args):
+    """Profile, services and availability blocks for a range of provider indexes."""
+    chunk, start, stop = args
+    rng = _rng(_context['seed'], 'providers', chunk)
+    rows = []
+    for i in range(start, stop):
+        specialization = rng.choices(SPECIALIZATIONS, weights=SPECIALIZATION_WEIGHTS)[0]
+        catalog = SERVICES_BY_SPECIALIZATION[specialization]
+        services = [
+            (s['name'], s['description'], s['duration'], s['price'], rng.random() < 0.9)
+            for s in rng.sample(catalog, rng.randint(1, len(catalog)))
+        ]
+        blocks = [b for b in WEEKDAY_SLOTS if rng.random() < 0.85] or WEEKDAY_SLOTS[:1]
+        if rng.random() < 0.4:
+            blocks += WEEKEND_SLOTS
+        rows.append((
+            i, specialization,
+            f'{rng.choice(LAST_NAMES)} {specialization} Clinic',
+            f'{specialization} specialist with {rng.randint(1, 35)} years of experience.',
+            f'{rng.randint(1, 9999)} {rng.choice(LAST_NAMES)} Street',
+            rng.random() < 0.6,
+            services,
+            [(b['day'], b['start'], b['end']) for b in blocks],
+        ))
+    return rows
+
+
+def _appointments(args):
+    chunk, count = args
+    rng = _rng(_context['seed'], 'appointments', chunk)
+    ctx = _context
+    week_start = ctx['anchor'] - timedelta(days=ctx['anchor'].weekday())
+    rows = []
+    for _ in range(count):
+        provider = rng.choices(ctx['provider_ids'], cum_weights=ctx['provider_weights'])[0]
+        client = rng.choices(ctx['client_ids'], cum_weights=ctx['client_weights'])[0]
+        service_id = rng.choice(ctx['services'][provider])
+        day, start_minute = rng.choice(ctx['starts'][provider])
+        day_date = week_start + timedelta(weeks=rng.randint(-ctx['past_weeks'], ctx['future_weeks']), days=day)
+        statuses = PAST_STATUSES if day_date < ctx['anchor'] else FUTURE_STATUSES
+        status = rng.choices([s for s, _ in statuses], weights=[w for _, w in statuses])[0]
+        rows.append((client, provider, service_id, day_date, start_minute, status))
+    return rows
+
+
+def _reviews(args):
+    chunk, appointment_ids = args
+    rng = _rng(_context['seed'], 'reviews', chunk)
+    rows = []
+    for pk in appointment_ids:
+        if rng.random() < _context['review_ratio']:
+            # Skewed towards good ratings, like most review sites
+            rating = rng.choices((1, 2, 3, 4, 5), weights=(4, 5, 11, 30, 50))[0]
+            rows.append((pk, rating, rng.choice(REVIEW_COMMENTS)))
+    return rows
+
+
+def _popularity(rng, count, skew):
+    """Cumulative Zipf-like weights in random order: a few very busy rows and a long tail."""
+    weights = [1 / (rank + 1) ** skew for rank in range(count)]
+    rng.shuffle(weights)
+    return list(itertools.accumulate(weights))
+
+
+def _raw_delete(queryset):
+    """
+    Delete the rows and everything that cascades from them with one DELETE per
+    table, children first. Unlike QuerySet.delete() no rows are loaded and no
+    signals fire, so the caller refreshes whatever those signals maintain.
+    """
+    for relation in queryset.model._meta.get_fields(include_hidden=True):
+        if not (relation.auto_created and not relation.concrete and (relation.one_to_many or relation.one_to_one)):
+            continue
+        field = relation.field
+        related = relation.related_model._base_manager.filter(**{f'{field.name}__in': queryset})
+        if field.remote_field.on_delete is models.SET_NULL:
+            related.update(**{field.name: None})
+        elif field.remote_field.on_delete is models.CASCADE:
+            _raw_delete(related)
+    return queryset._raw_delete(queryset.db)
+
+
+def _chunks(total, size):
+    return [(n, start, min(start + size, total)) for n, start in enumerate(range(0, total, size))]
+
+
+class Command(BaseCommand):
+    help = 'Generate a large, reproducible synthetic dataset for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--providers', type=int, default=1000)
+        parser.add_argument('--clients', type=int, default=20000)
+        parser.add_argument('--appointments', type=int, default=200000)
+        parser.add_argument('--review-ratio', type=float, default=0.35,
+                            help='Share of completed appointments that get a review')
+        parser.add_argument('--past-weeks', type=int, default=52)
+        parser.add_argument('--future-weeks', type=int, default=8)
+        parser.add_argument('--anchor-date', type=date.fromisoformat,
+                            help='Date treated as "today" (default: today); fix it for byte-identical datasets')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--prefix', default='load', help='Email prefix that marks generated users')
+        parser.add_argument('--password', default='password123', help='Password shared by every generated user')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--workers', type=int, default=1, help='Processes used to generate rows')
+        parser.add_argument('--flush', action='store_true', help='Delete users from an earlier run with this prefix')
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.batch_size = options['batch_size']
+        existing = User.objects.filter(email__startswith=f"{options['prefix']}.")
+        if existing.exists():
+            if not options['flush']:
+                raise CommandError(f"Users with prefix '{options['prefix']}' exist; pass --flush or another --prefix.")
+            self.phase('Flushing previous run', lambda: self.flush(existing))
+
+        context = {
+            'seed': options['seed'],
+            'prefix': options['prefix'],
+            'anchor': options['anchor_date'] or timezone.localdate(),
+            'past_weeks': options['past_weeks'],
+            'future_weeks': options['future_weeks'],
+            'review_ratio': options['review_ratio'],
+        }
+        # Hashing is deliberately slow; one hash shared by every row keeps seeding I/O bound
+        self.password = make_password(options['password'], salt=f"seed{options['seed']}")
+        self.started = timer.perf_counter()
+
+        with self.executor(context) as self.run_chunks:
+            provider_ids = self.phase('Providers', lambda: self.create_users('PROVIDER', options['providers']))
+            client_ids = self.phase('Clients', lambda: self.create_users('CLIENT', options['clients']))
+            self.phase('Profiles, services, availability', lambda: self.create_providers(provider_ids, context))
+
+        # Appointment generation needs the ids above, so workers are restarted with the fuller context
+        rng = random.Random(options['seed'])
+        context['client_ids'] = client_ids
+        context['provider_weights'] = _popularity(rng, len(context['provider_ids']), 0.9)
+        context['client_weights'] = _popularity(rng, len(client_ids), 0.6)
+        with self.executor(context) as self.run_chunks:
+            self.phase('Appointments', lambda: self.create_appointments(options['appointments']))
+            self.phase('Reviews', lambda: self.create_reviews(provider_ids))
+
+        # bulk_create bypasses the review endpoints that keep these current
+        self.phase('Rating counters', lambda: ratings.rebuild(batch_size=self.batch_size))
+        self.phase('Search index', lambda: self.rebuild_search(provider_ids))
+        # Nor do bulk inserts and the flush invalidate cached public lists
+        bump('providers', 'services:all')
+        self.stdout.write(self.style.SUCCESS(f'Done in {timer.perf_counter() - self.started:.1f}s'))
+
+    @contextmanager
+    def executor(self, context):
+        """Yield a map(fn, chunks) that generates rows in order, in worker processes if asked to."""
+        workers = self.options['workers']
+        if workers <= 1:
+            _init_worker(context)
+            yield map
+            return
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(context,)) as pool:
+            def run(fn, chunks):
+                # Keep only a few chunks in flight so generated rows never pile up ahead of the inserts
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(pool.submit(fn, chunk))
+                    if len(pending) > workers * 2:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+            yield run
+
+    def flush(self, users):
+        with transaction.atomic():
+            return _raw_delete(users)
+
+    def phase(self, label, fn):
+        began = timer.perf_counter()
+        result = fn()
+        rows = result if isinstance(result, int) else len(result)
+        elapsed = timer.perf_counter() - began
+        self.stdout.write(f'{label}: {rows} rows in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):,.0f}/s)')
+        return result
+
+    def insert(self, model, objs, **kwargs):
+        with transaction.atomic():
+            model.objects.bulk_create(objs, batch_size=self.batch_size, **kwargs)
+
+    def create_users(self, role, count):
+        chunks = [(n, start, stop, role) for n, start, stop in _chunks(count, self.batch_size)]
+        for rows in self.run_chunks(_users, chunks):
+            self.insert(User, [
+                User(email=email, password=self.password, first_name=first, last_name=last, phone=phone, role=role)
+                for email, first, last, phone in rows
+            ])
+        # Rows are inserted in index order, so id order maps back to the generator's indexes
+        return list(
+            User.objects.filter(email__startswith=f"{self.options['prefix']}.{role.lower()}", role=role)
+            .order_by('id').values_list('id', flat=True)
+        )
+
+    def create_providers(self, provider_ids, context):
+        total = 0
+        grid = {}
+        for rows in self.run_chunks(_providers, _chunks(len(provider_ids), self.batch_size)):
+            profiles, services, blocks = [], [], []
+            for i, specialization, business, bio, address, verified, catalog, available in rows:
+                user_id = provider_ids[i]
+                profiles.append(ProviderProfile(
+                    user_id=user_id, specialization=specialization, business_name=business,
+                    bio=bio, address=address, is_verified=verified,
+                ))
+                services += [
+                    Service(provider_id=user_id, name=name, description=description,
+                            duration=duration, price=price, is_active=active)
+                    for name, description, duration, price, active in catalog
+                ]
+                blocks += [
+                    Availability(provider_id=user_id, day_of_week=day, start_time=start, end_time=end)
+                    for day, start, end in available
+                ]
+                grid[user_id] = [
+                    (day, minute)
+                    for day, start, end in available
+                    for minute in range(start.hour * 60 + start.minute, end.hour * 60 + end.minute - SLOT_MINUTES + 1,
+                                        SLOT_MINUTES)
+                ]
+            self.insert(ProviderProfile, profiles)
+            self.insert(Service, services)
+            self.insert(Availability, blocks)
+            total += len(profiles) + len(services) + len(blocks)
+
+        services = {}
+        for pk, provider_id in Service.objects.filter(
+            provider_id__in=provider_ids, is_active=True
+        ).order_by('id').values_list('id', 'provider_id').iterator():
+            services.setdefault(provider_id, []).append(pk)
+        # Only providers with something bookable get appointments
+        context['provider_ids'] = [pk for pk in provider_ids if pk in services and grid[pk]]
+        context['services'] = services
+        context['starts'] = grid
+        return total
+
+    def create_appointments(self, count):
+        if not count or not self.options['clients'] or not self.options['providers']:
+            return 0
+        chunks = [(n, stop - start) for n, start, stop in _chunks(count, self.batch_size)]
+        for rows in self.run_chunks(_appointments, chunks):
+            # Colliding active bookings are dropped by the slot constraint, like a real double booking
+            self.insert(Appointment, [
+                Appointment(client_id=client, provider_id=provider, service_id=service, date=day,
+                            time_slot=time(minute // 60, minute % 60), status=status)
+                for client, provider, service, day, minute, status in rows
+            ], ignore_conflicts=True)
+        landed = Appointment.objects.filter(provider__email__startswith=f"{self.options['prefix']}.").count()
+        if landed < count:
+            self.stdout.write(f'{count - landed} generated appointments hit an active booking and were skipped')
+        return landed
+
+    def create_reviews(self, provider_ids):
+        completed = {
+            pk: (provider_id, service_id)
+            for pk, provider_id, service_id in Appointment.objects.filter(
+                provider__email__startswith=f"{self.options['prefix']}.", status='COMPLETED',
+            ).order_by('id').values_list('id', 'provider_id', 'service_id')
+        }
+        ids = list(completed)
+        chunks = [(n, ids[start:stop]) for n, start, stop in _chunks(len(ids), self.batch_size)]
+        total = 0
+        for rows in self.run_chunks(_reviews, chunks):
+            self.insert(Review, [
+                Review(appointment_id=pk, provider_id=completed[pk][0], service_id=completed[pk][1],
+                       rating=rating, comment=comment)
+                for pk, rating, comment in rows
+            ])
+            total += len(rows)
+        return total
+
+    def rebuild_search(self, provider_ids):
+        # bulk_create skips the signals that keep the search index current
+        search.rebuild_index()
+        return len(provider_ids)
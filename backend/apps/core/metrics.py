@@ -0,0 +1,89 @@
+"""
+Per-route request metrics in the Prometheus text format.
+
+Metrics are aggregated in memory by each process. Under several gunicorn
+workers every scrape therefore sees one worker's numbers; Prometheus' rate()
+and histogram_quantile() still work per instance.
+"""
+import bisect
+import threading
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        # {labels: [per-bucket counts..., +Inf count, sum]}
+        self.series = {}
+
+    def observe(self, labels, value):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 2)
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self, label_names):
+        yield f'# HELP {self.name} {self.help_text}'
+        yield f'# TYPE {self.name} histogram'
+        for labels, series in sorted(self.series.items()):
+            base = ','.join(f'{k}="{v}"' for k, v in zip(label_names, labels))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), series):
+                cumulative += count
+                yield f'{self.name}_bucket{{{base},le="{bound}"}} {cumulative}'
+            yield f'{self.name}_sum{{{base}}} {series[-1]:.6f}'
+            yield f'{self.name}_count{{{base}}} {cumulative}'
+
+
+class RequestMetrics:
+    label_names = ('route', 'method')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}
+        self.duration = Histogram(
+            'http_request_duration_seconds', 'Time to produce the response.', DURATION_BUCKETS)
+        self.db_duration = Histogram(
+            'http_request_db_duration_seconds', 'Time spent executing SQL per request.', DURATION_BUCKETS)
+        self.render_duration = Histogram(
+            'http_request_render_duration_seconds', 'Time spent serializing the response body.', DURATION_BUCKETS)
+        self.queries = Histogram(
+            'http_request_db_queries', 'SQL queries executed per request.', QUERY_BUCKETS)
+
+    def record(self, route, method, status, total, db_time, queries, render_time):
+        labels = (route, method)
+        with self._lock:
+            key = (route, method, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.duration.observe(labels, total)
+            self.db_duration.observe(labels, db_time)
+            self.render_duration.observe(labels, render_time)
+            self.queries.observe(labels, queries)
+
+    def render(self):
+        with self._lock:
+            lines = [
+                '# HELP http_requests_total Requests handled, by route, method and status.',
+                '# TYPE http_requests_total counter',
+            ]
+            lines += [
+                f'http_requests_total{{route="{route}",method="{method}",status="{status}"}} {count}'
+                for (route, method, status), count in sorted(self.requests.items())
+            ]
+            for histogram in (self.duration, self.db_duration, self.render_duration, self.queries):
+                lines += histogram.render(self.label_names)
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self._lock:
+            self.requests.clear()
+            for histogram in (self.duration, self.db_duration, self.render_duration, self.queries):
+                histogram.series.clear()
+
+
+registry = RequestMetrics()
@@ -0,0 +1,81 @@
+import time
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from .metrics import registry
+
+
+def route_name(request):
+    """`basename.action` for router viewsets, the URL name otherwise."""
+    match = request.resolver_match
+    if match is None:
+        return 'unmatched'
+    view = match.func
+    actions = getattr(view, 'actions', None)
+    basename = getattr(view, 'initkwargs', {}).get('basename')
+    if actions and basename:
+        return f"{basename}.{actions.get(request.method.lower(), request.method.lower())}"
+    return match.view_name or match._func_path
+
+
+class QueryTimer:
+    def __init__(self):
+        self.count = 0
+        self.elapsed = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        began = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.elapsed += time.perf_counter() - began
+            self.count += 1
+
+
+class RequestMetricsMiddleware:
+    """
+    Times each request and the SQL it runs, then reports the numbers as a
+    Server-Timing header (SERVER_TIMING) and/or into the per-route histograms
+    served at /api/metrics (METRICS_ENABLED). With both off it is not installed.
+
+    `render` is the time spent serializing the response body. Streaming
+    responses are measured up to the point where streaming starts.
+    """
+
+    def __init__(self, get_response):
+        self.server_timing = settings.SERVER_TIMING
+        self.collect = settings.METRICS_ENABLED
+        if not (self.server_timing or self.collect):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request._render_time = 0.0
+        timer = QueryTimer()
+        began = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        total = time.perf_counter() - began
+
+        if self.server_timing:
+            response['Server-Timing'] = ', '.join((
+                f'db;dur={timer.elapsed * 1000:.1f};desc="{timer.count} queries"',
+                f'render;dur={request._render_time * 1000:.1f}',
+                f'app;dur={max(total - timer.elapsed - request._render_time, 0) * 1000:.1f}',
+                f'total;dur={total * 1000:.1f}',
+            ))
+        if self.collect and request.path != '/api/metrics':
+            registry.record(
+                route_name(request), request.method, response.status_code,
+                total, timer.elapsed, timer.count, request._render_time,
+            )
+        return response
+
+    def process_template_response(self, request, response):
+        # Called right before the response is rendered; DRF responses are TemplateResponses
+        began = time.perf_counter()
+
+        def rendered(response):
+            request._render_time = time.perf_counter() - began
+        response.add_post_render_callback(rendered)
+        return response
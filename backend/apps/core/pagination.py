@@ -0,0 +1,16 @@
+from rest_framework.pagination import CursorPagination
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination over a unique, indexed ordering. Each page is a single
+    index range scan, so fetching page N costs the same as page 1 and rows
+    inserted between requests never shift or repeat results.
+    """
+    ordering = ('id',)
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+class NewestFirstPagination(KeysetPagination):
+    """Keyset pages over (-created_at, -id); needs an index in that order to stay a range scan."""
+    ordering = ('-created_at', '-id')
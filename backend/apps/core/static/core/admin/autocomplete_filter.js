@@ -0,0 +1,18 @@
+'use strict';
+{
+    const $ = django.jQuery;
+
+    // Re-run the changelist with the picked row as the filter value
+    $(function() {
+        $('select.admin-autocomplete-filter').on('change', function() {
+            const params = new URLSearchParams(window.location.search);
+            params.delete('p');
+            if (this.value) {
+                params.set(this.dataset.filterParam, this.value);
+            } else {
+                params.delete(this.dataset.filterParam);
+            }
+            window.location.search = params.toString();
+        });
+    });
+}
@@ -0,0 +1,33 @@
+"""
+Streaming responses over database iterators.
+
+Under ASGI, Django buffers a synchronous streaming iterator completely before
+sending it, which defeats `.iterator()` on large result sets. When the request
+came in over ASGI the sync generator is therefore wrapped in an async one that
+pulls a batch at a time on the sync thread, so the server-side cursor stays on
+one connection and memory stays flat under both handlers.
+"""
+import itertools
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+
+BATCH_SIZE = 200
+
+
+async def _pull(iterable, batch_size):
+    iterator = iter(iterable)
+    next_batch = sync_to_async(lambda: list(itertools.islice(iterator, batch_size)), thread_sensitive=True)
+    while True:
+        batch = await next_batch()
+        if not batch:
+            return
+        for part in batch:
+            yield part
+
+
+def streaming_response(request, content, batch_size=BATCH_SIZE, **kwargs):
+    """StreamingHttpResponse for a sync generator of str/bytes that may query the database."""
+    if isinstance(request, ASGIRequest):
+        content = _pull(content, batch_size)
+    return StreamingHttpResponse(content, **kwargs)
@@ -1,3 +1,142 @@
-from django.test import TestCase
+import io
+from datetime import date, time
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from apps.appointments.models import Appointment, Review
+from apps.notifications.models import Notification
+from apps.services.models import Service
+from apps.users.models import User
+from apps.users.search import search_providers
+from .metrics import registry
+
+
+@override_settings(METRICS_ENABLED=True, SERVER_TIMING=True, METRICS_TOKEN='')
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        registry.reset()
+        provider = User.objects.create_user(email='doc@example.com', password=None, role='PROVIDER')
+        Service.objects.create(provider=provider, name='Checkup', duration=30, price='80.00')
+
+    def test_server_timing_header(self):
+        response = self.client.get('/api/services/')
+        timing = response['Server-Timing']
+        for metric in ('db;dur=', 'render;dur=', 'app;dur=', 'total;dur='):
+            self.assertIn(metric, timing)
+
+    def test_metrics_are_aggregated_per_route(self):
+        self.client.get('/api/services/')
+        self.client.get('/api/services/')
+        self.client.get('/api/auth/providers/')
+        body = self.client.get('/api/metrics').content.decode()
+        self.assertIn('http_requests_total{route="service.list",method="GET",status="200"} 2', body)
+        self.assertIn('http_request_db_queries_count{route="service.list",method="GET"} 2', body)
+        self.assertIn('route="providers"', body)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get('/api/metrics').status_code, 401)
+        response = self.client.get('/api/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_metrics_endpoint_off(self):
+        self.assertEqual(self.client.get('/api/metrics').status_code, 404)
+
+
+class PublicListCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.provider = User.objects.create_user(email='doc@example.com', password=None, role='PROVIDER')
+        self.service = Service.objects.create(provider=self.provider, name='Checkup', duration=30, price='80.00')
+
+    def test_warm_anonymous_lists_and_revalidation_skip_the_database(self):
+        for url in ('/api/services/', '/api/auth/providers/'):
+            first = self.client.get(url)
+            with self.assertNumQueries(0):
+                warm = self.client.get(url)
+            self.assertEqual(warm.json(), first.json())
+            self.assertEqual(warm['ETag'], first['ETag'])
+            with self.assertNumQueries(0):
+                revalidated = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+            self.assertEqual(revalidated.status_code, 304)
+
+    def test_if_modified_since_alone_never_yields_a_304(self):
+        newest = Service.objects.create(provider=self.provider, name='Scan', duration=30, price='50.00')
+        first = self.client.get('/api/services/')
+        since = first['Last-Modified']
+        # A cache hit with an unchanged list still sends the body
+        self.assertEqual(self.client.get('/api/services/', HTTP_IF_MODIFIED_SINCE=since).status_code, 200)
+
+        # Deleting the newest row moves Max(updated_at) back before If-Modified-Since
+        newest.delete()
+        response = self.client.get('/api/services/', HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([s['name'] for s in response.json()], ['Checkup'])
+        self.assertTrue(response.has_header('Last-Modified'))
+
+    def test_writes_bump_the_generation_so_the_next_read_is_fresh(self):
+        self.assertEqual(self.client.get('/api/services/').json()[0]['name'], 'Checkup')
+        self.client.get('/api/services/', {'provider': self.provider.pk})
+        api = APIClient()
+        api.force_authenticate(self.provider)
+        self.assertEqual(api.patch(f'/api/services/{self.service.pk}/', {'name': 'Annual checkup'}).status_code, 200)
+        self.assertEqual(self.client.get('/api/services/').json()[0]['name'], 'Annual checkup')
+        self.assertEqual(self.client.get('/api/services/', {'provider': self.provider.pk}).json()[0]['name'],
+                         'Annual checkup')
+
+        self.client.get('/api/auth/providers/')
+        self.provider.first_name = 'Gregory'
+        self.provider.save()
+        self.assertEqual(self.client.get('/api/auth/providers/').json()['results'][0]['first_name'], 'Gregory')
+
+    def test_authenticated_responses_are_neither_cached_nor_served_from_cache(self):
+        Service.objects.create(provider=self.provider, name='Draft', duration=30, price='10.00', is_active=False)
+        api = APIClient()
+        api.force_authenticate(self.provider)
+        # The provider also sees their inactive services; that must not reach anonymous visitors
+        self.assertEqual(len(api.get('/api/services/').json()), 2)
+        with CaptureQueriesContext(connection) as anonymous:
+            self.assertEqual(len(self.client.get('/api/services/').json()), 1)
+        self.assertTrue(anonymous.captured_queries)
+        self.assertEqual(len(api.get('/api/services/').json()), 2)
+
+
+class SeedLoadTests(TestCase):
+    def seed(self, **options):
+        out = io.StringIO()
+        call_command('seed_load', providers=4, clients=10, appointments=80, batch_size=25, past_weeks=0,
+                     future_weeks=0, anchor_date=date(2026, 1, 7), stdout=out, **options)
+        return out.getvalue()
+
+    def test_counts_what_landed_and_flushes_only_its_own_rows(self):
+        output = self.seed()
+        landed = Appointment.objects.count()
+        self.assertIn(f'Appointments: {landed} rows', output)
+        self.assertIn(f'{80 - landed} generated appointments hit an active booking and were skipped', output)
+        self.assertEqual(User.objects.filter(email__startswith='load.').count(), 14)
+        with self.assertRaises(CommandError):
+            self.seed()
+
+        patient = User.objects.create_user(email='patient@example.com', password=None)
+        provider = User.objects.filter(role='PROVIDER').first()
+        Appointment.objects.create(client=patient, provider=provider, service=provider.services.first(),
+                                   date=date(2026, 3, 2), time_slot=time(23))
+        Notification.objects.create(recipient=provider, channel='email', event='test', address=provider.email)
+
+        output = self.seed(flush=True, seed=2)
+        self.assertIn('Flushing previous run: 14 rows', output)
+        self.assertTrue(User.objects.filter(pk=patient.pk).exists())
+        self.assertFalse(Appointment.objects.filter(client=patient).exists())
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(User.objects.count(), 15)
+        self.assertEqual(Review.objects.exclude(appointment__provider__email__startswith='load.').count(), 0)
+        specialization = User.objects.filter(role='PROVIDER').first().provider_profile.specialization
+        ranked = [pk for pk, _ in search_providers(specialization)]
+        self.assertTrue(ranked)
+        self.assertEqual(User.objects.filter(pk__in=ranked).count(), len(ranked))
 
-# Create your tests here.
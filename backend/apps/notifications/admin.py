@@ -1,3 +1,12 @@
 from django.contrib import admin
+from apps.core.admin import LargeTableAdminMixin
+from .models import Notification
 
-# Register your models here.
+@admin.register(Notification)
+class NotificationAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ('id', 'event', 'channel', 'address', 'status', 'attempts', 'available_at', 'sent_at')
+    list_filter = ('status', 'channel', 'event')
+    search_fields = ('^address',)
+    readonly_fields = ('created_at', 'sent_at', 'locked_by', 'last_error')
+    raw_id_fields = ('recipient',)
+    ordering = ('-id',)
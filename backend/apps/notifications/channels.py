@@ -0,0 +1,45 @@
+import abc
+import json
+import urllib.request
+from django.conf import settings
+from django.core.mail import send_mail
+from django.utils.module_loading import import_string
+
+
+class Channel(abc.ABC):
+    """Delivers one notification; raise to have the worker retry it later."""
+
+    @abc.abstractmethod
+    def send(self, notification):
+        """Deliver the notification or raise."""
+
+
+class EmailChannel(Channel):
+    def send(self, notification):
+        send_mail(
+            notification.payload['subject'],
+            notification.payload['message'],
+            settings.DEFAULT_FROM_EMAIL,
+            [notification.address],
+        )
+
+
+class WebhookChannel(Channel):
+    def send(self, notification):
+        body = json.dumps({'id': notification.pk, 'event': notification.event, **notification.payload}).encode()
+        request = urllib.request.Request(
+            notification.address, data=body, method='POST',
+            headers={'Content-Type': 'application/json', 'Idempotency-Key': f'notification-{notification.pk}'},
+        )
+        # urlopen raises for non-2xx responses
+        with urllib.request.urlopen(request, timeout=settings.NOTIFICATION_WEBHOOK_TIMEOUT):
+            pass
+
+
+_channels = {}
+
+
+def get_channel(name):
+    if name not in _channels:
+        _channels[name] = import_string(settings.NOTIFICATION_CHANNELS[name])()
+    return _channels[name]
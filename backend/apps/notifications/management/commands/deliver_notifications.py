@@ -0,0 +1,55 @@
+import os
+import signal
+import socket
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from apps.notifications.worker import Worker
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued notifications from the outbox (run as a long-lived worker process)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument('--poll-interval', type=float, default=1.0, help='Seconds to sleep when nothing is due')
+        parser.add_argument('--lease', type=int, default=60, help='Seconds a claimed batch stays reserved')
+        parser.add_argument('--max-attempts', type=int, default=8)
+        parser.add_argument('--backoff-base', type=float, default=5.0, help='Seconds; doubles with every attempt')
+        parser.add_argument('--backoff-cap', type=float, default=3600.0)
+        parser.add_argument('--stats-interval', type=float, default=60.0, help='Seconds between counter reports')
+        parser.add_argument('--once', action='store_true', help='Exit once nothing is due')
+
+    def handle(self, *args, **options):
+        worker = Worker(
+            f'{socket.gethostname()}:{os.getpid()}',
+            batch_size=options['batch_size'],
+            lease=timedelta(seconds=options['lease']),
+            max_attempts=options['max_attempts'],
+            backoff_base=options['backoff_base'],
+            backoff_cap=options['backoff_cap'],
+        )
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        last_report = time.monotonic()
+        while not self.stopping:
+            close_old_connections()
+            claimed = worker.run_once()
+            if time.monotonic() - last_report >= options['stats_interval']:
+                self.report(worker)
+                last_report = time.monotonic()
+            if not claimed:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+        self.report(worker)
+
+    def stop(self, *args):
+        # Finish the batch in hand, then exit
+        self.stopping = True
+
+    def report(self, worker):
+        self.stdout.write(' '.join(f'{key}={value}' for key, value in sorted(worker.stats().items())))
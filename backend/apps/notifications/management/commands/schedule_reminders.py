@@ -0,0 +1,49 @@
+import signal
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from apps.notifications.reminders import ReminderScheduler, parse_offset
+
+
+class Command(BaseCommand):
+    help = 'Queue appointment reminders at fixed offsets before each appointment (long-lived process)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--offsets', default='24h,1h', help='Comma-separated, e.g. 24h,1h,15m')
+        parser.add_argument('--tick', type=float, default=30.0, help='Seconds between scans')
+        parser.add_argument('--lookahead', type=float, default=120.0,
+                            help='Seconds ahead each scan looks; must be at least --tick')
+        parser.add_argument('--late-grace', type=float, default=900.0,
+                            help='Seconds a reminder may still go out late, e.g. after downtime or a late booking')
+        parser.add_argument('--once', action='store_true', help='Run a single tick and exit')
+
+    def handle(self, *args, **options):
+        try:
+            offsets = [parse_offset(text) for text in options['offsets'].split(',') if text.strip()]
+        except ValueError as exc:
+            raise CommandError(exc)
+        if options['lookahead'] < options['tick']:
+            raise CommandError('--lookahead must be at least --tick, or reminders could fall between scans.')
+        scheduler = ReminderScheduler(
+            offsets,
+            lookahead=timedelta(seconds=options['lookahead']),
+            late_grace=timedelta(seconds=options['late_grace']),
+        )
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        while not self.stopping:
+            close_old_connections()
+            began = time.monotonic()
+            queued = scheduler.tick()
+            if queued:
+                self.stdout.write(f'Queued {queued} reminder notifications ({len(scheduler.heap)} pending in memory)')
+            if options['once']:
+                break
+            time.sleep(max(options['tick'] - (time.monotonic() - began), 0))
+        self.stdout.write(f'Queued {scheduler.enqueued} reminder notifications in total')
+
+    def stop(self, *args):
+        self.stopping = True
@@ -1,3 +1,47 @@
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class Notification(models.Model):
+    """
+    Transactional outbox row. Written in the same transaction as the change it
+    announces and delivered later by the `deliver_notifications` worker, so
+    no email or webhook I/O ever happens on the request path.
+    """
+    class Status(models.TextChoices):
+        PENDING = 'PENDING', 'Pending'
+        SENDING = 'SENDING', 'Sending'
+        SENT = 'SENT', 'Sent'
+        FAILED = 'FAILED', 'Failed'
+
+    channel = models.CharField(max_length=20)
+    event = models.CharField(max_length=50)
+    recipient = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True, related_name='notifications'
+    )
+    address = models.CharField(max_length=255, help_text="Email address or webhook URL")
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    # Next delivery attempt; while SENDING, the end of the worker's lease
+    available_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    # Set for notifications that must be queued at most once (e.g. reminders), whoever queues them
+    dedupe_key = models.CharField(max_length=150, null=True, blank=True, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The worker's claim query: due rows in delivery order; delivered rows stay out of the index
+            models.Index(
+                fields=['available_at', 'id'],
+                condition=models.Q(status__in=['PENDING', 'SENDING']),
+                name='notification_due_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.event} via {self.channel} to {self.address} ({self.status})"
@@ -0,0 +1,120 @@
+from django.conf import settings
+from apps.users.models import User
+from .models import Notification
+
+SUBJECTS = {
+    'appointment.created': 'New appointment request',
+    'appointment.status_changed': 'Appointment {status}',
+    'appointment.reminder': 'Reminder: appointment {when}',
+    'series.created': 'New recurring appointment request',
+    'series.updated': 'Recurring appointment changed',
+    'series.cancelled': 'Recurring appointments cancelled',
+}
+SERIES_OUTCOMES = {
+    'series.created': 'requested',
+    'series.updated': 'rescheduled',
+    'series.cancelled': 'cancelled',
+}
+
+
+def _display(user):
+    return user.get_full_name() or user.email
+
+
+def _rows(appointment, event, client, provider, recipients, subject, message, dedupe_key=None):
+    payload = {
+        'appointment': appointment.pk,
+        'status': appointment.status,
+        'date': appointment.date.isoformat(),
+        'time_slot': appointment.time_slot.isoformat(),
+        'service': appointment.service.name,
+        'client': _display(client),
+        'provider': _display(provider),
+    }
+    rows = [
+        Notification(
+            channel='email', event=event, recipient=user, address=user.email,
+            payload={**payload, 'subject': subject, 'message': message},
+            dedupe_key=dedupe_key and f'{dedupe_key}:email:{user.pk}',
+        )
+        for user in recipients
+    ]
+    if settings.NOTIFICATION_WEBHOOK_URL:
+        rows.append(Notification(
+            channel='webhook', event=event, address=settings.NOTIFICATION_WEBHOOK_URL, payload=payload,
+            dedupe_key=dedupe_key and f'{dedupe_key}:webhook',
+        ))
+    return rows
+
+
+def _parties(client_id, provider_id, users=None):
+    """(client, provider) from an in_bulk() result, or None if either row is gone."""
+    if users is None:
+        users = User.objects.in_bulk([client_id, provider_id])
+    client, provider = users.get(client_id), users.get(provider_id)
+    return None if client is None or provider is None else (client, provider)
+
+
+def enqueue_appointment(appointment, event):
+    """
+    Queue notifications about an appointment for both parties, plus the
+    webhook if one is configured. Call inside the transaction that changes
+    the appointment so the rows commit or roll back together with it.
+    """
+    enqueue_appointments([appointment], event)
+
+
+def enqueue_appointments(appointments, event):
+    """enqueue_appointment for many appointments (with `service` loaded) in two queries."""
+    users = User.objects.in_bulk({pk for a in appointments for pk in (a.client_id, a.provider_id)})
+    rows = []
+    for appointment in appointments:
+        parties = _parties(appointment.client_id, appointment.provider_id, users)
+        if parties is None:
+            continue
+        client, provider = parties
+        status = appointment.get_status_display().lower()
+        message = (
+            f"{appointment.service.name} with {_display(provider)} for {_display(client)} "
+            f"on {appointment.date.isoformat()} at {appointment.time_slot:%H:%M} is {status}."
+        )
+        rows += _rows(
+            appointment, event, client, provider, (client, provider),
+            SUBJECTS[event].format(status=status), message,
+        )
+    if rows:
+        Notification.objects.bulk_create(rows)
+
+
+def enqueue_series(series, event, appointments):
+    """
+    Queue one notification per party for a change to a recurring series, rather
+    than one per occurrence. `appointments` are the occurrences it touched.
+    """
+    parties = _parties(series.client_id, series.provider_id) if appointments else None
+    if parties is None:
+        return
+    client, provider = parties
+    first = appointments[0]
+    message = (
+        f"{len(appointments)} {series.service.name} appointments with {_display(provider)} for "
+        f"{_display(client)}, from {first.date.isoformat()} at {first.time_slot:%H:%M}, "
+        f"were {SERIES_OUTCOMES[event]}."
+    )
+    rows = _rows(first, event, client, provider, (client, provider), SUBJECTS[event], message)
+    for row in rows:
+        row.payload.update(series=series.pk, occurrences=len(appointments))
+    Notification.objects.bulk_create(rows)
+
+
+def reminder_rows(appointment, offset_label, dedupe_key):
+    """Reminder for the client; `appointment` must come with client, provider and service loaded."""
+    client, provider = appointment.client, appointment.provider
+    message = (
+        f"Your {appointment.service.name} appointment with {_display(provider)} is "
+        f"on {appointment.date.isoformat()} at {appointment.time_slot:%H:%M} (in {offset_label})."
+    )
+    return _rows(
+        appointment, 'appointment.reminder', client, provider, (client,),
+        SUBJECTS['appointment.reminder'].format(when=f'in {offset_label}'), message, dedupe_key,
+    )
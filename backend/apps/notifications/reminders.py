@@ -0,0 +1,113 @@
+"""
+Appointment reminders.
+
+The scheduler keeps the reminders that fall due within the next few minutes
+in a heap. Each tick it scans one narrow window per offset: appointments
+starting between now + offset - late_grace and now + offset + lookahead.
+Those scans are range reads on the (date, time_slot) index, so a tick costs
+the same whatever the size of the table.
+
+Every reminder carries a dedupe key built from the appointment, the offset and
+the start time, so restarts and concurrent schedulers can't queue it twice.
+A rescheduled appointment gets a fresh key and a new reminder.
+"""
+import heapq
+import re
+from datetime import datetime, timedelta
+from django.db import transaction
+from django.utils import timezone
+from apps.appointments.models import Appointment
+from .models import Notification
+from .outbox import reminder_rows
+
+OFFSET_RE = re.compile(r'^(\d+)([mhd])$')
+OFFSET_UNITS = {'m': 'minutes', 'h': 'hours', 'd': 'days'}
+
+
+def parse_offset(text):
+    """'24h' -> timedelta(hours=24); minutes, hours and days are supported."""
+    match = OFFSET_RE.match(text.strip())
+    if not match:
+        raise ValueError(f"Invalid reminder offset '{text}'; use e.g. 30m, 1h or 2d")
+    return timedelta(**{OFFSET_UNITS[match.group(2)]: int(match.group(1))})
+
+
+def format_offset(offset):
+    minutes = int(offset.total_seconds() // 60)
+    for size, unit in ((1440, 'day'), (60, 'hour'), (1, 'minute')):
+        if minutes % size == 0:
+            count = minutes // size
+            return f"{count} {unit}{'s' if count != 1 else ''}"
+
+
+def local_start(date, time_slot):
+    return timezone.make_aware(datetime.combine(date, time_slot))
+
+
+class ReminderScheduler:
+    def __init__(self, offsets, lookahead=timedelta(minutes=2), late_grace=timedelta(minutes=15),
+                 clock=timezone.now):
+        self.offsets = sorted(offsets, reverse=True)
+        self.lookahead = lookahead
+        self.late_grace = late_grace
+        self.clock = clock
+        self.heap = []
+        self.scheduled = set()
+        self.enqueued = 0
+
+    def dedupe_key(self, appointment_id, start, offset):
+        return f'reminder:{appointment_id}:{start:%Y%m%dT%H%M}:{int(offset.total_seconds() // 60)}m'
+
+    def scan(self, now):
+        """Push every reminder that falls due before now + lookahead onto the heap."""
+        local_now = timezone.localtime(now).replace(tzinfo=None)
+        for offset in self.offsets:
+            # Never look behind now: a reminder after the appointment started is no use
+            earliest = max(offset - self.late_grace, timedelta(0))
+            window = Appointment.objects.active().starting_between(
+                local_now + earliest, local_now + offset + self.lookahead,
+            ).values_list('pk', 'date', 'time_slot')
+            for pk, date, time_slot in window.iterator():
+                start = local_start(date, time_slot)
+                key = self.dedupe_key(pk, start, offset)
+                if key not in self.scheduled:
+                    self.scheduled.add(key)
+                    heapq.heappush(self.heap, (start - offset, key, pk, start, offset))
+
+    def pop_due(self, now):
+        due = []
+        while self.heap and self.heap[0][0] <= now:
+            entry = heapq.heappop(self.heap)
+            self.scheduled.discard(entry[1])
+            due.append(entry)
+        return due
+
+    def enqueue(self, due):
+        """Queue the due reminders whose appointment is still active and still starts when planned."""
+        if not due:
+            return 0
+        current = Appointment.objects.active().select_related('client', 'provider', 'service').in_bulk(
+            {pk for _, _, pk, _, _ in due}
+        )
+        rows = []
+        for _, key, pk, start, offset in due:
+            appointment = current.get(pk)
+            if appointment is None or local_start(appointment.date, appointment.time_slot) != start:
+                continue
+            rows += reminder_rows(appointment, format_offset(offset), key)
+        # Skip what another scheduler (or this one before a restart) already queued;
+        # the unique dedupe key settles any race that gets past this check
+        existing = set(Notification.objects.filter(
+            dedupe_key__in=[row.dedupe_key for row in rows]
+        ).values_list('dedupe_key', flat=True))
+        rows = [row for row in rows if row.dedupe_key not in existing]
+        with transaction.atomic():
+            Notification.objects.bulk_create(rows, ignore_conflicts=True)
+        return len(rows)
+
+    def tick(self):
+        now = self.clock()
+        self.scan(now)
+        queued = self.enqueue(self.pop_due(now))
+        self.enqueued += queued
+        return queued
@@ -1,3 +1,155 @@
-from django.test import TestCase
+from datetime import date, datetime, time, timedelta
+from unittest import mock
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.appointments.models import Appointment
+from apps.services.models import Service
+from apps.users.models import User
+from .channels import Channel
+from .models import Notification
+from .reminders import ReminderScheduler, parse_offset
+from .worker import Worker, claim
 
-# Create your tests here.
+
+class NotificationOutboxTests(TestCase):
+    def setUp(self):
+        self.client_user = User.objects.create_user(email='client@example.com', password=None)
+        self.provider = User.objects.create_user(email='doc@example.com', password=None, role='PROVIDER')
+        self.service = Service.objects.create(provider=self.provider, name='Checkup', duration=30, price='80.00')
+        self.api = APIClient()
+        self.api.force_authenticate(self.client_user)
+        self.day = (date.today() + timedelta(days=3)).isoformat()
+
+    def book(self, slot=time(9)):
+        return self.api.post('/api/appointments/', {
+            'service': self.service.pk, 'date': self.day, 'time_slot': slot.isoformat(),
+        })
+
+    def test_booking_enqueues_instead_of_sending(self):
+        self.assertEqual(self.book().status_code, 201)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(
+            sorted(Notification.objects.values_list('address', flat=True)),
+            ['client@example.com', 'doc@example.com'],
+        )
+
+    def test_token_authenticated_booking_enqueues_for_both_parties(self):
+        self.client_user.set_password('password123')
+        self.client_user.save()
+        tokens = APIClient().post(
+            '/api/auth/login/', {'email': 'client@example.com', 'password': 'password123'}).json()
+        api = APIClient()
+        api.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        response = api.post('/api/appointments/', {
+            'service': self.service.pk, 'date': self.day, 'time_slot': '10:00',
+        })
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(
+            sorted(Notification.objects.filter(event='appointment.created').values_list('recipient_id', flat=True)),
+            sorted([self.client_user.pk, self.provider.pk]),
+        )
+
+    def test_rejected_booking_enqueues_nothing(self):
+        self.book()
+        Notification.objects.all().delete()
+        self.assertEqual(self.book().status_code, 400)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_status_change_enqueues(self):
+        appointment_id = self.book().json()['id']
+        self.api.force_authenticate(self.provider)
+        self.api.patch(f'/api/appointments/{appointment_id}/', {'notes': 'bring results'})
+        self.assertEqual(Notification.objects.count(), 2)
+        self.api.patch(f'/api/appointments/{appointment_id}/', {'status': 'CONFIRMED'})
+        self.assertEqual(Notification.objects.filter(event='appointment.status_changed').count(), 2)
+
+    def test_worker_delivers_email(self):
+        self.book()
+        worker = Worker('test')
+        self.assertEqual(worker.run_once(), 2)
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(Notification.objects.filter(status=Notification.Status.SENT).count(), 2)
+        self.assertEqual(worker.run_once(), 0)
+
+    def test_claims_are_exclusive(self):
+        self.book()
+        first = claim('a', 10, timedelta(seconds=60))
+        self.assertEqual(len(first), 2)
+        self.assertEqual(claim('b', 10, timedelta(seconds=60)), [])
+
+    @override_settings(NOTIFICATION_WEBHOOK_URL='http://hooks.invalid/appointments')
+    def test_failed_webhook_backs_off_then_gives_up(self):
+        self.book()
+        worker = Worker('test', max_attempts=2)
+        with mock.patch('urllib.request.urlopen', side_effect=OSError('connection refused')):
+            worker.run_once()
+            hook = Notification.objects.get(channel='webhook')
+            self.assertEqual(hook.status, Notification.Status.PENDING)
+            self.assertEqual(hook.attempts, 1)
+            self.assertGreaterEqual(hook.available_at, timezone.now() - timedelta(seconds=1))
+
+            Notification.objects.filter(pk=hook.pk).update(available_at=timezone.now())
+            worker.run_once()
+        hook.refresh_from_db()
+        self.assertEqual(hook.status, Notification.Status.FAILED)
+        self.assertIn('connection refused', hook.last_error)
+        self.assertEqual(worker.counters['retried'], 1)
+        self.assertEqual(worker.counters['failed'], 1)
+
+    def test_channels_must_implement_send(self):
+        class Incomplete(Channel):
+            pass
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+
+class ReminderSchedulerTests(TestCase):
+    def setUp(self):
+        client = User.objects.create_user(email='client@example.com', password=None)
+        provider = User.objects.create_user(email='doc@example.com', password=None, role='PROVIDER')
+        service = Service.objects.create(provider=provider, name='Checkup', duration=30, price='80.00')
+        self.now = timezone.make_aware(datetime(2030, 5, 6, 8, 0))
+        start = self.now + timedelta(hours=24, minutes=1)
+        self.appointment = Appointment.objects.create(
+            client=client, provider=provider, service=service, date=start.date(), time_slot=start.time(),
+        )
+
+    def scheduler(self):
+        return ReminderScheduler([parse_offset('24h'), parse_offset('1h')], clock=lambda: self.now)
+
+    def reminders(self):
+        return Notification.objects.filter(event='appointment.reminder')
+
+    def test_reminder_is_queued_when_due(self):
+        scheduler = self.scheduler()
+        self.assertEqual(scheduler.tick(), 0)
+        self.assertEqual(len(scheduler.heap), 1)
+        self.now += timedelta(minutes=1)
+        self.assertEqual(scheduler.tick(), 1)
+        reminder = self.reminders().get()
+        self.assertEqual(reminder.address, 'client@example.com')
+        self.assertIn('in 1 day', reminder.payload['subject'])
+
+    def test_each_reminder_is_queued_once_across_schedulers(self):
+        self.now += timedelta(minutes=1)
+        self.assertEqual(self.scheduler().tick(), 1)
+        self.assertEqual(self.scheduler().tick(), 0)
+        self.assertEqual(self.reminders().count(), 1)
+
+    def test_cancelled_and_rescheduled_appointments(self):
+        scheduler = self.scheduler()
+        scheduler.tick()
+        Appointment.objects.filter(pk=self.appointment.pk).update(status='CANCELLED')
+        self.now += timedelta(minutes=1)
+        self.assertEqual(scheduler.tick(), 0)
+
+        Appointment.objects.filter(pk=self.appointment.pk).update(status='CONFIRMED', time_slot=time(8, 30))
+        self.now += timedelta(minutes=29)
+        self.assertEqual(scheduler.tick(), 1)
+
+    def test_scan_runs_one_query_per_offset(self):
+        with self.assertNumQueries(2):
+            self.scheduler().scan(self.now)
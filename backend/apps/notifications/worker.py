@@ -0,0 +1,99 @@
+"""
+Outbox delivery. Workers claim batches of due rows, deliver them outside any
+transaction, and record the outcome. Any number of workers can run at once.
+
+Claiming selects due rows with FOR UPDATE SKIP LOCKED, so concurrent workers
+never wait on each other. The rows are then leased by moving them to SENDING
+with `available_at` set to the lease expiry. The lease UPDATE re-checks that
+each row is still due, which keeps claims exclusive on databases without
+SKIP LOCKED, such as SQLite. A worker that dies mid-batch just lets its lease
+expire and the rows become due again.
+"""
+import random
+import time
+import uuid
+from collections import Counter
+from datetime import timedelta
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from .channels import get_channel
+from .models import Notification
+
+
+def _due(now):
+    return Q(status__in=[Notification.Status.PENDING, Notification.Status.SENDING], available_at__lte=now)
+
+
+def claim(worker_id, batch_size, lease):
+    now = timezone.now()
+    token = f'{worker_id}:{uuid.uuid4().hex[:8]}'
+    with transaction.atomic():
+        candidates = Notification.objects.filter(_due(now)).order_by('available_at', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+        ids = list(candidates.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return []
+        Notification.objects.filter(_due(now), pk__in=ids).update(
+            status=Notification.Status.SENDING, locked_by=token, available_at=now + lease,
+        )
+    return list(Notification.objects.filter(pk__in=ids, locked_by=token).order_by('available_at', 'id'))
+
+
+def backoff(attempts, base, cap):
+    """Exponential backoff with full jitter: a random delay up to base * 2**(attempts - 1), capped."""
+    return random.uniform(0, min(cap, base * 2 ** (attempts - 1)))
+
+
+class Worker:
+    def __init__(self, worker_id, batch_size=50, lease=timedelta(seconds=60),
+                 max_attempts=8, backoff_base=5.0, backoff_cap=3600.0):
+        self.worker_id = worker_id
+        self.batch_size = batch_size
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.counters = Counter()
+        self.started = time.monotonic()
+
+    def run_once(self):
+        """Claim and deliver one batch; returns how many rows were claimed."""
+        batch = claim(self.worker_id, self.batch_size, self.lease)
+        self.counters['claimed'] += len(batch)
+        for notification in batch:
+            self.deliver(notification)
+        return len(batch)
+
+    def deliver(self, notification):
+        # Outcome writes are conditional on still holding the lease
+        mine = Notification.objects.filter(pk=notification.pk, locked_by=notification.locked_by)
+        attempts = notification.attempts + 1
+        try:
+            get_channel(notification.channel).send(notification)
+        except Exception as exc:
+            error = f'{type(exc).__name__}: {exc}'[:2000]
+            if attempts >= self.max_attempts:
+                mine.update(status=Notification.Status.FAILED, attempts=attempts, last_error=error, locked_by='')
+                self.counters['failed'] += 1
+            else:
+                delay = backoff(attempts, self.backoff_base, self.backoff_cap)
+                mine.update(
+                    status=Notification.Status.PENDING, attempts=attempts, last_error=error, locked_by='',
+                    available_at=timezone.now() + timedelta(seconds=delay),
+                )
+                self.counters['retried'] += 1
+            self.counters[f'{notification.channel}.error'] += 1
+            return
+        mine.update(status=Notification.Status.SENT, attempts=attempts, sent_at=timezone.now(), locked_by='')
+        self.counters['sent'] += 1
+        self.counters[f'{notification.channel}.sent'] += 1
+
+    def stats(self):
+        elapsed = time.monotonic() - self.started
+        return {
+            **self.counters,
+            'elapsed_s': round(elapsed, 1),
+            'sent_per_s': round(self.counters['sent'] / elapsed, 1) if elapsed else 0.0,
+        }
@@ -1,14 +1,23 @@
 from django.contrib import admin
+from apps.core.admin import AutocompleteFilter, LargeTableAdminMixin
 from .models import Service, Availability
 
 @admin.register(Service)
-class ServiceAdmin(admin.ModelAdmin):
+class ServiceAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('name', 'provider', 'price', 'duration', 'is_active')
-    list_filter = ('is_active', 'provider')
-    search_fields = ('name', 'provider__email', 'provider__last_name')
+    list_filter = ('is_active', ('provider', AutocompleteFilter))
+    list_select_related = ('provider',)
+    # Prefix matches rather than substring scans over the joined provider
+    search_fields = ('^name', '^provider__email', '^provider__last_name')
+    search_help_text = 'The start of the service name, or of the provider email or last name.'
+    raw_id_fields = ('provider',)
 
 @admin.register(Availability)
-class AvailabilityAdmin(admin.ModelAdmin):
+class AvailabilityAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ('provider', 'day_of_week', 'start_time', 'end_time', 'is_active')
-    list_filter = ('day_of_week', 'provider')
+    list_filter = ('day_of_week', ('provider', AutocompleteFilter))
+    list_select_related = ('provider',)
+    search_fields = ('^provider__email', '^provider__last_name')
+    search_help_text = 'The start of the provider email or last name.'
+    raw_id_fields = ('provider',)
 
@@ -0,0 +1,74 @@
+import random
+import statistics
+import time as timer
+from datetime import time, timedelta
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from apps.appointments.models import Appointment
+from apps.core.benchmarks import test_database, percentile
+from apps.services.models import Service, Availability
+from apps.services.slots import free_slots
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Benchmark free-slot computation for a busy provider on a throwaway test database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=90)
+        parser.add_argument('--per-day', type=int, default=12, help='Booked appointments per working day')
+        parser.add_argument('--runs', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        with test_database():
+            self.run(options)
+
+    def run(self, options):
+        rng = random.Random(options['seed'])
+        provider = User.objects.create_user(email='bench.provider@example.com', password=None, role='PROVIDER')
+        client = User.objects.create_user(email='bench.client@example.com', password=None)
+        services = Service.objects.bulk_create([
+            Service(provider=provider, name=f'Service {minutes}', duration=minutes, price='100.00')
+            for minutes in (15, 20, 30, 45, 60)
+        ])
+        Availability.objects.bulk_create([
+            Availability(provider=provider, day_of_week=day, start_time=time(8), end_time=time(18))
+            for day in range(6)
+        ])
+
+        start = timezone.localdate() + timedelta(days=1)
+        end = start + timedelta(days=options['days'] - 1)
+        appointments = []
+        day = start
+        while day <= end:
+            if day.weekday() < 6:
+                for minute in rng.sample(range(8 * 60, 17 * 60, 15), options['per_day']):
+                    appointments.append(Appointment(
+                        client=client, provider=provider, service=rng.choice(services),
+                        date=day, time_slot=time(minute // 60, minute % 60),
+                        status=rng.choice(('PENDING', 'CONFIRMED', 'CONFIRMED', 'CANCELLED')),
+                    ))
+            day += timedelta(days=1)
+        Appointment.objects.bulk_create(appointments, batch_size=1000)
+
+        service = services[2]
+        with CaptureQueriesContext(connection) as queries:
+            days = free_slots(provider.id, service.duration, start, end)
+        timings = []
+        for _ in range(options['runs']):
+            began = timer.perf_counter()
+            free_slots(provider.id, service.duration, start, end)
+            timings.append((timer.perf_counter() - began) * 1000)
+        timings.sort()
+
+        self.stdout.write(f'Range: {options["days"]} days, {len(appointments)} appointments, {service.duration}-minute service')
+        self.stdout.write(f'Queries per computation: {len(queries)}')
+        self.stdout.write(f'Free slots found: {sum(len(times) for _, times in days)} across {len(days)} days')
+        self.stdout.write(self.style.SUCCESS(
+            f'median {statistics.median(timings):.2f} ms, '
+            f'p95 {percentile(timings, 95):.2f} ms, '
+            f'max {timings[-1]:.2f} ms over {options["runs"]} runs'
+        ))
@@ -11,6 +11,12 @@ class Service(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Public catalog reads only ever look at active services
+            models.Index(fields=['provider'], condition=models.Q(is_active=True), name='service_active_provider_idx'),
+        ]
+
     def __str__(self):
         return f"{self.name} - {self.provider.email}"
 
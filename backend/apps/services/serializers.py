@@ -1,5 +1,8 @@
+from datetime import time, timedelta
+from django.utils import timezone
 from rest_framework import serializers
 from .models import Service, Availability
+from .slots import MAX_RANGE_DAYS
 
 class ServiceSerializer(serializers.ModelSerializer):
     class Meta:
@@ -14,3 +17,47 @@ class AvailabilitySerializer(serializers.ModelSerializer):
         model = Availability
         fields = '__all__'
         read_only_fields = ('provider',)
+
+class WeeklyBlockSerializer(serializers.Serializer):
+    day_of_week = serializers.ChoiceField(choices=Availability.DAYS_OF_WEEK)
+    start_time = serializers.TimeField()
+    end_time = serializers.TimeField()
+    is_active = serializers.BooleanField(default=True)
+
+    def validate(self, data):
+        # An end time of 00:00 means the block runs until midnight
+        if data['end_time'] != time(0) and data['end_time'] <= data['start_time']:
+            raise serializers.ValidationError({'end_time': 'End time must be after start time.'})
+        return data
+
+class WeeklyTemplateSerializer(serializers.Serializer):
+    """A provider's whole weekly schedule; blocks on the same day must not overlap."""
+    blocks = WeeklyBlockSerializer(many=True, max_length=7 * 48)
+
+    def validate_blocks(self, blocks):
+        def minutes(value):
+            return value.hour * 60 + value.minute
+
+        spans = sorted(
+            (b['day_of_week'], minutes(b['start_time']), minutes(b['end_time']) or 24 * 60) for b in blocks
+        )
+        for (day, _, end), (next_day, next_start, _) in zip(spans, spans[1:]):
+            if day == next_day and next_start < end:
+                raise serializers.ValidationError(
+                    f'Blocks on {dict(Availability.DAYS_OF_WEEK)[day]} overlap.'
+                )
+        return blocks
+
+class SlotQuerySerializer(serializers.Serializer):
+    service = serializers.PrimaryKeyRelatedField(queryset=Service.objects.filter(is_active=True))
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, data):
+        start = data.setdefault('start', timezone.localdate())
+        end = data.setdefault('end', start + timedelta(days=13))
+        if end < start:
+            raise serializers.ValidationError({'end': 'End date must not be before start date.'})
+        if (end - start).days >= MAX_RANGE_DAYS:
+            raise serializers.ValidationError({'end': f'Date range is limited to {MAX_RANGE_DAYS} days.'})
+        return data
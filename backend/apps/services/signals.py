@@ -0,0 +1,17 @@
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+from apps.core.cache import bump
+from .models import Service
+
+
+@receiver(post_init, sender=Service)
+def remember_provider(sender, instance, **kwargs):
+    instance._loaded_provider_id = instance.provider_id
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def invalidate_service_lists(sender, instance, **kwargs):
+    providers = {instance._loaded_provider_id, instance.provider_id} - {None}
+    bump('services:all', *(f'services:provider:{pk}' for pk in providers))
+    instance._loaded_provider_id = instance.provider_id
@@ -0,0 +1,115 @@
+from datetime import time, timedelta
+from django.utils import timezone
+from apps.appointments.models import Appointment
+from .models import Availability
+
+# Each day is held as an integer bitmap where bit N covers minutes
+# [N * SLOT_GRANULARITY, (N + 1) * SLOT_GRANULARITY). Overlap checks then become
+# a shift and a mask instead of comparing every appointment with every slot.
+SLOT_GRANULARITY = 5
+UNITS_PER_DAY = 24 * 60 // SLOT_GRANULARITY
+MAX_RANGE_DAYS = 92
+
+
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def _to_unit(minutes, round_up=False):
+    if round_up:
+        return -(-minutes // SLOT_GRANULARITY)
+    return minutes // SLOT_GRANULARITY
+
+
+def _from_unit(unit):
+    minutes = unit * SLOT_GRANULARITY
+    return time(minutes // 60, minutes % 60)
+
+
+def _span_mask(start, end):
+    if end <= start:
+        return 0
+    return ((1 << (end - start)) - 1) << start
+
+
+def weekly_template(provider_id):
+    """Return the provider's active availability blocks as unit ranges per weekday."""
+    blocks = [[] for _ in range(7)]
+    rows = Availability.objects.filter(provider_id=provider_id, is_active=True).values_list(
+        'day_of_week', 'start_time', 'end_time'
+    )
+    for day, start_time, end_time in rows:
+        # An end time of 00:00 means the block runs until midnight
+        end = _to_unit(_minutes(end_time)) if end_time != time(0) else UNITS_PER_DAY
+        blocks[day].append((_to_unit(_minutes(start_time), round_up=True), end))
+    for day_blocks in blocks:
+        day_blocks.sort()
+    return blocks
+
+
+def busy_masks(provider_id, start_date, end_date):
+    """
+    Return {date: bitmap} of the units held by active appointments in the range,
+    including the early units of days that an appointment runs into past midnight.
+    """
+    masks = {}
+    rows = (
+        Appointment.objects.active()
+        .filter(provider_id=provider_id, date__range=(start_date - timedelta(days=1), end_date))
+        .values_list('date', 'time_slot', 'service__duration')
+    )
+    for day, time_slot, duration in rows:
+        start = _to_unit(_minutes(time_slot))
+        end = _to_unit(_minutes(time_slot) + duration, round_up=True)
+        while end > 0 and day <= end_date:
+            if day >= start_date:
+                masks[day] = masks.get(day, 0) | _span_mask(start, min(end, UNITS_PER_DAY))
+            day, start, end = day + timedelta(days=1), 0, end - UNITS_PER_DAY
+    return masks
+
+
+def free_slots(provider_id, duration, start_date, end_date, now=None):
+    """
+    Expand the provider's weekly availability over [start_date, end_date] and return
+    the bookable start times for a service of `duration` minutes as
+    [(date, [time, ...]), ...]. Runs two queries regardless of the range length.
+    """
+    now = timezone.localtime(now) if now else timezone.localtime()
+    today, now_unit = now.date(), _to_unit(_minutes(now.time()))
+    width = _to_unit(duration, round_up=True)
+    window = (1 << width) - 1
+
+    template = weekly_template(provider_id)
+    if not any(template):
+        return []
+    busy = busy_masks(provider_id, start_date, end_date)
+
+    result = []
+    day = max(start_date, today)
+    while day <= end_date:
+        blocks = template[day.weekday()]
+        taken = busy.get(day, 0)
+        times = []
+        for block_start, block_end in blocks:
+            unit = block_start
+            while unit + width <= block_end:
+                if (taken >> unit) & window == 0 and (day != today or unit > now_unit):
+                    times.append(_from_unit(unit))
+                unit += width
+        if times:
+            result.append((day, sorted(set(times)) if len(blocks) > 1 else times))
+        day += timedelta(days=1)
+    return result
+
+
+def unavailable_dates(provider_id, dates, start_time, duration):
+    """
+    Return the dates on which [start_time, start_time + duration) does not fit
+    inside one of the provider's active availability blocks. One query for any
+    number of dates.
+    """
+    template = weekly_template(provider_id)
+    start = _to_unit(_minutes(start_time))
+    end = _to_unit(_minutes(start_time) + duration, round_up=True)
+    fits = [any(b_start <= start and end <= b_end for b_start, b_end in blocks) for blocks in template]
+    return [day for day in dates if not fits[day.weekday()]]
@@ -1,3 +1,124 @@
-from django.test import TestCase
+from datetime import date, datetime, time, timedelta
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.appointments.models import Appointment
+from apps.users.models import User
+from .models import Availability, Service
+from .slots import MAX_RANGE_DAYS, free_slots
+
+
+class WeeklyTemplateTests(TestCase):
+    def setUp(self):
+        self.provider = User.objects.create_user(email='doc@example.com', password=None, role='PROVIDER')
+        self.api = APIClient()
+        self.api.force_authenticate(self.provider)
+
+    def put(self, *blocks):
+        return self.api.put('/api/availability/weekly/', {'blocks': [
+            {'day_of_week': day, 'start_time': start, 'end_time': end} for day, start, end in blocks
+        ]}, format='json')
+
+    def test_template_is_diffed_against_stored_rows(self):
+        Availability.objects.create(provider=self.provider, day_of_week=0, start_time=time(9), end_time=time(12))
+        Availability.objects.create(provider=self.provider, day_of_week=0, start_time=time(13), end_time=time(17))
+        kept = Availability.objects.create(provider=self.provider, day_of_week=1, start_time=time(9), end_time=time(17))
+
+        # Lock, delete, bulk update, bulk insert, then the listing (plus the savepoint pair)
+        with self.assertNumQueries(7):
+            response = self.put((0, '09:00', '13:00'), (1, '09:00', '17:00'), (2, '10:00', '00:00'))
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body['created'], body['updated'], body['deleted']), (1, 1, 1))
+        self.assertEqual(
+            [(b['day_of_week'], b['start_time'], b['end_time']) for b in body['blocks']],
+            [(0, '09:00:00', '13:00:00'), (1, '09:00:00', '17:00:00'), (2, '10:00:00', '00:00:00')],
+        )
+        self.assertTrue(Availability.objects.filter(pk=kept.pk).exists())
+
+    def test_overlapping_blocks_are_rejected(self):
+        response = self.put((0, '09:00', '12:00'), (0, '11:30', '15:00'))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('overlap', str(response.json()))
+        self.assertEqual(self.put((0, '12:00', '09:00')).status_code, 400)
+        self.assertFalse(Availability.objects.exists())
+
+
+class FreeSlotsTests(TestCase):
+    def setUp(self):
+        self.provider = User.objects.create_user(email='doc@example.com', password=None, role='PROVIDER')
+        self.client_user = User.objects.create_user(email='client@example.com', password=None)
+        self.service = Service.objects.create(provider=self.provider, name='Consultation', duration=60, price='90.00')
+        self.short = Service.objects.create(provider=self.provider, name='Follow-up', duration=30, price='40.00')
+        # A block that ends half way through a one-hour service
+        Availability.objects.create(provider=self.provider, day_of_week=0, start_time=time(9), end_time=time(12, 30))
+        Availability.objects.create(provider=self.provider, day_of_week=1, start_time=time(0), end_time=time(2))
+        self.monday = date.today() + timedelta(days=7 - date.today().weekday())
+
+    def slots(self, start=None, end=None, now=None):
+        start = start or self.monday
+        return {day: [t.strftime('%H:%M') for t in times]
+                for day, times in free_slots(self.provider.pk, 60, start, end or start, now=now)}
+
+    def book(self, day, time_slot, service=None, status='PENDING'):
+        Appointment.objects.create(client=self.client_user, provider=self.provider, service=service or self.service,
+                                   date=day, time_slot=time_slot, status=status)
+
+    def test_slots_stop_before_the_end_of_the_window(self):
+        self.assertEqual(self.slots(), {self.monday: ['09:00', '10:00', '11:00']})
+
+    def test_booked_and_overlapping_slots_are_excluded(self):
+        self.book(self.monday, time(10))
+        self.book(self.monday, time(11, 30), service=self.short)
+        self.book(self.monday, time(9), status='CANCELLED')
+        self.assertEqual(self.slots(), {self.monday: ['09:00']})
+
+    def test_appointments_past_midnight_block_the_next_morning(self):
+        tuesday = self.monday + timedelta(days=1)
+        self.assertEqual(self.slots(tuesday), {tuesday: ['00:00', '01:00']})
+        self.book(self.monday, time(23, 30))
+        self.assertEqual(self.slots(tuesday), {tuesday: ['01:00']})
+
+    def test_past_days_and_times_are_cut_off(self):
+        now = timezone.make_aware(datetime.combine(self.monday, time(9, 30)))
+        self.assertEqual(self.slots(self.monday - timedelta(days=7), self.monday, now=now),
+                         {self.monday: ['10:00', '11:00']})
+
+    def test_range_is_limited_to_the_horizon(self):
+        url = '/api/availability/slots/'
+        last = self.monday + timedelta(days=MAX_RANGE_DAYS - 1)
+        params = {'service': self.service.pk, 'start': self.monday.isoformat()}
+        response = self.client.get(url, {**params, 'end': last.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['slots']), len(self.slots(self.monday, last)))
+        response = self.client.get(url, {**params, 'end': (last + timedelta(days=1)).isoformat()})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(str(MAX_RANGE_DAYS), str(response.json()))
+
+
+@override_settings(STORAGES={
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+})
+class CatalogAdminTests(TestCase):
+    def setUp(self):
+        self.client.force_login(User.objects.create_superuser(email='admin@example.com', password='password123'))
+        for i, name in enumerate(('Checkup', 'Annual checkup')):
+            provider = User.objects.create_user(email=f'doc{i}@example.com', password=None, role='PROVIDER',
+                                                last_name=f'Lee{i}')
+            Service.objects.create(provider=provider, name=name, duration=30, price='80.00')
+            Availability.objects.create(provider=provider, day_of_week=i, start_time=time(9), end_time=time(17))
+
+    def search(self, model, term):
+        response = self.client.get(f'/admin/services/{model}/', {'q': term})
+        self.assertEqual(response.status_code, 200)
+        return response.context['cl'].result_count
+
+    def test_searches_match_prefixes(self):
+        self.assertEqual(self.search('service', 'check'), 1)
+        self.assertEqual(self.search('service', 'annual'), 1)
+        self.assertEqual(self.search('service', 'doc'), 2)
+        self.assertEqual(self.search('availability', 'doc1@'), 1)
+        self.assertEqual(self.search('availability', 'lee'), 2)
+        self.assertEqual(self.search('availability', 'example'), 0)
 
-# Create your tests here.
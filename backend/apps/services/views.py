@@ -1,19 +1,31 @@
+from django.db import transaction
 from rest_framework import viewsets, permissions
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from apps.core.cache import PublicListCacheMixin
+from apps.core.conditional import ConditionalListMixin
 from .models import Service, Availability
-from .serializers import ServiceSerializer, AvailabilitySerializer
+from .serializers import ServiceSerializer, AvailabilitySerializer, SlotQuerySerializer, WeeklyTemplateSerializer
+from .slots import free_slots
 
 class IsProvider(permissions.BasePermission):
     def has_permission(self, request, view):
         return request.user.role == 'PROVIDER'
 
-class ServiceViewSet(viewsets.ModelViewSet):
+class ServiceViewSet(PublicListCacheMixin, ConditionalListMixin, viewsets.ModelViewSet):
     serializer_class = ServiceSerializer
+    cache_prefix = 'services'
+
+    def get_cache_scopes(self):
+        # ?provider=<id> only depends on that provider's services
+        provider_id = self.request.query_params.get('provider', '')
+        return [f'services:provider:{provider_id}'] if provider_id.isdigit() else ['services:all']
 
     def get_queryset(self):
         user = self.request.user
         # Authenticated providers only see their own services
-        if user.is_authenticated and hasattr(user, 'role') and user.role == 'PROVIDER':
-            return Service.objects.filter(provider=user)
+        if user.is_authenticated and user.role == 'PROVIDER':
+            return Service.objects.filter(provider_id=user.pk)
         # Clients / unauthenticated users see all active services
         # Optional: filter by provider via ?provider=<id>
         qs = Service.objects.filter(is_active=True)
@@ -28,14 +40,80 @@ class ServiceViewSet(viewsets.ModelViewSet):
         return [permissions.AllowAny()]
 
     def perform_create(self, serializer):
-        serializer.save(provider=self.request.user)
+        serializer.save(provider_id=self.request.user.pk)
 
 class AvailabilityViewSet(viewsets.ModelViewSet):
     serializer_class = AvailabilitySerializer
     permission_classes = [permissions.IsAuthenticated, IsProvider]
 
     def get_queryset(self):
-        return Availability.objects.filter(provider=self.request.user)
+        return Availability.objects.filter(provider_id=self.request.user.pk)
 
     def perform_create(self, serializer):
-        serializer.save(provider=self.request.user)
+        serializer.save(provider_id=self.request.user.pk)
+
+    @action(detail=False, methods=['put'])
+    def weekly(self, request):
+        """
+        PUT {"blocks": [{"day_of_week", "start_time", "end_time", "is_active"}, ...]}
+        replaces the provider's weekly schedule. Blocks are matched to stored rows
+        by (day_of_week, start_time); the diff is applied with one bulk insert,
+        one bulk update and one delete.
+        """
+        template = WeeklyTemplateSerializer(data=request.data)
+        template.is_valid(raise_exception=True)
+        provider_id = request.user.pk
+        wanted = {(b['day_of_week'], b['start_time']): b for b in template.validated_data['blocks']}
+
+        with transaction.atomic():
+            stored = {
+                (row.day_of_week, row.start_time): row
+                for row in Availability.objects.select_for_update().filter(provider_id=provider_id)
+            }
+            removed = [row.pk for key, row in stored.items() if key not in wanted]
+            changed, added = [], []
+            for key, block in wanted.items():
+                row = stored.get(key)
+                if row is None:
+                    added.append(Availability(provider_id=provider_id, **block))
+                elif (row.end_time, row.is_active) != (block['end_time'], block['is_active']):
+                    row.end_time, row.is_active = block['end_time'], block['is_active']
+                    changed.append(row)
+            if removed:
+                Availability.objects.filter(pk__in=removed).delete()
+            if changed:
+                Availability.objects.bulk_update(changed, ['end_time', 'is_active'])
+            if added:
+                Availability.objects.bulk_create(added)
+
+        # Free slots are computed from these rows on every request, so there is
+        # no derived cache to invalidate here
+        rows = self.get_queryset().order_by('day_of_week', 'start_time')
+        return Response({
+            'created': len(added),
+            'updated': len(changed),
+            'deleted': len(removed),
+            'blocks': AvailabilitySerializer(rows, many=True).data,
+        })
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.AllowAny])
+    def slots(self, request):
+        # Public: GET /api/availability/slots/?service=<id>&start=YYYY-MM-DD&end=YYYY-MM-DD
+        query = SlotQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        service = query.validated_data['service']
+        days = free_slots(
+            service.provider_id,
+            service.duration,
+            query.validated_data['start'],
+            query.validated_data['end'],
+        )
+        return Response({
+            'provider': service.provider_id,
+            'service': service.id,
+            'duration': service.duration,
+            'slots': [
+                {'date': day, 'times': [t.strftime('%H:%M:%S') for t in times]}
+                for day, times in days
+            ],
+        })
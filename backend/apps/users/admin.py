@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.translation import gettext_lazy as _
+from apps.core.admin import LargeTableAdminMixin
 from .models import User, ProviderProfile, Patient, Doctor
 
 class ProviderProfileInline(admin.StackedInline):
@@ -10,10 +11,11 @@ class ProviderProfileInline(admin.StackedInline):
     fk_name = 'user'
 
 @admin.register(Patient)
-class PatientAdmin(BaseUserAdmin):
+class PatientAdmin(LargeTableAdminMixin, BaseUserAdmin):
     ordering = ('email',)
     list_display = ("email", "first_name", "last_name", "is_active")
-    search_fields = ('email', 'first_name', 'last_name')
+    # Prefix matches; email's ordering doubles as the unique index scan
+    search_fields = ('^email', '^first_name', '^last_name')
     fieldsets = (
         (None, {'fields': ('email', 'password')}),
         (_('Personal info'), {'fields': ('first_name', 'last_name', 'phone')}),
@@ -34,10 +36,11 @@ class PatientAdmin(BaseUserAdmin):
         super().save_model(request, obj, form, change)
 
 @admin.register(Doctor)
-class DoctorAdmin(BaseUserAdmin):
+class DoctorAdmin(LargeTableAdminMixin, BaseUserAdmin):
     ordering = ('email',)
     list_display = ("email", "first_name", "last_name", "is_verified", "is_active")
-    search_fields = ('email', 'first_name', 'last_name', 'provider_profile__business_name')
+    list_select_related = ('provider_profile',)
+    search_fields = ('^email', '^first_name', '^last_name', '^provider_profile__business_name')
     inlines = (ProviderProfileInline,)
     
     fieldsets = (
@@ -56,9 +59,10 @@ class DoctorAdmin(BaseUserAdmin):
     def get_queryset(self, request):
         return super().get_queryset(request).filter(role=User.Role.PROVIDER)
     
+    @admin.display(boolean=True, ordering='provider_profile__is_verified')
     def is_verified(self, obj):
+        # provider_profile comes from list_select_related, so this doesn't query per row
         return obj.provider_profile.is_verified if hasattr(obj, 'provider_profile') else False
-    is_verified.boolean = True
     
     def save_model(self, request, obj, form, change):
         if not change:
@@ -67,11 +71,12 @@ class DoctorAdmin(BaseUserAdmin):
 
 # Standard User Admin (for Superusers/Admins)
 @admin.register(User)
-class UserAdmin(BaseUserAdmin):
+class UserAdmin(LargeTableAdminMixin, BaseUserAdmin):
     ordering = ('email',)
     list_display = ("email", "role", "is_staff", "is_superuser")
     list_filter = ("role", "is_staff", "is_superuser", "is_active")
-    search_fields = ('email', 'first_name', 'last_name')
+    # Also serves the provider/client autocomplete filters on other admins
+    search_fields = ('^email', '^first_name', '^last_name')
     inlines = (ProviderProfileInline,)
 
     fieldsets = (
@@ -0,0 +1,48 @@
+"""
+Stateless JWT authentication.
+
+Access tokens carry the user's role and profile flags as claims (see
+`add_claims`), so most requests are authorized without loading the user row.
+Views that need the full row use `request.user.db_user`, which is fetched
+once, on first access.
+
+Claims are refreshed at login and on every token refresh. A role change or
+deactivation therefore takes effect within one access-token lifetime.
+"""
+from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+
+def add_claims(token, user):
+    profile = getattr(user, 'provider_profile', None)
+    token['role'] = user.role
+    token['is_staff'] = user.is_staff
+    token['is_superuser'] = user.is_superuser
+    token['has_profile'] = profile is not None
+    token['is_verified'] = bool(profile and profile.is_verified)
+    return token
+
+
+class ClaimsUser(TokenUser):
+    @cached_property
+    def id(self):
+        # simplejwt stores the claim as a string; views compare and save it as the model's pk
+        return get_user_model()._meta.pk.to_python(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def db_user(self):
+        return get_user_model().objects.get(pk=self.id)
+
+    @cached_property
+    def role(self):
+        # Tokens issued before role became a claim fall back to the database
+        return self.token.get('role') or self.db_user.role
+
+
+class ClaimsJWTAuthentication(JWTStatelessUserAuthentication):
+    def get_user(self, validated_token):
+        super().get_user(validated_token)  # rejects tokens without a user id claim
+        return ClaimsUser(validated_token)
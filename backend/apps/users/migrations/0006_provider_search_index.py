@@ -0,0 +1,56 @@
+from django.db import migrations
+
+# The index as it was first created; later changes to apps.users.search get their own migration
+TABLE = 'users_provider_search'
+SOURCE_SQL = (
+    "FROM users_user u LEFT JOIN users_providerprofile p ON p.user_id = u.id "
+    "WHERE u.role = 'PROVIDER'"
+)
+NAME_SQL = "TRIM(COALESCE(u.first_name, '') || ' ' || COALESCE(u.last_name, ''))"
+
+
+def create_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    with schema_editor.connection.cursor() as cursor:
+        if vendor == 'postgresql':
+            cursor.execute(
+                f'CREATE TABLE {TABLE} ('
+                'user_id bigint PRIMARY KEY REFERENCES users_user(id) ON DELETE CASCADE, '
+                'document tsvector NOT NULL)'
+            )
+            cursor.execute(f'CREATE INDEX {TABLE}_document_gin ON {TABLE} USING GIN (document)')
+            cursor.execute(
+                f'INSERT INTO {TABLE} (user_id, document) SELECT u.id, '
+                f"setweight(to_tsvector('english', {NAME_SQL}), 'A') || "
+                "setweight(to_tsvector('english', COALESCE(p.specialization, '')), 'A') || "
+                "setweight(to_tsvector('english', COALESCE(p.business_name, '')), 'B') || "
+                "setweight(to_tsvector('english', COALESCE(p.bio, '')), 'C') "
+                f'{SOURCE_SQL}'
+            )
+        elif vendor == 'sqlite':
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE {TABLE} USING fts5('
+                "name, specialization, business_name, bio, tokenize='porter unicode61')"
+            )
+            cursor.execute(
+                f'INSERT INTO {TABLE} (rowid, name, specialization, business_name, bio) SELECT u.id, {NAME_SQL}, '
+                "COALESCE(p.specialization, ''), COALESCE(p.business_name, ''), COALESCE(p.bio, '') "
+                f'{SOURCE_SQL}'
+            )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('postgresql', 'sqlite'):
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 00:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_provider_rating_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='calendar_secret',
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
+from django.db.models.functions import Upper
 from django.utils.translation import gettext_lazy as _
 
 class CustomUserManager(BaseUserManager):
@@ -35,12 +36,23 @@ class User(AbstractUser):
     email = models.EmailField(_("email address"), unique=True)
     role = models.CharField(max_length=20, choices=Role.choices, default=Role.CLIENT)
     phone = models.CharField(max_length=20, blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # Part of the calendar feed URL; replacing it revokes every URL issued before
+    calendar_secret = models.CharField(max_length=32, blank=True, editable=False)
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
 
     objects = CustomUserManager()
 
+    class Meta:
+        verbose_name = _("user")
+        verbose_name_plural = _("users")
+        indexes = [
+            # Role filters paired with id ordering for keyset-paginated directories
+            models.Index(fields=['role', 'id'], name='user_role_id_idx'),
+        ]
+
     def __str__(self):
         return self.email
 
@@ -79,8 +91,34 @@ class ProviderProfile(models.Model):
     profile_image = models.ImageField(upload_to='providers/pfp/', blank=True, null=True)
     specialization = models.CharField(max_length=100, blank=True, help_text="e.g. Cardiology, Neurology")
     is_verified = models.BooleanField(default=False)
+    # Review aggregates, kept current by apps.appointments.ratings (rebuild with `rebuild_ratings`)
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Serves case-insensitive matches written as specialization__upper='CARDIOLOGY'
+            models.Index(Upper('specialization'), name='profile_spec_upper_idx'),
+        ]
+
     def __str__(self):
         return f"{self.business_name} ({self.user.email})"
+
+    @property
+    def avg_rating(self):
+        return round(self.rating_sum / self.rating_count, 2) if self.rating_count else None
+
+    @property
+    def rating_distribution(self):
+        return {stars: getattr(self, f'rating_{stars}') for stars in range(1, 6)}
+
+# Unlike __iexact (LIKE on SQLite, UPPER(col::text) on Postgres), __upper compiles to
+# UPPER("specialization") on every backend and so matches the index expression.
+ProviderProfile._meta.get_field('specialization').register_lookup(Upper)
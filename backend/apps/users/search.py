@@ -0,0 +1,130 @@
+"""
+Full-text search over providers: name, specialization, business name and bio.
+
+The index lives in its own table, maintained incrementally from signals:
+- PostgreSQL: a weighted tsvector per provider with a GIN index, ranked by ts_rank_cd.
+- SQLite: an FTS5 virtual table (porter stemming), ranked by bm25.
+Other backends fall back to an unranked icontains query.
+"""
+import re
+from django.db import connection
+from django.db.models import Q
+from .models import User
+
+TABLE = 'users_provider_search'
+MIN_TOKEN_LENGTH = 3
+# Ignored in free-text queries, where they would otherwise prefix-match nearly everything
+STOPWORDS = frozenset((
+    'and', 'any', 'are', 'can', 'doc', 'doctor', 'doctors', 'for', 'find', 'have', 'hello', 'help',
+    'how', 'looking', 'need', 'near', 'please', 'see', 'some', 'the', 'there', 'want', 'who', 'with', 'you',
+))
+TOKEN_RE = re.compile(r'[^\W_]+')
+
+SOURCE_SQL = (
+    "FROM users_user u LEFT JOIN users_providerprofile p ON p.user_id = u.id "
+    "WHERE u.role = 'PROVIDER'"
+)
+NAME_SQL = "TRIM(COALESCE(u.first_name, '') || ' ' || COALESCE(u.last_name, ''))"
+
+
+def _vendor(conn=None):
+    return (conn or connection).vendor
+
+
+def _upsert(cursor, vendor, where='', params=()):
+    """Write index rows for every provider matched by `where`, in one INSERT ... SELECT."""
+    if vendor == 'postgresql':
+        cursor.execute(
+            f'INSERT INTO {TABLE} (user_id, document) SELECT u.id, '
+            f"setweight(to_tsvector('english', {NAME_SQL}), 'A') || "
+            "setweight(to_tsvector('english', COALESCE(p.specialization, '')), 'A') || "
+            "setweight(to_tsvector('english', COALESCE(p.business_name, '')), 'B') || "
+            "setweight(to_tsvector('english', COALESCE(p.bio, '')), 'C') "
+            f'{SOURCE_SQL}{where} ON CONFLICT (user_id) DO UPDATE SET document = EXCLUDED.document',
+            params,
+        )
+    else:
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, name, specialization, business_name, bio) SELECT u.id, {NAME_SQL}, '
+            "COALESCE(p.specialization, ''), COALESCE(p.business_name, ''), COALESCE(p.bio, '') "
+            f'{SOURCE_SQL}{where}',
+            params,
+        )
+
+
+def rebuild_index(conn=None):
+    conn = conn or connection
+    vendor = _vendor(conn)
+    if vendor not in ('postgresql', 'sqlite'):
+        return
+    with conn.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+        _upsert(cursor, vendor)
+
+
+def index_provider(user_id):
+    """Re-index one user; users who are not providers simply drop out of the index."""
+    vendor = _vendor()
+    if vendor not in ('postgresql', 'sqlite'):
+        return
+    remove_provider(user_id)
+    with connection.cursor() as cursor:
+        _upsert(cursor, vendor, ' AND u.id = %s', [user_id])
+
+
+def remove_provider(user_id):
+    vendor = _vendor()
+    with connection.cursor() as cursor:
+        if vendor == 'postgresql':
+            cursor.execute(f'DELETE FROM {TABLE} WHERE user_id = %s', [user_id])
+        elif vendor == 'sqlite':
+            cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [user_id])
+
+
+def _tokens(query, free_text):
+    tokens = [t.lower() for t in TOKEN_RE.findall(query)]
+    if free_text:
+        tokens = [t for t in tokens if len(t) >= MIN_TOKEN_LENGTH and t not in STOPWORDS]
+    return tokens[:10]
+
+
+def search_providers(query, limit=20, free_text=False):
+    """
+    Return [(user_id, rank), ...] best first. By default every term must match;
+    with free_text=True (chat messages) any term may match and filler words are dropped.
+    """
+    tokens = _tokens(query, free_text)
+    if not tokens:
+        return []
+    vendor = _vendor()
+    with connection.cursor() as cursor:
+        if vendor == 'postgresql':
+            # Prefix-match each term so partial input ("cardio") still finds results
+            terms = [f"{t}:*" for t in tokens]
+            cursor.execute(
+                f'SELECT user_id, ts_rank_cd(document, q) AS rank '
+                f"FROM {TABLE}, to_tsquery('english', %s) q WHERE document @@ q "
+                'ORDER BY rank DESC, user_id LIMIT %s',
+                [(' | ' if free_text else ' & ').join(terms), limit],
+            )
+            return cursor.fetchall()
+        if vendor == 'sqlite':
+            terms = [f'"{t}"*' if len(t) >= MIN_TOKEN_LENGTH else f'"{t}"' for t in tokens]
+            cursor.execute(
+                f'SELECT rowid, -bm25({TABLE}, 10.0, 10.0, 4.0, 1.0) AS rank '
+                f'FROM {TABLE} WHERE {TABLE} MATCH %s ORDER BY rank DESC, rowid LIMIT %s',
+                [(' OR ' if free_text else ' ').join(terms), limit],
+            )
+            return cursor.fetchall()
+
+    condition = Q()
+    for token in tokens:
+        term = (
+            Q(first_name__icontains=token) | Q(last_name__icontains=token)
+            | Q(provider_profile__specialization__icontains=token)
+            | Q(provider_profile__business_name__icontains=token)
+            | Q(provider_profile__bio__icontains=token)
+        )
+        condition = (condition | term) if free_text else (condition & term)
+    ids = User.objects.filter(condition, role='PROVIDER').values_list('id', flat=True)[:limit]
+    return [(pk, 0.0) for pk in ids]
@@ -9,11 +9,29 @@ class ProviderProfileSerializer(serializers.ModelSerializer):
 
 class UserSerializer(serializers.ModelSerializer):
     provider_profile = ProviderProfileSerializer(read_only=True)
+    avg_rating = serializers.FloatField(source='provider_profile.avg_rating', default=None, read_only=True)
+    review_count = serializers.IntegerField(source='provider_profile.rating_count', default=0, read_only=True)
 
     class Meta:
         model = User
-        fields = ("id", "email", "role", "phone", "first_name", "last_name", "provider_profile")
-        read_only_fields = ("id", "email", "role") 
+        fields = ("id", "email", "role", "phone", "first_name", "last_name", "provider_profile",
+                  "avg_rating", "review_count")
+        read_only_fields = ("id", "email", "role")
+
+class ProviderSummarySerializer(serializers.ModelSerializer):
+    """Flat, lean representation for directory listings."""
+    business_name = serializers.CharField(source='provider_profile.business_name', default='')
+    specialization = serializers.CharField(source='provider_profile.specialization', default='')
+    profile_image = serializers.ImageField(source='provider_profile.profile_image', default=None)
+    is_verified = serializers.BooleanField(source='provider_profile.is_verified', default=False)
+    avg_rating = serializers.FloatField(source='provider_profile.avg_rating', default=None)
+    review_count = serializers.IntegerField(source='provider_profile.rating_count', default=0)
+
+    class Meta:
+        model = User
+        fields = ("id", "first_name", "last_name", "business_name", "specialization", "profile_image", "is_verified",
+                  "avg_rating", "review_count")
+        read_only_fields = fields
 
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
@@ -0,0 +1,61 @@
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+from apps.core.cache import bump
+from .models import User, Doctor, Patient, ProviderProfile
+from . import search
+
+# Saves that only touch these fields can't change anything a provider listing shows
+UNLISTED_FIELDS = frozenset(('last_login', 'password'))
+
+
+# Proxy models send signals under their own class, so admin edits need explicit receivers
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Doctor)
+@receiver(post_save, sender=Patient)
+def index_user(sender, instance, created, update_fields=None, **kwargs):
+    # Login only touches last_login; skip anything that can't change the search document
+    if update_fields and not {'first_name', 'last_name', 'role'} & set(update_fields):
+        return
+    if instance.role == User.Role.PROVIDER or not created:
+        search.index_provider(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Doctor)
+@receiver(post_delete, sender=Patient)
+def unindex_user(sender, instance, **kwargs):
+    search.remove_provider(instance.pk)
+
+
+@receiver(post_save, sender=ProviderProfile)
+@receiver(post_delete, sender=ProviderProfile)
+def index_profile(sender, instance, **kwargs):
+    search.index_provider(instance.user_id)
+
+
+@receiver(post_init, sender=User)
+@receiver(post_init, sender=Doctor)
+@receiver(post_init, sender=Patient)
+def remember_role(sender, instance, **kwargs):
+    instance._loaded_role = instance.role
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Doctor)
+@receiver(post_save, sender=Patient)
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Doctor)
+@receiver(post_delete, sender=Patient)
+def invalidate_provider_list_for_user(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= UNLISTED_FIELDS:
+        return
+    # Also covers a user whose role was changed away from PROVIDER
+    if User.Role.PROVIDER in (instance.role, instance._loaded_role):
+        bump('providers')
+    instance._loaded_role = instance.role
+
+
+@receiver(post_save, sender=ProviderProfile)
+@receiver(post_delete, sender=ProviderProfile)
+def invalidate_provider_list_for_profile(sender, instance, **kwargs):
+    bump('providers')
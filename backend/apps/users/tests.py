@@ -1,3 +1,142 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from unittest import mock
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from apps.appointments.models import Appointment, Review
+from apps.services.models import Service
+from .models import User, ProviderProfile
 
-# Create your tests here.
+
+class ClaimsAuthenticationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='doc@example.com', password='password123', role='PROVIDER')
+        ProviderProfile.objects.create(user=self.user, business_name='Clinic')
+        self.api = APIClient()
+
+    def login(self):
+        tokens = self.api.post('/api/auth/login/', {'email': 'doc@example.com', 'password': 'password123'}).json()
+        self.api.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        return tokens
+
+    def test_authenticated_request_does_not_load_the_user(self):
+        self.login()
+        with self.assertNumQueries(1):
+            response = self.api.get('/api/availability/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_me_loads_the_full_user(self):
+        self.login()
+        response = self.api.get('/api/auth/me/')
+        self.assertEqual(response.json()['email'], 'doc@example.com')
+
+    def test_refresh_picks_up_role_changes(self):
+        tokens = self.login()
+        self.user.role = User.Role.CLIENT
+        self.user.save()
+        self.assertEqual(self.api.get('/api/availability/').status_code, 200)
+
+        access = self.api.post('/api/auth/refresh/', {'refresh': tokens['refresh']}).json()['access']
+        self.api.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(self.api.get('/api/availability/').status_code, 403)
+
+    def test_token_user_pk_matches_the_model_pk(self):
+        patient = User.objects.create_user(email='patient@example.com', password='password123')
+        service = Service.objects.create(provider=self.user, name='Checkup', duration=30, price='80.00')
+        tokens = self.api.post('/api/auth/login/', {'email': 'patient@example.com', 'password': 'password123'}).json()
+        self.api.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+
+        day = date.today() + timedelta(days=3)
+        response = self.api.post('/api/appointments/', {
+            'service': service.pk, 'date': day.isoformat(), 'time_slot': '09:00',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        appointment = Appointment.objects.get(pk=response.json()['id'])
+        self.assertEqual((appointment.client_id, appointment.provider_id), (patient.pk, self.user.pk))
+
+        Appointment.objects.filter(pk=appointment.pk).update(status='COMPLETED')
+        response = self.api.post('/api/reviews/', {'appointment': appointment.pk, 'rating': 4}, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(Review.objects.get().provider_id, self.user.pk)
+
+
+class ProviderDirectoryPaginationTests(TestCase):
+    def setUp(self):
+        User.objects.bulk_create([
+            User(email=f'doc{i}@example.com', role='PROVIDER', last_name=f'Doc {i}') for i in range(210)
+        ])
+
+    def ids(self, response):
+        return [provider['id'] for provider in response.json()['results']]
+
+    def test_cursor_pages_neither_repeat_nor_skip_after_inserts(self):
+        first = self.client.get('/api/auth/providers/', {'page_size': 100, 'view': 'slim'}).json()
+        # A provider signing up between page loads doesn't shift the next page
+        User.objects.create_user(email='new@example.com', password=None, role='PROVIDER')
+        seen = [provider['id'] for provider in first['results']]
+        url = first['next']
+        while url:
+            page = self.client.get(url).json()
+            seen += [provider['id'] for provider in page['results']]
+            url = page['next']
+        self.assertEqual(seen, sorted(User.objects.values_list('id', flat=True)))
+        self.assertIsNone(first['previous'])
+
+    def test_page_size_is_bounded(self):
+        for page_size, expected in ((1000, 200), (5, 5), (0, 50), (-1, 50), ('all', 50)):
+            response = self.client.get('/api/auth/providers/', {'page_size': page_size})
+            self.assertEqual(len(self.ids(response)), expected, page_size)
+
+
+class ProviderSearchTests(TestCase):
+    def setUp(self):
+        for index, (first, specialization, bio) in enumerate((
+            ('Ada', 'Cardiology', 'Heart rhythm clinic'),
+            ('Ben', 'Dermatology', 'Sees cardiology referrals on Fridays'),
+            ('Cy', 'Pediatrics', 'Children and teenagers'),
+        )):
+            user = User.objects.create_user(
+                email=f'doc{index}@example.com', password='password123', role='PROVIDER', first_name=first,
+            )
+            ProviderProfile.objects.create(user=user, business_name=f'{first} Clinic',
+                                           specialization=specialization, bio=bio)
+
+    def search(self, **params):
+        response = self.client.get('/api/auth/providers/search/', params)
+        self.assertEqual(response.status_code, 200)
+        return [provider['first_name'] for provider in response.json()]
+
+    def test_specialization_outranks_bio(self):
+        self.assertEqual(self.search(q='cardio'), ['Ada', 'Ben'])
+        self.assertEqual(self.search(q='cardio heart'), ['Ada'])
+        self.assertEqual(self.search(q=''), [])
+
+    def test_limit_is_clamped(self):
+        self.assertEqual(self.search(q='clinic', limit=1), ['Ada'])
+        self.assertEqual(len(self.search(q='clinic', limit=-1)), 1)
+        self.assertEqual(len(self.search(q='clinic', limit=0)), 1)
+        self.assertEqual(len(self.search(q='clinic', limit='ten')), 3)
+        self.assertEqual(len(self.search(q='clinic', limit=10 ** 6)), 3)
+
+    def test_other_databases_fall_back_to_icontains(self):
+        with mock.patch('apps.users.search._vendor', return_value='mysql'):
+            self.assertEqual(self.search(q='cardio'), ['Ada', 'Ben'])
+            self.assertEqual(self.search(q='cardio heart'), ['Ada'])
+            self.assertEqual(self.search(q='clinic', limit=-5), ['Ada'])
+
+
+@override_settings(STORAGES={
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+})
+class DoctorAdminTests(TestCase):
+    def test_verified_column_does_not_query_per_row(self):
+        self.client.force_login(User.objects.create_superuser(email='admin@example.com', password='password123'))
+        for i in range(10):
+            doctor = User.objects.create_user(email=f'doc{i}@example.com', password=None, role='PROVIDER')
+            if i % 2:
+                ProviderProfile.objects.create(user=doctor, business_name=f'Clinic {i}', is_verified=True)
+        # Session, user, the groups filter, the count, and one page of doctors joined to their profiles
+        with self.assertNumQueries(5):
+            response = self.client.get('/admin/users/doctor/')
+        self.assertEqual(response.context['cl'].result_count, 10)
+        self.assertEqual(self.client.get('/admin/users/doctor/', {'q': 'doc3'}).context['cl'].result_count, 1)
@@ -1,13 +1,23 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
-from rest_framework_simplejwt.views import TokenObtainPairView
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
 from django.contrib.auth import get_user_model
-from .serializers import UserSerializer, RegisterSerializer
+from apps.core.cache import PublicListCacheMixin
+from apps.core.conditional import ConditionalListMixin
+from apps.core.pagination import KeysetPagination
+from .authentication import ClaimsUser, add_claims
+from .serializers import UserSerializer, RegisterSerializer, ProviderSummarySerializer
+from .search import search_providers
 
 User = get_user_model()
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        return add_claims(super().get_token(user), user)
+
     def validate(self, attrs):
         data = super().validate(attrs)
         data['role'] = self.user.role
@@ -17,6 +27,19 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
 
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        # Re-read the claims so role and profile changes reach the new access token
+        access = AccessToken(data['access'])
+        user = User.objects.select_related('provider_profile').filter(pk=access['user_id']).first()
+        if user is not None:
+            data['access'] = str(add_claims(access, user))
+        return data
+
+class CustomTokenRefreshView(TokenRefreshView):
+    serializer_class = CustomTokenRefreshSerializer
+
 class RegisterView(generics.CreateAPIView):
     queryset = User.objects.all()
     permission_classes = (permissions.AllowAny,)
@@ -27,9 +50,45 @@ class UserMeView(generics.RetrieveUpdateAPIView):
     serializer_class = UserSerializer
 
     def get_object(self):
-        return self.request.user
+        user = self.request.user
+        return user.db_user if isinstance(user, ClaimsUser) else user
 
-class ProviderListView(generics.ListAPIView):
-    queryset = User.objects.filter(role='PROVIDER')
-    serializer_class = UserSerializer
+class ProviderListView(PublicListCacheMixin, ConditionalListMixin, generics.ListAPIView):
     permission_classes = (permissions.AllowAny,)
+    pagination_class = KeysetPagination
+    cache_prefix = 'providers'
+    validator_fields = ('updated_at', 'provider_profile__updated_at')
+
+    def is_slim(self):
+        # ?view=slim returns flat directory cards instead of full profiles
+        return self.request.query_params.get('view') == 'slim'
+
+    def get_queryset(self):
+        qs = User.objects.filter(role='PROVIDER').select_related('provider_profile')
+        if self.is_slim():
+            qs = qs.only(
+                'id', 'first_name', 'last_name',
+                'provider_profile__business_name', 'provider_profile__specialization',
+                'provider_profile__profile_image', 'provider_profile__is_verified',
+                'provider_profile__rating_count', 'provider_profile__rating_sum',
+            )
+        return qs
+
+    def get_serializer_class(self):
+        return ProviderSummarySerializer if self.is_slim() else UserSerializer
+
+class ProviderSearchView(generics.ListAPIView):
+    """GET /api/auth/providers/search/?q=<terms> -- ranked full-text search over providers."""
+    serializer_class = ProviderSummarySerializer
+    permission_classes = (permissions.AllowAny,)
+    max_results = 50
+
+    def get_queryset(self):
+        query = self.request.query_params.get('q', '').strip()
+        try:
+            limit = max(1, min(int(self.request.query_params.get('limit', 20)), self.max_results))
+        except (TypeError, ValueError):
+            limit = 20
+        ranked = [user_id for user_id, _ in search_providers(query, limit=limit)] if query else []
+        providers = User.objects.select_related('provider_profile').in_bulk(ranked)
+        return [providers[user_id] for user_id in ranked if user_id in providers]
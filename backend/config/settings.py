@@ -67,6 +67,9 @@ MIDDLEWARE = [
 
     'corsheaders.middleware.CorsMiddleware',
 
+    # Per-request SQL/render timing: Server-Timing header and /api/metrics histograms
+    'apps.core.middleware.RequestMetricsMiddleware',
+
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -131,6 +134,90 @@ else:
     }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# CACHE_BACKEND=db (default when DEBUG is off), redis, file, locmem (default in development) or dummy.
+# Cache invalidation bumps generation keys in the cache itself, so every worker must share one
+# backend: locmem is per process, and file only spans the workers on one host. db needs
+# `manage.py createcachetable`; redis needs the redis package and CACHE_LOCATION=redis://...
+
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem' if DEBUG else 'db')
+
+if CACHE_BACKEND == 'db':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', 'django_cache'),
+            'OPTIONS': {'MAX_ENTRIES': 20000},
+        }
+    }
+elif CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', 'redis://127.0.0.1:6379/1'),
+        }
+    }
+elif CACHE_BACKEND == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_LOCATION', '/var/tmp/django_cache'),
+        }
+    }
+elif CACHE_BACKEND == 'dummy':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 5000},
+        }
+    }
+
+# Seconds an anonymous catalog response (services, providers) may be served from cache.
+# Signals invalidate entries on change; the timeout bounds staleness across processes
+# if a per-process backend (locmem) is used anyway.
+PUBLIC_CACHE_TIMEOUT = int(os.environ.get('PUBLIC_CACHE_TIMEOUT', 60))
+
+
+# Request metrics (apps/core/middleware.py)
+# METRICS_ENABLED aggregates per-route histograms served at /api/metrics (Prometheus format);
+# set METRICS_TOKEN to require "Authorization: Bearer <token>" from the scraper.
+# SERVER_TIMING adds a Server-Timing header with db/render/app/total durations to every response.
+# With both off the middleware unloads itself.
+
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'False').lower() in ('true', '1', 'yes')
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+SERVER_TIMING = os.environ.get('SERVER_TIMING', str(DEBUG)).lower() in ('true', '1', 'yes')
+
+
+# Notifications (apps/notifications)
+# The deliver_notifications worker sends outbox rows through these channels. Email goes to a
+# local SMTP stub by default (e.g. `python -m aiosmtpd -n -l localhost:1025`).
+
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 1025))
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS', 'False').lower() in ('true', '1', 'yes')
+EMAIL_TIMEOUT = 10
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'no-reply@doctorapp.local')
+
+NOTIFICATION_CHANNELS = {
+    'email': 'apps.notifications.channels.EmailChannel',
+    'webhook': 'apps.notifications.channels.WebhookChannel',
+}
+# Every appointment event is also POSTed here as JSON when set
+NOTIFICATION_WEBHOOK_URL = os.environ.get('NOTIFICATION_WEBHOOK_URL', '')
+NOTIFICATION_WEBHOOK_TIMEOUT = 10
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -215,7 +302,8 @@ AUTH_USER_MODEL = 'users.User'
 # REST Framework Configuration
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        # Authenticates from token claims; no user row is loaded per request
+        "apps.users.authentication.ClaimsJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.AllowAny",
@@ -242,3 +330,14 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_header_TYPES': ('Bearer',),
 }
+
+# Chatbot
+# Backend that generates the streamed free-text reply (see apps/chatbot/backends.py).
+# The stub is deterministic and offline; set CHATBOT_BACKEND=apps.chatbot.backends.OpenAIChatBackend
+# together with OPENAI_API_KEY to use a real model.
+CHATBOT_BACKEND = os.environ.get('CHATBOT_BACKEND', 'apps.chatbot.backends.StubChatBackend')
+OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', '')
+CHATBOT_OPENAI_MODEL = os.environ.get('CHATBOT_OPENAI_MODEL', 'gpt-4o-mini')
+# Per-process LRU cache of doctor lookups per resolved specialization
+CHATBOT_CACHE_SIZE = int(os.environ.get('CHATBOT_CACHE_SIZE', 256))
+CHATBOT_CACHE_TTL = int(os.environ.get('CHATBOT_CACHE_TTL', 60))
@@ -16,9 +16,11 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from apps.core.views import metrics
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/metrics', metrics, name='metrics'),
     path('api/auth/', include('apps.users.urls')),
     path('api/', include('apps.api_router')),
     path('api/chatbot/', include('apps.chatbot.urls')),
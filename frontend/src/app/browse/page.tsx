@@ -20,6 +20,8 @@ interface Provider {
         bio?: string;
         profile_image?: string;
     };
+    avg_rating?: number | null;
+    review_count?: number;
 }
 
 export default function BrowseProviders() {
@@ -28,19 +30,32 @@ export default function BrowseProviders() {
     const [loading, setLoading] = useState(true);
 
     useEffect(() => {
-        // Fetch all providers
+        // The directory is cursor-paginated: show the first page, then follow `next` until every provider is loaded
+        let cancelled = false;
         const fetchProviders = async () => {
             try {
-                const res = await api.get("/auth/providers/");
-                setProviders(res.data);
+                let url: string | null = "/auth/providers/";
+                let params: Record<string, number> | undefined = { page_size: 200 };
+                while (url && !cancelled) {
+                    const res = await api.get(url, { params });
+                    if (cancelled) return;
+                    setProviders(previous => [...previous, ...res.data.results]);
+                    setLoading(false);
+                    // `next` already carries the cursor and page size
+                    url = res.data.next;
+                    params = undefined;
+                }
             } catch (err) {
                 console.error("Failed to fetch providers:", err);
             } finally {
-                setLoading(false);
+                if (!cancelled) setLoading(false);
             }
         };
 
         fetchProviders();
+        return () => {
+            cancelled = true;
+        };
     }, []);
 
     const filteredProviders = providers.filter(provider => {
@@ -138,7 +153,11 @@ export default function BrowseProviders() {
                                     </div>
                                     <div className="flex items-center gap-2 text-slate-500 text-xs text-yellow-500">
                                         <Star className="h-4 w-4 fill-current" />
-                                        <span className="text-slate-700 font-medium">4.9 (120 reviews)</span>
+                                        <span className="text-slate-700 font-medium">
+                                            {provider.avg_rating
+                                                ? `${provider.avg_rating.toFixed(1)} (${provider.review_count} reviews)`
+                                                : "No reviews yet"}
+                                        </span>
                                     </div>
                                 </div>
                             </CardContent>
@@ -27,8 +27,8 @@ export default function Home() {
   const [providers, setProviders] = useState<Provider[]>([]);
 
   useEffect(() => {
-    api.get("/auth/providers/") // Endpoint created earlier
-      .then(res => setProviders(res.data))
+    api.get("/auth/providers/") // Cursor-paginated: first page only
+      .then(res => setProviders(res.data.results))
       // Fallback to empty if endpoint fails or auth required (which it shouldn't be)
       .catch(err => console.error(err));
   }, []);